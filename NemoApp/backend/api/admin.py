@@ -1,7 +1,10 @@
+import uuid
 from flask import Blueprint, jsonify, request
-from utils.decorators import require_admin
+from utils.decorators import require_admin, token_cache
+from utils.role_cache import role_cache
+from services.event_catalog import get_event_catalog
 from services.firebase_service import db
-from firebase_admin import firestore as admin_fs
+from utils.transactions import transactional, txn_metrics
 from datetime import datetime
 from utils.validators import (
     validate_event_format,
@@ -15,31 +18,37 @@ from utils.validators import (
     ensure_start_before_end,
     add_minutes_to_hhmm,
 )
+from utils.event_fields import combine_date_time, derive_event_fields
+from services.seat_shards import shard_count, init_seat_shards, resize_seat_shards
+from services.event_import import FORMATS as IMPORT_FORMATS, build_event_doc, import_events
+from services.admin_jobs import submit_job, get_job
 
 # Admin Blueprint (MVP) - Firestore-backed event creation
 
 admin_bp = Blueprint('admin', __name__)
 
-def _combine_date_time(date_str: str, time_str: str):
-    """
-    Combine 'YYYY-MM-DD' and 'HH:MM' into a naive datetime for comparison.
-    Returns None if parsing fails.
-    """
-    try:
-        return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-    except Exception:
-        return None
+# Bulk mutations (services/admin_jobs.py): max events per request, and the fields a bulk
+# update may set (ones that do not depend on each event's current values)
+BULK_MAX_EVENTS = 500
+BULK_UPDATE_FIELDS = ("title", "description", "organiser", "location", "imageUrl",
+                      "type", "region", "price")
 
 @admin_bp.route('/api/admin/health', methods=['GET'])
 @require_admin
 def admin_health(current_user):
     """
     Health check for admin routes.
+    Also reports cache/catalog/transaction metrics for dashboards.
     """
+    catalog = get_event_catalog()
     return jsonify({
         "success": True,
         "user": current_user,
-        "message": "Admin routes available"
+        "message": "Admin routes available",
+        "tokenCache": token_cache.stats(),
+        "roleCache": role_cache.stats(),
+        "eventCatalog": catalog.stats() if catalog else {"enabled": False},
+        "transactions": txn_metrics.stats()
     }), 200
 
 
@@ -66,134 +75,84 @@ def create_event(current_user):
       "endTime": "HH:MM",                   // required (24h)
       "price": 0.0,                         // SGD, >= 0
       "maxParticipants": 20,                // required (int > 0)
-      "imageUrl": "optional"
+      "imageUrl": "optional",
+      "seatShards": 10,                     // optional (2..50): sharded seat counters for high-demand events
+      "admissionQueue": false               // optional: micro-batch individual bookings (not with seatShards)
     }
     """
     body = request.get_json(silent=True) or {}
+    try:
+        event, seat_shards = build_event_doc(body, current_user)
+    except ValueError as ve:
+        return jsonify({"success": False, "error": str(ve)}), 400
 
-    # Basic required fields
-    required_basic = ["title", "description", "location", "date", "maxParticipants"]
-    missing_basic = [f for f in required_basic if body.get(f) in (None, "", [])]
-    if missing_basic:
-        return jsonify({"success": False, "error": f"Missing field(s): {', '.join(missing_basic)}"}), 400
+    try:
+        if seat_shards:
+            # Event and its shard docs are created together
+            ref = db.collection("events").document()
+            batch = db.batch()
+            batch.set(ref, event)
+            init_seat_shards(batch, ref, event["maxParticipants"], seat_shards)
+            batch.commit()
+        else:
+            ref = db.collection("events").add(event)[1]
+        return jsonify({"success": True, "eventId": ref.id, "message": "Event created successfully"}), 201
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
 
-    title = str(body.get("title")).strip()
-    description = str(body.get("description")).strip()
-    location = str(body.get("location")).strip()
-    date_str = str(body.get("date")).strip()
-    imageUrl = str(body.get("imageUrl")).strip() if body.get("imageUrl") else ""
 
-    # maxParticipants must be positive integer
-    try:
-        max_part = int(body.get("maxParticipants"))
-        if max_part <= 0:
-            raise ValueError
-    except Exception:
-        return jsonify({"success": False, "error": "maxParticipants must be a positive integer"}), 400
-
-    # Validate date
-    ok, date_val = validate_date(date_str)
-    if not ok:
-        return jsonify({"success": False, "error": date_val}), 400
-
-    # Legacy support: category -> type, time -> startTime (2h default end)
-    legacy_category = (body.get("category") or "").strip().lower()
-    legacy_time = (body.get("time") or "").strip()
-    if not body.get("type") and legacy_category:
-        mapping = {"sports": "sports", "workshop": "workshop", "cultural": "culture", "social": "other"}
-        body["type"] = mapping.get(legacy_category, "other")
-    if not body.get("startTime") and legacy_time:
-        body["startTime"] = legacy_time
-    if body.get("startTime") and not body.get("endTime"):
-        body["endTime"] = add_minutes_to_hhmm(body["startTime"], 120)
+def _import_format(upload) -> str | None:
+    """Import format from ?format=, else the uploaded file name, else the Content-Type."""
+    fmt = (request.args.get("format") or "").strip().lower()
+    if fmt:
+        return fmt
+    name = (getattr(upload, "filename", None) or "").lower()
+    mimetype = (getattr(upload, "mimetype", None) or request.mimetype or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or mimetype in ("application/jsonl", "application/x-ndjson"):
+        return "jsonl"
+    if name.endswith(".csv") or mimetype == "text/csv":
+        return "csv"
+    return None
 
-    # format
-    fmt_input = body.get("format", "offline")  # default offline for legacy
-    ok, fmt = validate_event_format(fmt_input)
-    if not ok:
-        return jsonify({"success": False, "error": fmt}), 400
-
-    # venueType (for offline only)
-    ok, venue_type = validate_event_venue_type(fmt, body.get("venueType"))
-    if not ok:
-        return jsonify({"success": False, "error": venue_type}), 400
-
-    # type
-    if not body.get("type"):
-        return jsonify({"success": False, "error": "type is required"}), 400
-    ok, ev_type = validate_event_type(body.get("type"))
-    if not ok:
-        return jsonify({"success": False, "error": ev_type}), 400
 
-    # region
-    if not body.get("region"):
-        return jsonify({"success": False, "error": "region is required"}), 400
-    ok, region = validate_event_region(body.get("region"))
-    if not ok:
-        return jsonify({"success": False, "error": region}), 400
-
-    # organiser
-    organiser = str(body.get("organiser") or "").strip()
-    if not organiser:
-        return jsonify({"success": False, "error": "organiser is required"}), 400
-
-    # times
-    ok, st = validate_hhmm_time(body.get("startTime"), "startTime")
-    if not ok:
-        return jsonify({"success": False, "error": st}), 400
-    ok, et = validate_hhmm_time(body.get("endTime"), "endTime")
-    if not ok:
-        return jsonify({"success": False, "error": et}), 400
-
-    ok, _ = ensure_start_before_end(date_val, st, et)
-    if not ok:
-        return jsonify({"success": False, "error": _}), 400
+@admin_bp.route('/api/admin/events/import', methods=['POST'])
+@require_admin
+def import_events_bulk(current_user):
+    """
+    Bulk-create events from a JSON Lines or CSV file (one event per row, same fields as POST
+    /api/admin/events; CSV columns are those field names).
 
-    # price
-    ok, price = validate_price_float(body.get("price", 0))
-    if not ok:
-        return jsonify({"success": False, "error": price}), 400
-
-    # derive timing
-    timing = derive_timing_bucket(st)
-
-    # Disallow creating events scheduled in the past (relative to current UTC time)
-    event_dt = _combine_date_time(date_val, st)
-    if not event_dt:
-        return jsonify({"success": False, "error": "Invalid date/time combination"}), 400
-    if event_dt <= datetime.utcnow():
-        return jsonify({"success": False, "error": "Event start must be in the future"}), 400
-
-    # Compose event doc (new schema)
-    event = {
-        "title": title,
-        "description": description,
-        "format": fmt,
-        "venueType": venue_type,
-        "type": ev_type,
-        "region": region,
-        "organiser": organiser,
-        "location": location,
-        "date": date_val,
-        "startTime": st,
-        "endTime": et,
-        "timing": timing,
-        "price": price,
-        "imageUrl": imageUrl,
-        "maxParticipants": max_part,
-        "currentParticipants": 0,
-        "participants": [],
-        "guestEntries": [],          # for guest name bookings
-        "createdBy": current_user,
-        "status": "upcoming",
-        "createdAt": admin_fs.SERVER_TIMESTAMP
+    Upload as multipart "file" or as the raw request body:
+      POST /api/admin/events/import?format=jsonl|csv[&importId=...]
+
+    Rows are streamed, validated one by one and written with batched commits; invalid rows are
+    reported and skipped. Progress is checkpointed under importId (generated when omitted and
+    returned), so re-posting the same file with the same importId after a failure resumes after
+    the last committed row, and re-posting a completed import returns its summary.
+
+    Response:
+    {
+      "success": true, "importId": "...", "status": "completed",
+      "rowsRead": 120, "created": 118, "failed": 2, "resumedFrom": 0,
+      "errors": [{"row": 7, "error": "region is required"}, ...]
     }
+    """
+    upload = request.files.get("file")
+    fmt = _import_format(upload)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"success": False, "error": f"format must be one of {list(IMPORT_FORMATS)}"}), 400
 
+    import_id = (request.args.get("importId") or "").strip() or uuid.uuid4().hex
+    stream = upload.stream if upload else request.stream
     try:
-        ref = db.collection("events").add(event)[1]
-        return jsonify({"success": True, "eventId": ref.id, "message": "Event created successfully"}), 201
+        summary = import_events(stream, fmt, current_user, import_id=import_id,
+                                source=(upload.filename if upload else "") or "")
+        return jsonify({"success": True, **summary}), 200
+    except ValueError as ve:
+        return jsonify({"success": False, "error": str(ve)}), 400
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        # Committed batches are checkpointed: retry with the same importId to resume
+        return jsonify({"success": False, "importId": import_id, "error": str(e)}), 500
 
 
 @admin_bp.route('/api/admin/events/<event_id>', methods=['PUT'])
@@ -203,7 +162,7 @@ def update_event(current_user, event_id: str):
     Update an existing event (admin only).
     Accepts any subset of new fields:
       - title, description, format, venueType, type, region, organiser, location,
-        date, startTime, endTime, price, maxParticipants, imageUrl, status
+        date, startTime, endTime, price, maxParticipants, imageUrl, status, admissionQueue
     Backward-compat:
       - category -> type mapping
       - time -> startTime (adds 2h to endTime if not provided)
@@ -313,7 +272,7 @@ def update_event(current_user, event_id: str):
             return jsonify({"success": False, "error": _}), 400
         # Not in the past (if changing start)
         if ("date" in updates) or ("startTime" in updates):
-            event_dt = _combine_date_time(eff_date, eff_start)
+            event_dt = combine_date_time(eff_date, eff_start)
             if not event_dt:
                 return jsonify({"success": False, "error": "Invalid date/time combination"}), 400
             if event_dt <= datetime.utcnow():
@@ -327,6 +286,14 @@ def update_event(current_user, event_id: str):
             return jsonify({"success": False, "error": price}), 400
         updates["price"] = price
 
+    # admissionQueue toggle (flash-sale batching; not for sharded events)
+    if "admissionQueue" in body:
+        if not isinstance(body.get("admissionQueue"), bool):
+            return jsonify({"success": False, "error": "admissionQueue must be a boolean"}), 400
+        if body["admissionQueue"] and shard_count(current):
+            return jsonify({"success": False, "error": "admissionQueue cannot be combined with seatShards"}), 400
+        updates["admissionQueue"] = body["admissionQueue"]
+
     # maxParticipants check (must be >= currentParticipants)
     if "maxParticipants" in body:
         try:
@@ -336,16 +303,44 @@ def update_event(current_user, event_id: str):
         except Exception:
             return jsonify({"success": False, "error": "maxParticipants must be a positive integer"}), 400
         current_part = int(current.get("currentParticipants", 0) or 0)
-        if new_max < current_part:
+        # Sharded events are checked against the live shard totals in the transaction
+        if not shard_count(current) and new_max < current_part:
             return jsonify({"success": False, "error": f"maxParticipants cannot be less than currentParticipants ({current_part})"}), 400
         updates["maxParticipants"] = new_max
 
     if not updates:
         return jsonify({"success": False, "error": "No valid fields to update"}), 400
 
+    # Write inside a transaction so derived fields (availableSlots, startTimestamp, timing)
+    # are recomputed against the latest currentParticipants.
+    transaction = db.transaction()
+
+    @transactional('admin.update_event')
+    def _txn_update(txn):
+        snap_txn = ref.get(transaction=txn)
+        if not snap_txn.exists:
+            raise ValueError("Event not found")
+        merged = dict(snap_txn.to_dict() or {})
+        n_shards = shard_count(merged)
+        if n_shards and "maxParticipants" in updates:
+            # Resize the shards; currentParticipants comes from their live totals
+            merged["currentParticipants"] = resize_seat_shards(txn, ref, n_shards, updates["maxParticipants"])
+        merged.update(updates)
+        cur_p = int(merged.get("currentParticipants", 0) or 0)
+        if "maxParticipants" in updates and updates["maxParticipants"] < cur_p:
+            raise ValueError(f"maxParticipants cannot be less than currentParticipants ({cur_p})")
+        final = dict(updates)
+        if n_shards and "maxParticipants" in updates:
+            final["currentParticipants"] = cur_p
+        final.update(derive_event_fields(merged))
+        txn.set(ref, final, merge=True)
+        return final
+
     try:
-        ref.set(updates, merge=True)
-        return jsonify({"success": True, "message": "Event updated", "updated": updates}), 200
+        final = _txn_update(transaction)
+        return jsonify({"success": True, "message": "Event updated", "updated": final}), 200
+    except ValueError as ve:
+        return jsonify({"success": False, "error": str(ve)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -354,18 +349,120 @@ def update_event(current_user, event_id: str):
 @require_admin
 def delete_event(current_user, event_id: str):
     """
-    Delete an event (admin only).
-    Notes:
-      - This removes the event document. Any existing client references will break.
-      - If booking data is stored elsewhere, add cleanup here accordingly.
+    Delete an event (admin only) together with what hangs off it, as a background job:
+      - the event is marked status "deleting", so no new bookings are accepted
+      - its confirmed bookings are marked cancelled (cancelReason "event_deleted")
+      - its attendees and seat shard documents are deleted, then the event document
+    Calling it again for an event whose deletion was interrupted starts a new job.
+    Returns 202 with a jobId; poll GET /api/admin/jobs/<jobId> for progress.
     """
     try:
-        ref = db.collection("events").document(event_id)
-        snap = ref.get()
+        snap = db.collection("events").document(event_id).get(field_paths=["status"])
         if not snap.exists:
             return jsonify({"success": False, "error": "Event not found"}), 404
 
-        ref.delete()
-        return jsonify({"success": True, "message": "Event deleted"}), 200
+        job_id = submit_job("events.delete", {"eventIds": [event_id]}, current_user)
+        return jsonify({
+            "success": True,
+            "jobId": job_id,
+            "status": "queued",
+            "message": "Event deletion started"
+        }), 202
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def _bulk_event_updates(raw) -> dict:
+    """
+    Validate the "updates" of a bulk update: fields that do not depend on the event's current
+    values (schedule, format and capacity changes go through PUT /api/admin/events/<id>).
+    Raises ValueError.
+    """
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("updates must be a non-empty object")
+    unsupported = sorted(set(raw) - set(BULK_UPDATE_FIELDS))
+    if unsupported:
+        raise ValueError(f"Field(s) not supported in bulk updates: {', '.join(unsupported)}")
+
+    updates = {}
+    for k in ("title", "description", "organiser", "location", "imageUrl"):
+        if k in raw:
+            if not isinstance(raw[k], str):
+                raise ValueError(f"{k} must be a string")
+            updates[k] = raw[k].strip()
+    for k, validate in (("type", validate_event_type), ("region", validate_event_region),
+                        ("price", validate_price_float)):
+        if k in raw:
+            ok, value = validate(raw[k])
+            if not ok:
+                raise ValueError(value)
+            updates[k] = value
+    return updates
+
+
+@admin_bp.route('/api/admin/events/bulk', methods=['POST'])
+@require_admin
+def bulk_event_mutation(current_user):
+    """
+    Cancel, delete or update many events in one background job.
+    Body:
+    {
+      "action": "cancel" | "delete" | "update",
+      "eventIds": ["evt_1", "evt_2", ...],        // up to 500
+      "updates": {"price": 10, "location": "..."} // action == "update" only
+    }
+    - cancel: status=cancelled on each event (new bookings rejected) and its confirmed bookings
+      marked cancelled; this events.cancel job is the only way to cancel, as status is not updatable
+    - delete: as DELETE /api/admin/events/<id> for each event
+    - update: fields title, description, organiser, location, imageUrl, type, region, price
+      (BULK_UPDATE_FIELDS)
+    Returns 202 with a jobId; poll GET /api/admin/jobs/<jobId> for progress.
+    """
+    body = request.get_json(silent=True) or {}
+    action = body.get("action")
+    if action not in ("cancel", "delete", "update"):
+        return jsonify({"success": False, "error": "action must be one of ['cancel', 'delete', 'update']"}), 400
+
+    raw_ids = body.get("eventIds")
+    if not isinstance(raw_ids, list) or not raw_ids or not all(isinstance(e, str) and e.strip() for e in raw_ids):
+        return jsonify({"success": False, "error": "eventIds must be a non-empty list of strings"}), 400
+    event_ids = list(dict.fromkeys(e.strip() for e in raw_ids))
+    if len(event_ids) > BULK_MAX_EVENTS:
+        return jsonify({"success": False, "error": f"At most {BULK_MAX_EVENTS} events per request"}), 400
+
+    params = {"eventIds": event_ids}
+    if action == "update":
+        try:
+            params["updates"] = _bulk_event_updates(body.get("updates"))
+        except ValueError as ve:
+            return jsonify({"success": False, "error": str(ve)}), 400
+
+    try:
+        job_id = submit_job(f"events.{action}", params, current_user)
+        return jsonify({"success": True, "jobId": job_id, "status": "queued"}), 202
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@admin_bp.route('/api/admin/jobs/<job_id>', methods=['GET'])
+@require_admin
+def get_admin_job(current_user, job_id: str):
+    """
+    Status of a background admin job:
+    {
+      "success": true,
+      "job": {
+        "id": "...", "kind": "events.delete", "status": "queued" | "running" | "completed" | "failed",
+        "progress": {"eventsTotal": 1, "eventsDone": 1, "bookingsCancelled": 250,
+                     "documentsDeleted": 250, "eventsUpdated": 0, "failedWrites": 0},
+        "errors": []
+      }
+    }
+    """
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        return jsonify({"success": True, "job": job}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
@@ -1,17 +1,32 @@
 from flask import Blueprint, jsonify, request
 from utils.decorators import require_auth
+from utils.idempotency import idempotent
 from services.firebase_service import db
 from firebase_admin import firestore as admin_fs
+from utils.transactions import transactional
+import time
 from datetime import datetime, timedelta
+from utils.event_fields import combine_date_time, compute_available_slots
+from services.seat_shards import (
+    shard_count, known_seat_mode, remember_seat_mode, get_seat_modes, allocate_seats, release_seats,
+    rollup_after_write,
+)
+from services.attendance import (
+    attendee_ref, read_attendee, attendance_of, attendee_record, legacy_removal, guest_key,
+)
+from services.admission_queue import RESULT_TIMEOUT_SECONDS, get_admission_queue, wait_admitted
+from services.batch_get import get_many
 
 bookings_bp = Blueprint('bookings', __name__)
 
-def _combine_date_time(date_str: str, time_str: str):
-    """Combine 'YYYY-MM-DD' and 'HH:MM' to a naive UTC datetime."""
-    try:
-        return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-    except Exception:
-        return None
+# Event fields needed for the booking summary and isPast computation
+_EVENT_SUMMARY_FIELDS = ['title', 'date', 'startTime', 'time', 'location', 'type', 'category', 'startTimestamp']
+# Bulk booking: max event ids per request, and events booked per transaction (3 writes each)
+_BULK_MAX_EVENTS = 50
+_BULK_TXN_EVENTS = 10
+# Event fields a sharded booking reads in its transaction: status for _check_bookable, and
+# seatTotalsAt so the rollup afterwards can skip its own read when it is not yet due
+SHARD_BOOKING_FIELDS = ['status', 'seatTotalsAt']
 
 def _get_event_in_txn(transaction, event_id):
     event_ref = db.collection('events').document(event_id)
@@ -20,8 +35,392 @@ def _get_event_in_txn(transaction, event_id):
         raise ValueError('Event not found')
     return event_ref, event_snap
 
+def _individual_booking_doc(event_id: str, current_user: str) -> dict:
+    return {
+        'eventId': event_id,
+        'userId': current_user,
+        'bookingType': 'individual',
+        'groupMembers': [],
+        'status': 'confirmed',
+        'createdAt': admin_fs.SERVER_TIMESTAMP
+    }
+
+def _group_booking_doc(event_id: str, current_user: str, guest_names: list) -> dict:
+    # Group booking stores both uids and names
+    return {
+        'eventId': event_id,
+        'userId': current_user,
+        'bookingType': 'group',
+        'groupMembers': [current_user],   # initiator only per policy
+        'guestNames': guest_names,        # guest seats this booking added
+        'status': 'confirmed',
+        'createdAt': admin_fs.SERVER_TIMESTAMP
+    }
+
+def _check_bookable(event: dict) -> None:
+    """Reject bookings on events an admin cancelled or is deleting (services/admin_jobs.py)."""
+    status = str(event.get('status') or '').lower()
+    if status == 'cancelled':
+        raise ValueError('Event is cancelled')
+    if status == 'deleting':
+        raise ValueError('Event not found')
+
+class BookingPathChanged(Exception):
+    """Raised in a plain booking transaction whose event needs the sharded or admission-queue path."""
+
+    def __init__(self, n_shards: int, event: dict):
+        super().__init__('Event uses another booking path')
+        self.n_shards = n_shards
+        self.event = event
+
+def _check_plain_path(event_id: str, event: dict, queue: bool = True) -> None:
+    """
+    First step of a plain booking transaction, after its event read: sharded events (and queued
+    ones when `queue`) raise BookingPathChanged before anything else is read or written.
+    """
+    n_shards = shard_count(event)
+    if n_shards or (queue and event.get('admissionQueue')):
+        remember_seat_mode(event_id, event)
+        raise BookingPathChanged(n_shards, event)
+
+def _plan_individual_booking(event: dict, attendee: dict, event_id: str, current_user: str):
+    """
+    Validate an individual booking against the event and the caller's attendee doc
+    (services/attendance.py) read in the transaction.
+    Returns (booking_data, event_update, attendee_data); raises ValueError when the user cannot join.
+    Shared by the sync and async (api_async/bookings.py) handlers.
+    """
+    _check_bookable(event)
+    max_part = int(event.get('maxParticipants', 0) or 0)
+    current_part = int(event.get('currentParticipants', 0) or 0)
+    joined, guests = attendance_of(event, attendee, current_user)
+
+    if joined:
+        raise ValueError('User already joined this event')
+
+    available = max_part - current_part
+    if available <= 0:
+        raise ValueError('Event is full')
+
+    booking_data = _individual_booking_doc(event_id, current_user)
+    event_update = {
+        'currentParticipants': admin_fs.Increment(1),
+        'availableSlots': available - 1
+    }
+    return booking_data, event_update, attendee_record(current_user, True, guests)
+
+def _commit_individual_batch(event_id: str, uids: list) -> list:
+    """
+    Admit a batch of individual bookings in one transaction (services/admission_queue.py).
+    Requests are planned in arrival order against the event as updated by the earlier ones,
+    so the batch never overbooks. Returns a booking id or ValueError per uid.
+    """
+    transaction = db.transaction()
+
+    @transactional('bookings.admission_batch')
+    def _txn_admit(transaction):
+        event_ref, event_snap = _get_event_in_txn(transaction, event_id)
+        event = event_snap.to_dict() or {}
+        refs = [attendee_ref(event_ref, uid) for uid in dict.fromkeys(uids)]
+        attendees = {snap.id: (snap.to_dict() or {}) for snap in transaction.get_all(refs) if snap.exists}
+
+        results, admitted = [], 0
+        for uid in uids:
+            try:
+                booking_data, _, attendee_data = _plan_individual_booking(event, attendees.get(uid, {}), event_id, uid)
+            except ValueError as ve:
+                results.append(ve)
+                continue
+            booking_ref = db.collection('bookings').document()
+            transaction.set(booking_ref, booking_data)
+            transaction.set(attendee_ref(event_ref, uid), attendee_data)
+            attendees[uid] = attendee_data
+            event['currentParticipants'] = int(event.get('currentParticipants', 0) or 0) + 1
+            admitted += 1
+            results.append(booking_ref.id)
+
+        if admitted:
+            transaction.update(event_ref, {
+                'currentParticipants': admin_fs.Increment(admitted),
+                'availableSlots': compute_available_slots(event.get('maxParticipants'), event['currentParticipants'])
+            })
+        return results
+
+    return _txn_admit(transaction)
+
+def _submit_individual_booking(event_id: str, current_user: str):
+    """Queue an individual booking on an admissionQueue event. Returns a Future for the booking id."""
+    queue = get_admission_queue(event_id, lambda uids: _commit_individual_batch(event_id, uids))
+    return queue.submit(current_user)
+
+def _commit_bulk_batch(event_ids: list, current_user: str) -> dict:
+    """
+    Book current_user on plain (unsharded, unqueued) events in one transaction: every event and
+    attendee doc is read in a single get_all, each event is planned like an individual booking,
+    and only the events that pass are written. Returns {event_id: booking id or ValueError}.
+    """
+    events = db.collection('events')
+    event_refs = {eid: events.document(eid) for eid in event_ids}
+    transaction = db.transaction()
+
+    @transactional('bookings.bulk')
+    def _txn_bulk(transaction):
+        refs = list(event_refs.values()) + [attendee_ref(r, current_user) for r in event_refs.values()]
+        snaps = {snap.reference.path: snap for snap in transaction.get_all(refs)}
+
+        results = {}
+        for eid, event_ref in event_refs.items():
+            event_snap = snaps.get(event_ref.path)
+            if event_snap is None or not event_snap.exists:
+                results[eid] = ValueError('Event not found')
+                continue
+            attendee_snap = snaps.get(attendee_ref(event_ref, current_user).path)
+            attendee = (attendee_snap.to_dict() or {}) if attendee_snap is not None and attendee_snap.exists else {}
+            try:
+                booking_data, event_update, attendee_data = _plan_individual_booking(
+                    event_snap.to_dict() or {}, attendee, eid, current_user
+                )
+            except ValueError as ve:
+                results[eid] = ve
+                continue
+            booking_ref = db.collection('bookings').document()
+            transaction.set(booking_ref, booking_data)
+            transaction.set(attendee_ref(event_ref, current_user), attendee_data)
+            transaction.update(event_ref, event_update)
+            results[eid] = booking_ref.id
+        return results
+
+    return _txn_bulk(transaction)
+
+def _book_events_bulk(event_ids: list, current_user: str) -> list:
+    """
+    Individual bookings for current_user on each of event_ids (deduped, in order).
+    Plain events are booked _BULK_TXN_EVENTS per transaction; sharded and admissionQueue
+    events go through their own paths (queued requests are submitted before any is awaited).
+    Returns [{eventId, success, bookingId | error}] in request order.
+    Shared by the sync and async (api_async/bookings.py) handlers.
+    """
+    outcomes, plain, queued = {}, [], {}
+    modes = get_seat_modes(event_ids)
+    for eid in event_ids:
+        try:
+            if eid not in modes:
+                raise ValueError('Event not found')
+            n_shards, event = modes[eid]
+            if n_shards:
+                outcomes[eid], _ = _create_sharded_booking(eid, current_user, n_shards)
+            elif event.get('admissionQueue'):
+                queued[eid] = _submit_individual_booking(eid, current_user)
+            else:
+                plain.append(eid)
+        except ValueError as ve:
+            outcomes[eid] = ve
+
+    for i in range(0, len(plain), _BULK_TXN_EVENTS):
+        chunk = plain[i:i + _BULK_TXN_EVENTS]
+        try:
+            outcomes.update(_commit_bulk_batch(chunk, current_user))
+        except ValueError as ve:
+            # Retries exhausted: the whole chunk failed
+            outcomes.update({eid: ve for eid in chunk})
+
+    deadline = time.monotonic() + RESULT_TIMEOUT_SECONDS
+    for eid, future in queued.items():
+        try:
+            outcomes[eid] = wait_admitted(future, timeout=max(0.0, deadline - time.monotonic()))
+        except (ValueError, TimeoutError) as e:
+            outcomes[eid] = e
+
+    results = []
+    for eid in event_ids:
+        outcome = outcomes[eid]
+        if isinstance(outcome, Exception):
+            results.append({'eventId': eid, 'success': False, 'error': str(outcome)})
+        else:
+            results.append({'eventId': eid, 'success': True, 'bookingId': outcome})
+    return results
+
+def _parse_bulk_event_ids(raw_ids) -> list:
+    """Validate the bulk "eventIds" list: non-empty strings, de-duplicated in order. Raises ValueError."""
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError('eventIds must be a non-empty list')
+    if not all(isinstance(e, str) and e.strip() for e in raw_ids):
+        raise ValueError('eventIds must contain non-empty strings')
+    event_ids = list(dict.fromkeys(e.strip() for e in raw_ids))
+    if len(event_ids) > _BULK_MAX_EVENTS:
+        raise ValueError(f'At most {_BULK_MAX_EVENTS} events per bulk booking')
+    return event_ids
+
+def _bulk_response(results: list):
+    """(payload, status): 201 when at least one booking was created, else 400."""
+    booked = sum(1 for r in results if r['success'])
+    payload = {
+        'success': booked > 0,
+        'booked': booked,
+        'failed': len(results) - booked,
+        'results': results,
+    }
+    if not booked:
+        payload['error'] = 'No events were booked'
+    return payload, (201 if booked else 400)
+
+def _parse_guest_names(raw_names) -> list:
+    """Sanitize names: trim, drop empties, de-dup case-insensitively (preserve first casing)."""
+    if not isinstance(raw_names, list):
+        return []
+    seen = set()
+    guest_names = []
+    for n in raw_names:
+        if not isinstance(n, str):
+            continue
+        t = n.strip()
+        if not t:
+            continue
+        key = guest_key(t)
+        if key in seen:
+            continue
+        seen.add(key)
+        guest_names.append(t)
+    return guest_names
+
+def _new_group_seats(joined: bool, guests: dict, current_user: str, guest_names: list):
+    """
+    Seats a group booking adds: (new_uids, new_guests). Only the initiator UID counts;
+    guest names already in the initiator's guests map ({guest_key: name}) are skipped.
+    Raises ValueError when nothing new is requested.
+    """
+    # Ignore any provided UID members per policy; only initiator UID counts
+    new_uids = [] if joined else [current_user]
+
+    new_guests = {}
+    for n in guest_names:
+        key = guest_key(n)
+        if key not in guests and key not in new_guests:
+            new_guests[key] = n
+
+    if not new_uids and not new_guests:
+        raise ValueError('No new seats requested')
+    return new_uids, new_guests
+
+def _plan_group_booking(event: dict, attendee: dict, event_id: str, current_user: str, guest_names: list):
+    """
+    Validate a group booking (initiator seat if needed + new guest names) against the event and
+    the initiator's attendee doc read in the transaction.
+    Returns (booking_data, event_update, attendee_data, seats_needed); raises ValueError.
+    """
+    _check_bookable(event)
+    max_part = int(event.get('maxParticipants', 0) or 0)
+    current_part = int(event.get('currentParticipants', 0) or 0)
+    joined, guests = attendance_of(event, attendee, current_user)
+    new_uids, new_guests = _new_group_seats(joined, guests, current_user, guest_names)
+
+    # Seats requested = new UIDs + new guest names
+    seats_needed = len(new_uids) + len(new_guests)
+
+    available = max_part - current_part
+    if seats_needed > available:
+        raise ValueError(f'Only {available} spots available')
+
+    # Only the guests this booking added, so cancelling it frees exactly those keys
+    booking_data = _group_booking_doc(event_id, current_user, list(new_guests.values()))
+    update_data = {
+        'currentParticipants': admin_fs.Increment(seats_needed),
+        'availableSlots': available - seats_needed
+    }
+    attendee_data = attendee_record(current_user, joined or bool(new_uids), {**guests, **new_guests})
+    return booking_data, update_data, attendee_data, seats_needed
+
+def _book_sharded_in_txn(transaction, event_ref, n_shards: int, event_id: str, current_user: str, guest_names=None):
+    """
+    Booking on a sharded event (services/seat_shards.py): membership comes from the caller's
+    attendee doc and seats from the shards, so the event document is never written. Its
+    SHARD_BOOKING_FIELDS are read in the transaction, so a booking that races an admin
+    cancel/delete job (services/admin_jobs.py) is retried against the new status.
+    guest_names=None books an individual seat.
+    Returns (booking_id, seats_added, event fields); raises ValueError like the single-document path.
+    """
+    event_snap = event_ref.get(field_paths=SHARD_BOOKING_FIELDS, transaction=transaction)
+    if not event_snap.exists:
+        raise ValueError('Event not found')
+    event = event_snap.to_dict() or {}
+    _check_bookable(event)
+    attendee = read_attendee(transaction, event_ref, current_user)
+    joined, guests = attendance_of({}, attendee, current_user)
+
+    if guest_names is None:
+        if joined:
+            raise ValueError('User already joined this event')
+        new_uids, new_guests = [current_user], {}
+        booking_data = _individual_booking_doc(event_id, current_user)
+    else:
+        new_uids, new_guests = _new_group_seats(joined, guests, current_user, guest_names)
+        booking_data = _group_booking_doc(event_id, current_user, list(new_guests.values()))
+
+    seats_needed = len(new_uids) + len(new_guests)
+    allocation = allocate_seats(transaction, event_ref, n_shards, seats_needed)
+
+    held = dict(attendee.get('shards') or {})
+    for k, taken in allocation.items():
+        held[k] = int(held.get(k, 0) or 0) + taken
+    transaction.set(attendee_ref(event_ref, current_user),
+                    attendee_record(current_user, joined or bool(new_uids), {**guests, **new_guests}, shards=held))
+
+    booking_ref = db.collection('bookings').document()
+    transaction.set(booking_ref, booking_data)
+    return booking_ref.id, seats_needed, event
+
+def _create_sharded_booking(event_id: str, current_user: str, n_shards: int, guest_names=None):
+    """Run _book_sharded_in_txn in its own transaction, then refresh the event's seat rollup."""
+    event_ref = db.collection('events').document(event_id)
+    transaction = db.transaction()
+
+    @transactional('bookings.sharded_create')
+    def _txn_create_sharded(transaction):
+        return _book_sharded_in_txn(transaction, event_ref, n_shards, event_id, current_user, guest_names)
+
+    booking_id, seats_added, event = _txn_create_sharded(transaction)
+    rollup_after_write(event_ref, event)
+    return booking_id, seats_added
+
+def _release_attendance_in_txn(txn, e_ref, event: dict, booking: dict, current_user: str) -> int:
+    """
+    Free the seats a cancelled booking held: the caller's own seat (if joined) and the booking's
+    guest names. Updates the attendee doc and either the shards (sharded events) or the event
+    counters, removing any legacy participants/guestEntries entries. Returns seats freed.
+    Reads the attendee doc (and shards) before writing, so call it before any other write.
+    """
+    a_ref = attendee_ref(e_ref, current_user)
+    a_snap = a_ref.get(transaction=txn)
+    attendee = (a_snap.to_dict() or {}) if a_snap.exists else {}
+    joined, guests = attendance_of(event, attendee, current_user)
+    cancelled = {guest_key(n) for n in (booking.get('guestNames') or []) if isinstance(n, str)}
+    kept = {k: n for k, n in guests.items() if k not in cancelled}
+    dec = (1 if joined else 0) + len(guests) - len(kept)
+
+    extra = {}
+    if shard_count(event):
+        held = dict(attendee.get('shards') or {})
+        extra['shards'] = release_seats(txn, e_ref, held, dec) if dec else held
+    else:
+        ev_update = legacy_removal(event, current_user, cancelled)
+        if dec > 0:
+            ev_update['currentParticipants'] = admin_fs.Increment(-dec)
+            ev_update['availableSlots'] = compute_available_slots(
+                event.get('maxParticipants'),
+                int(event.get('currentParticipants', 0) or 0) - dec
+            )
+        if ev_update:
+            txn.update(e_ref, ev_update)
+
+    if kept:
+        txn.set(a_ref, attendee_record(current_user, False, kept, **extra))
+    elif a_snap.exists:
+        txn.delete(a_ref)
+    return dec
+
 @bookings_bp.route('/api/bookings/individual', methods=['POST'])
 @require_auth
+@idempotent('bookings.individual')
 def create_individual_booking(current_user):
     """
     Create an individual booking.
@@ -29,8 +428,13 @@ def create_individual_booking(current_user):
     Behavior:
       - Prevent double booking for the same user
       - Enforce event capacity atomically via Firestore transaction
-      - Update event participants and currentParticipants
+      - Record the seat in events/{id}/attendees/{uid} and increment currentParticipants
       - Create a booking document
+      - Events created with seatShards take the seat from a seat shard instead of the
+        event counters (see services/seat_shards.py)
+      - Events with admissionQueue=true admit concurrent requests in micro-batched
+        transactions, in arrival order (see services/admission_queue.py)
+      - Optional Idempotency-Key header: a retry replays the first response (utils/idempotency.py)
     """
     body = request.get_json(silent=True) or {}
     event_id = body.get('eventId')
@@ -39,44 +443,36 @@ def create_individual_booking(current_user):
 
     transaction = db.transaction()
 
-    @admin_fs.transactional
+    @transactional('bookings.individual')
     def _txn_create_individual(transaction):
         event_ref, event_snap = _get_event_in_txn(transaction, event_id)
-        event = event_snap.to_dict()
-
-        max_part = int(event.get('maxParticipants', 0) or 0)
-        current_part = int(event.get('currentParticipants', 0) or 0)
-        participants = set(event.get('participants', []))
-
-        if current_user in participants:
-            raise ValueError('User already joined this event')
-
-        available = max_part - current_part
-        if available <= 0:
-            raise ValueError('Event is full')
+        event = event_snap.to_dict() or {}
+        _check_plain_path(event_id, event)
+        attendee = read_attendee(transaction, event_ref, current_user)
+        booking_data, event_update, attendee_data = _plan_individual_booking(
+            event, attendee, event_id, current_user
+        )
 
-        # Create booking
+        # Create booking, attendee and update event counters atomically
         booking_ref = db.collection('bookings').document()
-        booking_data = {
-            'eventId': event_id,
-            'userId': current_user,
-            'bookingType': 'individual',
-            'groupMembers': [],
-            'status': 'confirmed',
-            'createdAt': admin_fs.SERVER_TIMESTAMP
-        }
         transaction.set(booking_ref, booking_data)
-
-        # Update event atomically
-        transaction.update(event_ref, {
-            'currentParticipants': admin_fs.Increment(1),
-            'participants': admin_fs.ArrayUnion([current_user])
-        })
+        transaction.set(attendee_ref(event_ref, current_user), attendee_data)
+        transaction.update(event_ref, event_update)
 
         return booking_ref.id
 
     try:
-        booking_id = _txn_create_individual(transaction)
+        # Unknown and plain events go straight to the transaction, which reads the event itself
+        n_shards, event = known_seat_mode(event_id) or (0, {})
+        if not n_shards and not event.get('admissionQueue'):
+            try:
+                booking_id = _txn_create_individual(transaction)
+            except BookingPathChanged as changed:
+                n_shards, event = changed.n_shards, changed.event
+        if n_shards:
+            booking_id, _ = _create_sharded_booking(event_id, current_user, n_shards)
+        elif event.get('admissionQueue'):
+            booking_id = wait_admitted(_submit_individual_booking(event_id, current_user))
         return jsonify({
             'success': True,
             'bookingId': booking_id,
@@ -84,12 +480,15 @@ def create_individual_booking(current_user):
         }), 201
     except ValueError as ve:
         return jsonify({'success': False, 'error': str(ve)}), 400
+    except TimeoutError as te:
+        return jsonify({'success': False, 'error': str(te)}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @bookings_bp.route('/api/bookings/group', methods=['POST'])
 @require_auth
+@idempotent('bookings.group')
 def create_group_booking(current_user):
     """
     Create a group booking.
@@ -106,108 +505,31 @@ def create_group_booking(current_user):
       }
     Behavior:
       - Always includes the initiating current_user (if not already a participant).
-      - Adds guest names as seat reservations (no account), recorded on event.guestEntries.
+      - Adds guest names as seat reservations (no account), recorded on the initiator's
+        events/{id}/attendees/{uid} doc.
       - Enforces remaining capacity atomically across the current_user seat (if needed) and guest names.
       - Creates one booking document representing the group booking, storing the initiator UID and guest names.
+      - Sharded events (seatShards) claim the seats from seat shards; see create_individual_booking.
     """
     body = request.get_json(silent=True) or {}
     event_id = body.get('eventId')
-
-    # Ignore any provided UID members per policy; only initiator UID counts
-    group_members = []
-
-    # Parse guest names (strings)
-    raw_names = body.get('groupMemberNames', [])
-    if not isinstance(raw_names, list):
-        raw_names = []
-
-    # Prepare initiator-only UID list
-    deduped_uids = [current_user]
-
-    # Sanitize names: trim, drop empties, de-dup case-insensitively (preserve first casing)
-    seen = set()
-    guest_names = []
-    for n in raw_names:
-        if not isinstance(n, str):
-            continue
-        t = n.strip()
-        if not t:
-            continue
-        key = t.casefold()
-        if key in seen:
-            continue
-        seen.add(key)
-        guest_names.append(t)
+    guest_names = _parse_guest_names(body.get('groupMemberNames', []))
 
     transaction = db.transaction()
 
-    @admin_fs.transactional
+    @transactional('bookings.group')
     def _txn_create_group(transaction):
         event_ref, event_snap = _get_event_in_txn(transaction, event_id)
-        event = event_snap.to_dict()
-
-        max_part = int(event.get('maxParticipants', 0) or 0)
-        current_part = int(event.get('currentParticipants', 0) or 0)
-        participants = set(event.get('participants', []))
-
-        # Compute new UIDs to actually add (initiator only)
-        new_uids = [uid for uid in deduped_uids if uid not in participants]
-
-        # Compute guest names that are not already present for this initiator
-        existing_guest_keys = set()
-        for ge in event.get('guestEntries', []) or []:
-            try:
-                name = (ge.get('name') or '').strip()
-                added_by = ge.get('addedBy') or ''
-                if name and added_by:
-                    existing_guest_keys.add(f"{added_by}|{name.casefold()}")
-            except Exception:
-                # Ignore malformed guest entry records
-                continue
-
-        new_guest_names = []
-        for n in guest_names:
-            key = f"{current_user}|{n.casefold()}"
-            if key not in existing_guest_keys:
-                new_guest_names.append(n)
-
-        # Seats requested = new UIDs + new guest names
-        seats_needed = len(new_uids) + len(new_guest_names)
-
-        if seats_needed == 0:
-            # Preserve legacy message when only UIDs were provided but all are already participants
-            if len(group_members) > 0 and len(new_uids) == 0:
-                raise ValueError('All provided members are already participants')
-            raise ValueError('No new seats requested')
-
-        available = max_part - current_part
-        if seats_needed > available:
-            raise ValueError(f'Only {available} spots available')
+        event = event_snap.to_dict() or {}
+        _check_plain_path(event_id, event, queue=False)
+        attendee = read_attendee(transaction, event_ref, current_user)
+        booking_data, update_data, attendee_data, seats_needed = _plan_group_booking(
+            event, attendee, event_id, current_user, guest_names
+        )
 
-        # Create group booking (store both uids and names)
         booking_ref = db.collection('bookings').document()
-        booking_data = {
-            'eventId': event_id,
-            'userId': current_user,
-            'bookingType': 'group',
-            'groupMembers': [current_user],   # initiator only per policy
-            'guestNames': guest_names,        # guest names recorded on the booking
-            'status': 'confirmed',
-            'createdAt': admin_fs.SERVER_TIMESTAMP
-        }
         transaction.set(booking_ref, booking_data)
-
-        # Build atomic event update
-        update_data = {
-            'currentParticipants': admin_fs.Increment(seats_needed)
-        }
-        if new_uids:
-            update_data['participants'] = admin_fs.ArrayUnion(new_uids)
-        if new_guest_names:
-            # Store minimal guest entry (avoid SERVER_TIMESTAMP in ArrayUnion payload)
-            guest_entries = [{'name': n, 'addedBy': current_user} for n in new_guest_names]
-            update_data['guestEntries'] = admin_fs.ArrayUnion(guest_entries)
-
+        transaction.set(attendee_ref(event_ref, current_user), attendee_data)
         transaction.update(event_ref, update_data)
 
         return booking_ref.id, seats_needed
@@ -216,7 +538,14 @@ def create_group_booking(current_user):
         return jsonify({'success': False, 'error': 'Missing eventId'}), 400
 
     try:
-        booking_id, joined_count = _txn_create_group(transaction)
+        n_shards, _ = known_seat_mode(event_id) or (0, {})
+        if not n_shards:
+            try:
+                booking_id, joined_count = _txn_create_group(transaction)
+            except BookingPathChanged as changed:
+                n_shards = changed.n_shards
+        if n_shards:
+            booking_id, joined_count = _create_sharded_booking(event_id, current_user, n_shards, guest_names)
         return jsonify({
             'success': True,
             'bookingId': booking_id,
@@ -229,6 +558,89 @@ def create_group_booking(current_user):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@bookings_bp.route('/api/bookings/bulk', methods=['POST'])
+@require_auth
+@idempotent('bookings.bulk')
+def create_bulk_booking(current_user):
+    """
+    Book the current user on several events (e.g. a weekly series) in one request.
+    Body:
+      {
+        "eventIds": ["evt_1", "evt_2", ...]     # up to 50, duplicates ignored
+      }
+    Behavior:
+      - Each event gets the same capacity and double-booking checks as /api/bookings/individual
+      - Plain events are booked 10 per transaction; events that fail are skipped and the
+        rest of the batch still commits (sharded and admissionQueue events use their own paths)
+      - Returns per-event results in request order; 201 if any booking was created, else 400
+      - Optional Idempotency-Key header: a retry replays the first response (utils/idempotency.py)
+    Response:
+      {
+        "success": true, "booked": 1, "failed": 1,
+        "results": [
+          {"eventId": "evt_1", "success": true, "bookingId": "..."},
+          {"eventId": "evt_2", "success": false, "error": "Event is full"}
+        ]
+      }
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        event_ids = _parse_bulk_event_ids(body.get('eventIds'))
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+
+    try:
+        payload, status = _bulk_response(_book_events_bulk(event_ids, current_user))
+        return jsonify(payload), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _prefilter_booking(booking: dict, filter_val: str) -> bool:
+    """False for bookings that can be dropped before their events are loaded."""
+    status = (booking.get('status') or '').lower()
+    return not (filter_val == 'current' and status == 'cancelled')
+
+def _filter_my_bookings(bookings: list, events: dict, filter_val: str) -> list:
+    """Attach event summaries ({id: data} from services.batch_get.get_many), compute isPast and apply filter_val."""
+    now = datetime.utcnow()
+    now_ts = (now - datetime(1970, 1, 1)).total_seconds()
+    my = []
+    for booking in bookings:
+        # Attach event summary if available and compute isPast
+        ev_id = booking.get('eventId')
+        is_past = False
+        ev = events.get(ev_id) if ev_id else None
+        if ev is not None:
+            booking['event'] = {
+                'id': ev_id,
+                'title': ev.get('title'),
+                'date': ev.get('date'),
+                'startTime': ev.get('startTime') or ev.get('time'),
+                'location': ev.get('location'),
+                'type': ev.get('type') or ev.get('category')
+            }
+            start_ts = ev.get('startTimestamp')
+            if isinstance(start_ts, (int, float)):
+                is_past = start_ts < now_ts
+            else:
+                event_dt = combine_date_time(ev.get('date') or '', (ev.get('startTime') or ev.get('time') or ''))
+                if event_dt:
+                    is_past = event_dt < now
+
+        status = (booking.get('status') or '').lower()
+        include = True
+        if filter_val == 'current':
+            include = (status != 'cancelled') and (not is_past)
+        elif filter_val == 'past':
+            include = is_past or (status == 'cancelled')
+        else:
+            include = True
+
+        if include:
+            my.append(booking)
+    return my
+
 @bookings_bp.route('/api/bookings/my', methods=['GET'])
 @require_auth
 def list_my_bookings(current_user):
@@ -243,229 +655,129 @@ def list_my_bookings(current_user):
     """
     try:
         filter_val = (request.args.get('filter') or 'current').strip().lower()
-        now = datetime.utcnow()
 
-        my = []
+        bookings = []
         q = db.collection('bookings').where('userId', '==', current_user)
         for doc in q.stream():
             booking = doc.to_dict()
             booking['id'] = doc.id
+            # Cancelled bookings can never be "current"; drop them before loading events
+            if _prefilter_booking(booking, filter_val):
+                bookings.append(booking)
 
-            # Attach event summary if available and compute isPast
-            ev_id = booking.get('eventId')
-            is_past = False
-            if ev_id:
-                ev_snap = db.collection('events').document(ev_id).get()
-                if ev_snap.exists:
-                    ev = ev_snap.to_dict()
-                    booking['event'] = {
-                        'id': ev_snap.id,
-                        'title': ev.get('title'),
-                        'date': ev.get('date'),
-                        'startTime': ev.get('startTime') or ev.get('time'),
-                        'location': ev.get('location'),
-                        'type': ev.get('type') or ev.get('category')
-                    }
-                    event_dt = _combine_date_time(ev.get('date') or '', (ev.get('startTime') or ev.get('time') or ''))
-                    if event_dt:
-                        is_past = event_dt < now
-
-            status = (booking.get('status') or '').lower()
-            include = True
-            if filter_val == 'current':
-                include = (status != 'cancelled') and (not is_past)
-            elif filter_val == 'past':
-                include = is_past or (status == 'cancelled')
-            else:
-                include = True
-
-            if include:
-                my.append(booking)
+        # Load each distinct event once for all surviving bookings
+        events = get_many(db, 'events', (b.get('eventId') for b in bookings), field_paths=_EVENT_SUMMARY_FIELDS)
 
+        my = _filter_my_bookings(bookings, events, filter_val)
         return jsonify({'success': True, 'bookings': my, 'count': len(my)}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@bookings_bp.route('/api/bookings/<booking_id>', methods=['DELETE'])
-@require_auth
-def cancel_booking(current_user, booking_id: str):
+class CancelError(ValueError):
+    """A cancellation rule failed inside the transaction; status is the HTTP code to return."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+def _cancel_booking(current_user: str, booking_id: str | None = None, event_id: str | None = None):
     """
-    Cancel the caller's booking (individual or group).
-    Rules:
-      - Only booking owner (userId) can cancel
-      - Booking must be in 'confirmed' status
-      - Cannot cancel within 24 hours before event start
-    Effects:
-      - Update booking.status to 'cancelled' (with cancelledAt)
-      - Decrement event.currentParticipants accordingly
-      - Remove user from event.participants if present
-      - Remove guestEntries added by this booking's initiator (for listed names)
+    Cancellation engine behind both DELETE endpoints. Finds the booking (by id, or the caller's
+    confirmed booking for event_id), checks the rules and frees its seats in one transaction:
+    every read happens inside it and the event gets a single merged update.
+    Returns (seats_freed, booking_id); raises CancelError.
     """
-    try:
-        # Load booking
-        b_ref = db.collection('bookings').document(booking_id)
-        b_snap = b_ref.get()
-        if not b_snap.exists:
-            return jsonify({'success': False, 'error': 'Booking not found'}), 404
+    bookings = db.collection('bookings')
+    transaction = db.transaction()
+
+    @transactional('bookings.cancel')
+    def _txn_cancel(txn):
+        if booking_id:
+            b_snap = bookings.document(booking_id).get(transaction=txn)
+            if not b_snap.exists:
+                raise CancelError('Booking not found', 404)
+        else:
+            # Find the user's confirmed booking for this event
+            matches = list(txn.get(
+                bookings.where('userId', '==', current_user)
+                        .where('eventId', '==', event_id)
+                        .where('status', '==', 'confirmed')
+                        .limit(1)
+            ))
+            if not matches:
+                raise CancelError('Booking not found', 404)
+            b_snap = matches[0]
+        b_ref = bookings.document(b_snap.id)
         booking = b_snap.to_dict() or {}
 
         if booking.get('userId') != current_user:
-            return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+            raise CancelError('Unauthorized', 403)
         if (booking.get('status') or '').lower() != 'confirmed':
-            return jsonify({'success': False, 'error': 'Only confirmed bookings can be cancelled'}), 400
-
+            raise CancelError('Only confirmed bookings can be cancelled')
         ev_id = booking.get('eventId')
         if not ev_id:
-            return jsonify({'success': False, 'error': 'Invalid booking: missing eventId'}), 400
+            raise CancelError('Invalid booking: missing eventId')
 
         e_ref = db.collection('events').document(ev_id)
-        e_snap = e_ref.get()
+        e_snap = e_ref.get(transaction=txn)
         if not e_snap.exists:
-            return jsonify({'success': False, 'error': 'Event not found'}), 404
-
+            raise CancelError('Event not found', 404)
         event = e_snap.to_dict() or {}
-        event_dt = _combine_date_time(event.get('date') or '', (event.get('startTime') or event.get('time') or ''))
+        event_dt = combine_date_time(event.get('date') or '', (event.get('startTime') or event.get('time') or ''))
         if not event_dt:
-            return jsonify({'success': False, 'error': 'Invalid event date/time'}), 400
-
+            raise CancelError('Invalid event date/time')
         if event_dt - datetime.utcnow() < timedelta(days=1):
-            return jsonify({'success': False, 'error': 'Cannot cancel within 24 hours of event start'}), 400
+            raise CancelError('Cannot cancel within 24 hours of event start')
 
-        # Transaction to update booking and event atomically
-        transaction = db.transaction()
+        dec = _release_attendance_in_txn(txn, e_ref, event, booking, current_user)
 
-        @admin_fs.transactional
-        def _txn_cancel(txn):
-            e_snap_txn = e_ref.get(transaction=txn)
-            if not e_snap_txn.exists:
-                raise ValueError('Event not found')
-            e_cur = e_snap_txn.to_dict() or {}
-            participants = set(e_cur.get('participants', []))
-
-            dec = 0
-            # Remove user seat if present
-            if current_user in participants:
-                dec += 1
-
-            # If group booking: remove guest entries by initiator and count them
-            guest_names = booking.get('guestNames') or []
-            if isinstance(guest_names, list) and guest_names:
-                # ArrayRemove payload must match elements exactly
-                remove_entries = [{'name': n, 'addedBy': current_user} for n in guest_names]
-                txn.update(e_ref, {
-                    'guestEntries': admin_fs.ArrayRemove(remove_entries)
-                })
-                dec += len(guest_names)
-
-            # Build event update
-            ev_update = {}
-            if dec > 0:
-                ev_update['currentParticipants'] = admin_fs.Increment(-dec)
-            if current_user in participants:
-                ev_update['participants'] = admin_fs.ArrayRemove([current_user])
-            if ev_update:
-                txn.update(e_ref, ev_update)
-
-            # Mark booking cancelled
-            txn.update(b_ref, {'status': 'cancelled', 'cancelledAt': admin_fs.SERVER_TIMESTAMP})
-
-            return dec
-
-        freed = _txn_cancel(transaction)
-        return jsonify({'success': True, 'message': 'Booking cancelled', 'seatsFreed': freed}), 200
+        # Mark booking cancelled
+        txn.update(b_ref, {'status': 'cancelled', 'cancelledAt': admin_fs.SERVER_TIMESTAMP})
+        return dec, b_snap.id, e_ref, event
 
-    except ValueError as ve:
-        return jsonify({'success': False, 'error': str(ve)}), 400
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    freed, cancelled_id, e_ref, event = _txn_cancel(transaction)
+    if shard_count(event):
+        rollup_after_write(e_ref, event)
+    return freed, cancelled_id
 
-@bookings_bp.route('/api/bookings/by-event/<event_id>', methods=['DELETE'])
+@bookings_bp.route('/api/bookings/<booking_id>', methods=['DELETE'])
 @require_auth
-def cancel_booking_by_event(current_user, event_id: str):
+def cancel_booking(current_user, booking_id: str):
     """
-    Convenience endpoint to cancel the caller's booking for a given event_id.
+    Cancel the caller's booking (individual or group).
     Rules:
       - Only booking owner (userId) can cancel
       - Booking must be in 'confirmed' status
       - Cannot cancel within 24 hours before event start
     Effects:
       - Update booking.status to 'cancelled' (with cancelledAt)
-      - Decrement event.currentParticipants accordingly
-      - Remove user from event.participants if present
-      - Remove guestEntries added by this booking's initiator (for listed names)
+      - Decrement event.currentParticipants accordingly (or the seat shards)
+      - Remove the user's seat and the booking's guest names from events/{id}/attendees/{uid}
     """
     try:
-        # Find the user's confirmed booking for this event
-        matches = list(
-            db.collection('bookings')
-              .where('userId', '==', current_user)
-              .where('eventId', '==', event_id)
-              .where('status', '==', 'confirmed')
-              .limit(1)
-              .stream()
-        )
-        if not matches:
-            return jsonify({'success': False, 'error': 'Booking not found'}), 404
-
-        b_snap = matches[0]
-        b_ref = db.collection('bookings').document(b_snap.id)
-        booking = b_snap.to_dict() or {}
-
-        # Load event
-        e_ref = db.collection('events').document(event_id)
-        e_snap = e_ref.get()
-        if not e_snap.exists:
-            return jsonify({'success': False, 'error': 'Event not found'}), 404
-
-        event = e_snap.to_dict() or {}
-        event_dt = _combine_date_time(event.get('date') or '', (event.get('startTime') or event.get('time') or ''))
-        if not event_dt:
-            return jsonify({'success': False, 'error': 'Invalid event date/time'}), 400
-        if event_dt - datetime.utcnow() < timedelta(days=1):
-            return jsonify({'success': False, 'error': 'Cannot cancel within 24 hours of event start'}), 400
-
-        # Transaction to update booking and event atomically
-        transaction = db.transaction()
-
-        @admin_fs.transactional
-        def _txn_cancel(txn):
-            e_snap_txn = e_ref.get(transaction=txn)
-            if not e_snap_txn.exists:
-                raise ValueError('Event not found')
-            e_cur = e_snap_txn.to_dict() or {}
-            participants = set(e_cur.get('participants', []))
-
-            dec = 0
-            # Remove user seat if present
-            if current_user in participants:
-                dec += 1
-
-            # If group booking: remove guest entries by initiator and count them
-            guest_names = booking.get('guestNames') or []
-            if isinstance(guest_names, list) and guest_names:
-                # ArrayRemove payload must match elements exactly
-                remove_entries = [{'name': n, 'addedBy': current_user} for n in guest_names]
-                txn.update(e_ref, {'guestEntries': admin_fs.ArrayRemove(remove_entries)})
-                dec += len(guest_names)
-
-            # Build event update
-            ev_update = {}
-            if dec > 0:
-                ev_update['currentParticipants'] = admin_fs.Increment(-dec)
-            if current_user in participants:
-                ev_update['participants'] = admin_fs.ArrayRemove([current_user])
-            if ev_update:
-                txn.update(e_ref, ev_update)
-
-            # Mark booking cancelled
-            txn.update(b_ref, {'status': 'cancelled', 'cancelledAt': admin_fs.SERVER_TIMESTAMP})
-            return dec
-
-        freed = _txn_cancel(transaction)
-        return jsonify({'success': True, 'message': 'Booking cancelled', 'seatsFreed': freed, 'bookingId': b_snap.id}), 200
+        freed, _ = _cancel_booking(current_user, booking_id=booking_id)
+        return jsonify({'success': True, 'message': 'Booking cancelled', 'seatsFreed': freed}), 200
+    except CancelError as ce:
+        return jsonify({'success': False, 'error': str(ce)}), ce.status
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
+@bookings_bp.route('/api/bookings/by-event/<event_id>', methods=['DELETE'])
+@require_auth
+def cancel_booking_by_event(current_user, event_id: str):
+    """
+    Convenience endpoint to cancel the caller's booking for a given event_id.
+    Same rules and effects as cancel_booking.
+    """
+    try:
+        freed, booking_id = _cancel_booking(current_user, event_id=event_id)
+        return jsonify({'success': True, 'message': 'Booking cancelled', 'seatsFreed': freed, 'bookingId': booking_id}), 200
+    except CancelError as ce:
+        return jsonify({'success': False, 'error': str(ce)}), ce.status
     except ValueError as ve:
         return jsonify({'success': False, 'error': str(ve)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,46 +1,74 @@
+import base64
+import json
 from flask import Blueprint, jsonify, request
 from services.firebase_service import db
+from services.event_catalog import get_event_catalog
+from services.event_query import ordered_listing_ready, plan_event_query
+from services.seat_shards import shard_count, seat_totals
+from utils.event_fields import derive_event_fields, has_derived_fields
+from utils.http_cache import cached_json, make_etag, not_modified
 
 # Events Blueprint with Firestore-backed listing and details
 # Now supports extended fields and richer filters.
 
 events_bp = Blueprint('events', __name__)
 
+# Default GET /api/events shape: a compact summary with seat counts
+# (currentParticipants/availableSlots) instead of the participants/guestEntries arrays,
+# which grow with every booking and expose attendee uids.
+EVENT_SUMMARY_FIELDS = (
+    'title', 'description', 'date', 'startTime', 'endTime', 'timing',
+    'location', 'organiser', 'format', 'venueType', 'type', 'region',
+    'price', 'imageUrl', 'status',
+    'maxParticipants', 'currentParticipants', 'availableSlots',
+)
+# Fields a client may request with ?fields= (id is always returned)
+EVENT_LISTING_FIELDS = EVENT_SUMMARY_FIELDS + ('category', 'startTimestamp', 'time', 'createdAt')
+# Read from Firestore for filtering, paging and derived fields even when not returned
+_LISTING_READ_FIELDS = (
+    'date', 'startTime', 'time', 'timing', 'status', 'type', 'format', 'region', 'category',
+    'price', 'maxParticipants', 'currentParticipants', 'availableSlots', 'startTimestamp',
+)
+
+def _parse_fields_param(raw: str | None):
+    """Parse ?fields=a,b,c -> (ok, tuple_of_fields | error). Missing/empty means the summary shape."""
+    if raw is None or not raw.strip():
+        return True, EVENT_SUMMARY_FIELDS
+    fields = []
+    for f in raw.split(','):
+        f = f.strip()
+        if f and f != 'id' and f not in fields:
+            fields.append(f)
+    unknown = [f for f in fields if f not in EVENT_LISTING_FIELDS]
+    if unknown:
+        return False, f"Unknown field(s): {', '.join(unknown)}. Allowed: id, {', '.join(EVENT_LISTING_FIELDS)}"
+    return True, tuple(fields)
+
+def _project_event(e: dict, fields) -> dict:
+    out = {'id': e.get('id')}
+    for f in fields:
+        if f in e:
+            out[f] = e[f]
+    return out
+
 def _event_with_computed_fields(data: dict, include_available=True) -> dict:
     """
-    Add computed fields for response:
+    Ensure response fields derived from the stored event are present.
+    Events written by admin/booking endpoints (or backfilled with
+    scripts/backfill_event_fields.py) already store them, so this is a passthrough;
+    legacy docs get them computed here:
       - availableSlots = maxParticipants - currentParticipants
-      - timing: derive from startTime if missing (legacy docs)
-      - startTime/endTime fallback from legacy 'time' if needed
+      - timing: derive from startTime if missing
+      - startTime fallback from legacy 'time' if needed
     """
-    # Legacy fallback: 'time' => 'startTime' (no endTime known)
-    if 'startTime' not in data and 'time' in data and isinstance(data.get('time'), str):
-        data['startTime'] = data.get('time')
-
-    # Derive timing if missing and startTime present
-    if not data.get('timing'):
-        st = data.get('startTime')
-        if isinstance(st, str) and len(st) >= 4 and ':' in st:
-            try:
-                h = int(st.split(':')[0])
-                if 6 <= h <= 11:
-                    data['timing'] = 'morning'
-                elif 12 <= h <= 17:
-                    data['timing'] = 'afternoon'
-                elif 18 <= h <= 21:
-                    data['timing'] = 'evening'
-                else:
-                    data['timing'] = 'night'
-            except Exception:
-                pass
-
+    if has_derived_fields(data):
+        return data
+    derived = derive_event_fields(data)
+    for k in ('startTime', 'timing', 'startTimestamp'):
+        if k in derived and not data.get(k):
+            data[k] = derived[k]
     if include_available:
-        try:
-            max_p = int(data.get('maxParticipants') or 0)
-            cur_p = int(data.get('currentParticipants') or 0)
-            data['availableSlots'] = max(0, max_p - cur_p)
-        except Exception:
-            data['availableSlots'] = None
+        data['availableSlots'] = derived.get('availableSlots')
     return data
 
 def _serialize_event(doc) -> dict:
@@ -48,6 +76,226 @@ def _serialize_event(doc) -> dict:
     data['id'] = doc.id
     return _event_with_computed_fields(data)
 
+def _page_key(e: dict) -> tuple:
+    """
+    Listing order and cursor position: (date, startTime, id), the fields Firestore orders by.
+    Legacy events get startTime from `time` in _event_with_computed_fields (in-memory paging only).
+    """
+    return (
+        str(e.get('date') or ''),
+        str(e.get('startTime') or ''),
+        str(e.get('id') or '')
+    )
+
+def _encode_page_token(key: tuple) -> str:
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_page_token(token: str) -> tuple | None:
+    """Return the (date, startTime, id) cursor encoded in token, or None if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        return None
+    if not isinstance(key, list) or len(key) != 3 or not all(isinstance(k, str) for k in key):
+        return None
+    return tuple(key)
+
+def _page_ordered_query(query, matches, cursor, limit):
+    """
+    Page through query ordered by (date, startTime, __name__) starting after cursor.
+    Reads batches of limit+1 documents until `limit` events pass `matches` (or the query is exhausted),
+    so each page reads about `limit` documents when all filters run server-side.
+    Legacy docs without startTime are not matched by this ordering (Firestore skips docs missing an
+    order_by field), so callers use it only when ordered_listing_ready().
+    Returns (events, next_page_token).
+    """
+    ordered = query.order_by('date').order_by('startTime').order_by('__name__')
+    batch_size = limit + 1
+    out = []
+    after = cursor
+    while True:
+        page_q = ordered.limit(batch_size)
+        if after:
+            page_q = page_q.start_after({'date': after[0], 'startTime': after[1], '__name__': after[2]})
+        snaps = list(page_q.stream())
+        for snap in snaps:
+            e = _serialize_event(snap)
+            after = _page_key(e)
+            if matches(e):
+                if len(out) == limit:
+                    return out, _encode_page_token(_page_key(out[-1]))
+                out.append(e)
+        if len(snaps) < batch_size:
+            return out, None
+
+def _page_in_memory(events, matches, cursor, limit):
+    """Same paging contract as _page_ordered_query over an already-loaded list."""
+    rows = sorted((e for e in events if matches(e)), key=_page_key)
+    if cursor:
+        rows = [e for e in rows if _page_key(e) > cursor]
+    page = rows[:limit]
+    next_token = _encode_page_token(_page_key(page[-1])) if len(rows) > limit else None
+    return page, next_token
+
+class EventListing:
+    """
+    Parsed GET /api/events arguments: filters, paging, projection and query plan.
+    Shared by the sync handler below and the async app (api_async/events.py), which only
+    differ in how they run the queries.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.error = None
+        self.q_format = args.get('format')
+        self.q_type = args.get('type')
+        self.q_region = args.get('region')
+        self.q_timing = args.get('timing')
+        self.q_from = args.get('fromDate')
+        self.q_to = args.get('toDate')
+        self.q_min_price = args.get('minPrice')
+        self.q_max_price = args.get('maxPrice')
+        self.q_status = args.get('status')
+        self.q_category = args.get('category')  # legacy
+        try:
+            limit = int(args.get('limit', 20))
+        except ValueError:
+            limit = 20
+        self.limit = max(1, min(limit, 50))
+
+        self.cursor = None
+        page_token = args.get('pageToken')
+        if page_token:
+            self.cursor = _decode_page_token(page_token)
+            if self.cursor is None:
+                self.error = 'Invalid pageToken'
+                return
+
+        ok, fields = _parse_fields_param(args.get('fields'))
+        if not ok:
+            self.error = fields
+            return
+        self.fields = fields
+        # Firestore projection: only the returned fields plus what filtering/paging needs
+        self.read_fields = sorted(set(fields) | set(_LISTING_READ_FIELDS))
+
+        # Preferred plan: push every equality filter and the date range to Firestore
+        # (composite indexes generated by scripts/generate_indexes.py).
+        self.plan = plan_event_query({
+            'status': self.q_status,
+            'type': self.q_type,
+            'format': self.q_format,
+            'region': self.q_region,
+            'timing': self.q_timing,
+            'category': self.q_category,  # legacy
+        }, self.q_from, self.q_to)
+
+        # Fallback when the plan's composite index is missing (e.g. not yet deployed):
+        # push at most ONE equality filter to Firestore and apply the rest in-memory.
+        # Priority for server-side filter (pick first available):
+        self.chosen_field = None
+        self.chosen_value = None
+        for field, value in (
+            ('status', self.q_status),
+            ('type', self.q_type),
+            ('format', self.q_format),
+            ('region', self.q_region),
+            ('timing', self.q_timing),
+            ('category', self.q_category),  # legacy
+        ):
+            if value:
+                self.chosen_field, self.chosen_value = field, value
+                break
+
+    def catalog_etag(self, catalog, events, next_token) -> str | None:
+        """
+        ETag for a page served from the catalog: the query plus each listed document's id and
+        update_time, so every worker derives the same tag for the same page (snapshot read times
+        are per-listener). Rolled-up seat counts are document fields, so they change the tag too.
+        """
+        parts = []
+        for e in events:
+            update_time = catalog.update_time(e.get('id'))
+            if not hasattr(update_time, 'isoformat'):
+                return None  # cached_json falls back to a body hash
+            parts.append(f"{e.get('id')}@{update_time.isoformat()}")
+        return make_etag('events', sorted(self.args.items(multi=True)), next_token, *parts)
+
+    def planned_query(self, collection):
+        return self.plan.apply(collection).select(self.read_fields)
+
+    def fallback_query(self, collection):
+        """Collection with at most the one chosen equality filter (clears it if the client rejects it)."""
+        query = collection
+        if self.chosen_field:
+            try:
+                query = query.where(self.chosen_field, '==', self.chosen_value)
+            except Exception:
+                # In case emulator/permissions cause issues, skip server-side filter
+                self.chosen_field, self.chosen_value = None, None
+        return query.select(self.read_fields)
+
+    # In-memory filters for the rest (including date range and price).
+    # Under the full plan these are already satisfied server-side and only re-checked.
+    def _passes_inmemory(self, e):
+        # Skip the one we already applied on server
+        def eq(field, qval):
+            if not qval:
+                return True
+            if field == self.chosen_field:
+                return True
+            return (e.get(field) == qval)
+
+        if not eq('format', self.q_format): return False
+        if not eq('type', self.q_type): return False
+        if not eq('region', self.q_region): return False
+        if not eq('timing', self.q_timing): return False
+        if not eq('status', self.q_status): return False
+        if not eq('category', self.q_category): return False  # legacy
+
+        # Date range (inclusive)
+        d = e.get('date')
+        if self.q_from and (not d or d < self.q_from): return False
+        if self.q_to and (not d or d > self.q_to): return False
+
+        return True
+
+    # Apply price range in-memory to avoid multi-field inequalities in Firestore query
+    def _in_price(self, e):
+        try:
+            p = float(e.get('price') if e.get('price') is not None else 0)
+        except Exception:
+            return False
+        if self.q_min_price is not None:
+            try:
+                if p < float(self.q_min_price):
+                    return False
+            except Exception:
+                pass
+        if self.q_max_price is not None:
+            try:
+                if p > float(self.q_max_price):
+                    return False
+            except Exception:
+                pass
+        return True
+
+    def matches(self, e) -> bool:
+        price_filtered = self.q_min_price is not None or self.q_max_price is not None
+        return self._passes_inmemory(e) and (not price_filtered or self._in_price(e))
+
+    def page_catalog(self, catalog):
+        # Catalog holds every event; all filters are applied in-memory
+        self.chosen_field, self.chosen_value = None, None
+        candidates = [_event_with_computed_fields(e) for e in catalog.events()]
+        return _page_in_memory(candidates, self.matches, self.cursor, self.limit)
+
+    def payload(self, events, next_token) -> dict:
+        events = [_project_event(e, self.fields) for e in events]
+        return {'success': True, 'events': events, 'count': len(events), 'nextPageToken': next_token}
+
 @events_bp.route('/api/events', methods=['GET'])
 def list_events():
     """
@@ -64,130 +312,96 @@ def list_events():
       - status: upcoming|completed|cancelled
       - category: legacy category filter for backward compatibility
       - limit: default 20, max 50
+      - pageToken: opaque cursor from a previous response's nextPageToken
+      - fields: comma-separated fields to return (see EVENT_LISTING_FIELDS); default is the
+        EVENT_SUMMARY_FIELDS summary. Attendee arrays (participants, guestEntries) are never listed;
+        use GET /api/events/<id> for details.
+    Response includes nextPageToken (null on the last page). Events are ordered by (date, startTime, id).
+    Sends an ETag (the page documents' update times when served from the catalog, body hash
+    otherwise) and answers a matching If-None-Match with 304.
     """
     try:
-        q_format = request.args.get('format')
-        q_type = request.args.get('type')
-        q_region = request.args.get('region')
-        q_timing = request.args.get('timing')
-        q_from = request.args.get('fromDate')
-        q_to = request.args.get('toDate')
-        q_min_price = request.args.get('minPrice')
-        q_max_price = request.args.get('maxPrice')
-        q_status = request.args.get('status')
-        q_category = request.args.get('category')  # legacy
-        try:
-            limit = int(request.args.get('limit', 20))
-        except ValueError:
-            limit = 20
-        limit = max(1, min(limit, 50))
+        listing = EventListing(request.args)
+        if listing.error:
+            return jsonify({'success': False, 'error': listing.error}), 400
 
-        query = db.collection('events')
+        catalog = get_event_catalog()
+        if catalog is not None and catalog.is_live():
+            events, next_token = listing.page_catalog(catalog)
+            etag = listing.catalog_etag(catalog, events, next_token)
+            unchanged = not_modified(etag)
+            if unchanged is not None:
+                return unchanged
+            return cached_json(listing.payload(events, next_token), etag)
 
-        # To avoid requiring Firestore composite indexes in dev/test,
-        # push at most ONE equality filter to Firestore and apply the rest in-memory.
-        # Priority for server-side filter (pick first available):
-        chosen_field = None
-        chosen_value = None
-        for field, value in (
-            ('status', q_status),
-            ('type', q_type),
-            ('format', q_format),
-            ('region', q_region),
-            ('timing', q_timing),
-            ('category', q_category),  # legacy
-        ):
-            if value:
-                chosen_field, chosen_value = field, value
-                break
-
-        if chosen_field:
+        events_col = db.collection('events')
+        events = None
+        if ordered_listing_ready():
             try:
-                query = query.where(chosen_field, '==', chosen_value)
+                events, next_token = _page_ordered_query(listing.planned_query(events_col), listing.matches, listing.cursor, listing.limit)
             except Exception:
-                # In case emulator/permissions cause issues, skip server-side filter
-                chosen_field, chosen_value = None, None
-
-        # Note: Apply date range in-memory to avoid composite index with other filters
-        # Avoid server-side ordering to prevent composite-index requirement; we'll sort in-memory.
-
-        docs = query.stream()
-        events = [_serialize_event(d) for d in docs]
-
-        # In-memory filters for the rest (including date range and price)
-        def _passes_inmemory(e):
-            # Skip the one we already applied on server
-            def eq(field, qval):
-                if not qval:
-                    return True
-                if field == chosen_field:
-                    return True
-                return (e.get(field) == qval)
-
-            if not eq('format', q_format): return False
-            if not eq('type', q_type): return False
-            if not eq('region', q_region): return False
-            if not eq('timing', q_timing): return False
-            if not eq('status', q_status): return False
-            if not eq('category', q_category): return False  # legacy
-
-            # Date range (inclusive)
-            d = e.get('date')
-            if q_from and (not d or d < q_from): return False
-            if q_to and (not d or d > q_to): return False
-
-            return True
-
-        events = [e for e in events if _passes_inmemory(e)]
-
-        # Apply price range in-memory to avoid multi-field inequalities in Firestore query
-        def _in_price(e):
-            try:
-                p = float(e.get('price') if e.get('price') is not None else 0)
-            except Exception:
-                return False
-            if q_min_price is not None:
-                try:
-                    if p < float(q_min_price):
-                        return False
-                except Exception:
-                    pass
-            if q_max_price is not None:
                 try:
-                    if p > float(q_max_price):
-                        return False
+                    events, next_token = _page_ordered_query(listing.fallback_query(events_col), listing.matches, listing.cursor, listing.limit)
                 except Exception:
                     pass
-            return True
-
-        if q_min_price is not None or q_max_price is not None:
-            events = [e for e in events if _in_price(e)]
-
-        # Secondary in-memory sort by (date, startTime/time)
-        try:
-            events.sort(key=lambda e: (
-                (e.get('date') or ''),
-                (e.get('startTime') or e.get('time') or '')
-            ))
-        except Exception:
-            pass
+        if events is None:
+            # Ordered query needs a composite index per equality filter, and skips events without
+            # startTime until they are backfilled; otherwise scan the (single-filtered) collection
+            # and page in memory.
+            query = listing.fallback_query(events_col)
+            candidates = [_serialize_event(d) for d in query.stream()]
+            events, next_token = _page_in_memory(candidates, listing.matches, listing.cursor, listing.limit)
 
-        # Apply limit after in-memory filtering and sort
-        events = events[:limit]
-        return jsonify({'success': True, 'events': events, 'count': len(events)}), 200
+        return cached_json(listing.payload(events, next_token))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _event_etag(event_id: str, update_time, *extra) -> str | None:
+    if not hasattr(update_time, 'isoformat'):
+        return None  # cached_json falls back to a body hash
+    return make_etag('event', event_id, update_time.isoformat(), *extra)
+
+def _live_seat_counts(event_id: str, data: dict) -> tuple:
+    """
+    Sharded events (services/seat_shards.py) only roll seat counts up to the event document
+    periodically; overwrite them with live shard totals. Returns ETag parts for the counts.
+    """
+    if not shard_count(data):
+        return ()
+    taken, capacity = seat_totals(db.collection('events').document(event_id))
+    data['currentParticipants'] = taken
+    data['availableSlots'] = max(0, capacity - taken)
+    return (str(taken), str(capacity))
+
 @events_bp.route('/api/events/<event_id>', methods=['GET'])
 def get_event(event_id: str):
     """
     Get event details by ID.
+    ETag is derived from the document's update_time (plus live seat totals for sharded
+    events); a matching If-None-Match gets 304.
     """
     try:
+        catalog = get_event_catalog()
+        if catalog is not None and catalog.is_live():
+            data = catalog.get(event_id)
+            if data is None:
+                return jsonify({'success': False, 'error': 'Event not found'}), 404
+            data = _event_with_computed_fields(data)
+            etag = _event_etag(event_id, catalog.update_time(event_id), *_live_seat_counts(event_id, data))
+            unchanged = not_modified(etag)
+            if unchanged is not None:
+                return unchanged
+            return cached_json({'success': True, 'event': data}, etag)
+
         ref = db.collection('events').document(event_id)
         snap = ref.get()
         if not snap.exists:
             return jsonify({'success': False, 'error': 'Event not found'}), 404
-        return jsonify({'success': True, 'event': _serialize_event(snap)}), 200
+        data = _serialize_event(snap)
+        etag = _event_etag(event_id, snap.update_time, *_live_seat_counts(event_id, data))
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        return cached_json({'success': True, 'event': data}, etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 from utils.decorators import require_auth
+from utils.idempotency import idempotent
 from services.firebase_service import db, FirebaseService
 from firebase_admin import firestore as admin_fs
+from utils.transactions import transactional
 from utils.phone_utils import format_singapore_phone
+from services.user_loader import get_user_loader
+from services.friend_pairs import FRIEND_REQUESTS_COLLECTION, pair_ref
 
 friends_bp = Blueprint('friends', __name__)
 
@@ -41,6 +45,7 @@ def _get_user_by_phone(phone_number: str):
 
 @friends_bp.route('/api/friends/request', methods=['POST'])
 @require_auth
+@idempotent('friends.request')
 def send_friend_request(current_user):
     """
     Send a friend request by recipient phone number.
@@ -49,6 +54,8 @@ def send_friend_request(current_user):
       - Cannot add self
       - Cannot add if already friends
       - If a pending request exists in either direction, do not duplicate
+      - requestId is the pair id (friendRequests/{sorted uids}, see services/friend_pairs.py)
+      - Optional Idempotency-Key header: a retry replays the first response (utils/idempotency.py)
     """
     body = request.get_json(silent=True) or {}
     phone_input = (body.get('phoneNumber') or '').strip()
@@ -78,35 +85,33 @@ def send_friend_request(current_user):
     if to_uid in sender_friends:
         return jsonify({'success': False, 'error': 'Already friends'}), 400
 
-    # Check existing pending requests in either direction
-    pending_a = list(
-        db.collection('friendRequests')
-        .where('fromUserId', '==', current_user)
-        .where('toUserId', '==', to_uid)
-        .where('status', '==', 'pending')
-        .limit(1)
-        .stream()
-    )
-    pending_b = list(
-        db.collection('friendRequests')
-        .where('fromUserId', '==', to_uid)
-        .where('toUserId', '==', current_user)
-        .where('status', '==', 'pending')
-        .limit(1)
-        .stream()
-    )
-    if pending_a or pending_b:
-        return jsonify({'success': False, 'error': 'A pending request already exists'}), 400
-
-    # Create request
-    req_ref = db.collection('friendRequests').document()
-    req_data = {
-        'fromUserId': current_user,
-        'toUserId': to_uid,
-        'status': 'pending',
-        'createdAt': admin_fs.SERVER_TIMESTAMP
-    }
-    req_ref.set(req_data)
+    # One document per pair (services/friend_pairs.py): the duplicate check is a single read,
+    # and concurrent A->B / B->A requests conflict on it inside the transaction
+    req_ref = pair_ref(db, current_user, to_uid)
+    transaction = db.transaction()
+
+    @transactional('friends.request')
+    def _txn_request(txn):
+        snap = req_ref.get(transaction=txn)
+        status = (snap.to_dict() or {}).get('status') if snap.exists else None
+        if status == 'pending':
+            raise ValueError('A pending request already exists')
+        if status == 'accepted':
+            raise ValueError('Already friends')
+        # New pair, or re-request after a rejection
+        txn.set(req_ref, {
+            'fromUserId': current_user,
+            'toUserId': to_uid,
+            'status': 'pending',
+            'createdAt': admin_fs.SERVER_TIMESTAMP
+        })
+
+    try:
+        _txn_request(transaction)
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
     return jsonify({
         'success': True,
@@ -130,7 +135,7 @@ def handle_friend_request(current_user, request_id: str):
     if action not in ('accept', 'reject'):
         return jsonify({'success': False, 'error': 'Invalid action'}), 400
 
-    req_ref = db.collection('friendRequests').document(request_id)
+    req_ref = db.collection(FRIEND_REQUESTS_COLLECTION).document(request_id)
     req_snap = req_ref.get()
     if not req_snap.exists:
         return jsonify({'success': False, 'error': 'Request not found'}), 404
@@ -146,7 +151,21 @@ def handle_friend_request(current_user, request_id: str):
     to_uid = req.get('toUserId')
 
     if action == 'reject':
-        req_ref.update({'status': 'rejected'})
+        transaction = db.transaction()
+
+        @transactional('friends.reject')
+        def _txn_reject(txn):
+            snap = req_ref.get(transaction=txn)
+            if (snap.to_dict() or {}).get('status') != 'pending':
+                raise ValueError('Request already handled')
+            txn.update(req_ref, {'status': 'rejected'})
+
+        try:
+            _txn_reject(transaction)
+        except ValueError as ve:
+            return jsonify({'success': False, 'error': str(ve)}), 400
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
         return jsonify({'success': True, 'message': 'Friend request rejected'}), 200
 
     # Accept: update both users' friends arrays atomically (best-effort)
@@ -156,11 +175,13 @@ def handle_friend_request(current_user, request_id: str):
 
         transaction = db.transaction()
 
-        @admin_fs.transactional
+        @transactional('friends.accept')
         def _txn(txn):
             _accept_txn(txn, from_ref, to_ref, req_ref)
 
         _txn(transaction)
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -168,6 +189,11 @@ def handle_friend_request(current_user, request_id: str):
 
 
 def _accept_txn(txn, from_ref, to_ref, req_ref):
+    # Re-check inside the transaction: the pair may have been re-requested or handled meanwhile
+    req_snap = req_ref.get(transaction=txn)
+    req = (req_snap.to_dict() or {}) if req_snap.exists else {}
+    if req.get('status') != 'pending' or req.get('fromUserId') != from_ref.id:
+        raise ValueError('Request already handled')
     from_snap = from_ref.get(transaction=txn)
     to_snap = to_ref.get(transaction=txn)
 
@@ -182,6 +208,15 @@ def _accept_txn(txn, from_ref, to_ref, req_ref):
     txn.update(req_ref, {'status': 'accepted'})
 
 
+def _friend_summary(fid: str, d: dict) -> dict:
+    return {
+        'id': fid,
+        'name': d.get('fullName', d.get('name')),
+        'phoneNumber': d.get('phoneNumber'),
+        'profilePicture': d.get('profilePicture', '')
+    }
+
+
 @friends_bp.route('/api/friends', methods=['GET'])
 @require_auth
 def list_friends(current_user):
@@ -196,17 +231,12 @@ def list_friends(current_user):
         friend_ids = list((user_snap.to_dict() or {}).get('friends', []))
         friends = []
 
-        # Fetch each friend (small lists are expected for MVP)
+        # Fetch all friends in batched reads via the request-scoped loader
+        friend_docs = get_user_loader().load_many(friend_ids)
         for fid in friend_ids:
-            snap = db.collection('users').document(fid).get()
-            if snap.exists:
-                d = snap.to_dict() or {}
-                friends.append({
-                    'id': fid,
-                    'name': d.get('fullName', d.get('name')),
-                    'phoneNumber': d.get('phoneNumber'),
-                    'profilePicture': d.get('profilePicture', '')
-                })
+            d = friend_docs.get(fid)
+            if d is not None:
+                friends.append(_friend_summary(fid, d))
 
         return jsonify({'success': True, 'friends': friends, 'count': len(friends)}), 200
     except Exception as e:
@@ -241,15 +271,18 @@ def get_pending_requests(current_user):
     """
     try:
         # Query pending requests where current user is the recipient
-        query = (
-            db.collection('friendRequests')
+        snaps = list(
+            db.collection(FRIEND_REQUESTS_COLLECTION)
               .where('toUserId', '==', current_user)
               .where('status', '==', 'pending')
               .stream()
         )
 
+        # Batch-load all distinct senders up front
+        loader = get_user_loader().prime((s.to_dict() or {}).get('fromUserId') for s in snaps)
+
         requests = []
-        for snap in query:
+        for snap in snaps:
             req = snap.to_dict() or {}
             from_uid = req.get('fromUserId')
             created_at = req.get('createdAt')
@@ -267,9 +300,8 @@ def get_pending_requests(current_user):
             # Fetch minimal sender profile
             from_user_data = {}
             if from_uid:
-                from_user_snap = db.collection('users').document(from_uid).get()
-                if from_user_snap.exists:
-                    d = from_user_snap.to_dict() or {}
+                d = loader.load(from_uid)
+                if d is not None:
                     from_user_data = {
                         'uid': from_uid,
                         'name': d.get('fullName', d.get('name')),
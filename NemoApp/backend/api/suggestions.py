@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from utils.decorators import require_auth, require_admin
 from services.firebase_service import db
 from firebase_admin import firestore as admin_fs
+from services.user_loader import get_user_loader
 
 # Suggestions Blueprint (MVP) - Firestore-backed create/list
 
@@ -48,16 +49,20 @@ def list_suggestions(current_user):
     """
     try:
         out = []
-        for doc in db.collection('suggestions').order_by('createdAt', direction=admin_fs.Query.DESCENDING).stream():
+        docs = list(db.collection('suggestions').order_by('createdAt', direction=admin_fs.Query.DESCENDING).stream())
+
+        # Batch-load all distinct authors up front
+        loader = get_user_loader().prime((d.to_dict() or {}).get('userId') for d in docs)
+
+        for doc in docs:
             s = doc.to_dict() or {}
             s['id'] = doc.id
 
             # Attach user display info if possible
             uid = s.get('userId')
             if uid:
-                user_snap = db.collection('users').document(uid).get()
-                if user_snap.exists:
-                    u = user_snap.to_dict() or {}
+                u = loader.load(uid)
+                if u is not None:
                     s['user'] = {
                         'uid': uid,
                         'name': u.get('fullName', u.get('name')),
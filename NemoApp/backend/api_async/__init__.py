@@ -0,0 +1,2 @@
+# Async (Quart) versions of the hot endpoints, served by async_app.py under an ASGI server.
+# Request parsing and validation are shared with the matching modules in api/.
@@ -0,0 +1,176 @@
+import asyncio
+from quart import Blueprint, jsonify, request
+from utils.transactions import async_transactional
+from services.firebase_service import get_async_db
+from utils.async_decorators import require_auth_async, idempotent_async
+from api.bookings import (
+    _EVENT_SUMMARY_FIELDS,
+    _plan_individual_booking, _plan_group_booking, _parse_guest_names,
+    _prefilter_booking, _filter_my_bookings, _create_sharded_booking, _submit_individual_booking,
+    _book_events_bulk, _parse_bulk_event_ids, _bulk_response, _check_plain_path, BookingPathChanged,
+)
+from services.seat_shards import known_seat_mode
+from services.attendance import attendee_ref
+from services.batch_get import get_many_async
+from services.admission_queue import RESULT_TIMEOUT_SECONDS
+
+bookings_async_bp = Blueprint('bookings_async', __name__)
+
+async def _get_event_in_txn_async(adb, transaction, event_id):
+    event_ref = adb.collection('events').document(event_id)
+    event_snap = await event_ref.get(transaction=transaction)
+    if not event_snap.exists:
+        raise ValueError('Event not found')
+    return event_ref, event_snap
+
+async def _read_attendee_async(transaction, event_ref, uid):
+    snap = await attendee_ref(event_ref, uid).get(transaction=transaction)
+    return (snap.to_dict() or {}) if snap.exists else {}
+
+@bookings_async_bp.route('/api/bookings/individual', methods=['POST'])
+@require_auth_async
+@idempotent_async('bookings.individual')
+async def create_individual_booking(current_user):
+    """Async POST /api/bookings/individual (same rules and responses as api/bookings.py)."""
+    body = (await request.get_json(silent=True)) or {}
+    event_id = body.get('eventId')
+    if not event_id:
+        return jsonify({'success': False, 'error': 'Missing eventId'}), 400
+
+    adb = get_async_db()
+    transaction = adb.transaction()
+
+    @async_transactional('bookings.individual')
+    async def _txn_create_individual(transaction):
+        event_ref, event_snap = await _get_event_in_txn_async(adb, transaction, event_id)
+        event = event_snap.to_dict() or {}
+        _check_plain_path(event_id, event)
+        attendee = await _read_attendee_async(transaction, event_ref, current_user)
+        booking_data, event_update, attendee_data = _plan_individual_booking(
+            event, attendee, event_id, current_user
+        )
+
+        booking_ref = adb.collection('bookings').document()
+        transaction.set(booking_ref, booking_data)
+        transaction.set(attendee_ref(event_ref, current_user), attendee_data)
+        transaction.update(event_ref, event_update)
+        return booking_ref.id
+
+    try:
+        # Same routing as the sync handler: no read before the transaction
+        n_shards, event = known_seat_mode(event_id) or (0, {})
+        if not n_shards and not event.get('admissionQueue'):
+            try:
+                booking_id = await _txn_create_individual(transaction)
+            except BookingPathChanged as changed:
+                n_shards, event = changed.n_shards, changed.event
+        if n_shards:
+            # Sharded events reuse the sync shard transaction in a worker thread
+            booking_id, _ = await asyncio.to_thread(_create_sharded_booking, event_id, current_user, n_shards)
+        elif event.get('admissionQueue'):
+            try:
+                booking_id = await asyncio.wait_for(asyncio.wrap_future(_submit_individual_booking(event_id, current_user)),
+                                                    RESULT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                # wait_for cancelled the request (unless its batch already started)
+                return jsonify({'success': False, 'error': 'Booking queue is busy, please try again'}), 503
+        return jsonify({
+            'success': True,
+            'bookingId': booking_id,
+            'message': 'Booking confirmed'
+        }), 201
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bookings_async_bp.route('/api/bookings/group', methods=['POST'])
+@require_auth_async
+@idempotent_async('bookings.group')
+async def create_group_booking(current_user):
+    """Async POST /api/bookings/group (same rules and responses as api/bookings.py)."""
+    body = (await request.get_json(silent=True)) or {}
+    event_id = body.get('eventId')
+    guest_names = _parse_guest_names(body.get('groupMemberNames', []))
+    if not event_id:
+        return jsonify({'success': False, 'error': 'Missing eventId'}), 400
+
+    adb = get_async_db()
+    transaction = adb.transaction()
+
+    @async_transactional('bookings.group')
+    async def _txn_create_group(transaction):
+        event_ref, event_snap = await _get_event_in_txn_async(adb, transaction, event_id)
+        event = event_snap.to_dict() or {}
+        _check_plain_path(event_id, event, queue=False)
+        attendee = await _read_attendee_async(transaction, event_ref, current_user)
+        booking_data, update_data, attendee_data, seats_needed = _plan_group_booking(
+            event, attendee, event_id, current_user, guest_names
+        )
+
+        booking_ref = adb.collection('bookings').document()
+        transaction.set(booking_ref, booking_data)
+        transaction.set(attendee_ref(event_ref, current_user), attendee_data)
+        transaction.update(event_ref, update_data)
+        return booking_ref.id, seats_needed
+
+    try:
+        n_shards, _ = known_seat_mode(event_id) or (0, {})
+        if not n_shards:
+            try:
+                booking_id, joined_count = await _txn_create_group(transaction)
+            except BookingPathChanged as changed:
+                n_shards = changed.n_shards
+        if n_shards:
+            booking_id, joined_count = await asyncio.to_thread(
+                _create_sharded_booking, event_id, current_user, n_shards, guest_names
+            )
+        return jsonify({
+            'success': True,
+            'bookingId': booking_id,
+            'joinedCount': joined_count,
+            'message': f'Group booking confirmed for {joined_count} member(s) added'
+        }), 201
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bookings_async_bp.route('/api/bookings/bulk', methods=['POST'])
+@require_auth_async
+@idempotent_async('bookings.bulk')
+async def create_bulk_booking(current_user):
+    """Async /api/bookings/bulk: the batched transactions run in a worker thread."""
+    body = (await request.get_json(silent=True)) or {}
+    try:
+        event_ids = _parse_bulk_event_ids(body.get('eventIds'))
+    except ValueError as ve:
+        return jsonify({'success': False, 'error': str(ve)}), 400
+
+    try:
+        payload, status = _bulk_response(await asyncio.to_thread(_book_events_bulk, event_ids, current_user))
+        return jsonify(payload), status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bookings_async_bp.route('/api/bookings/my', methods=['GET'])
+@require_auth_async
+async def list_my_bookings(current_user):
+    """Async GET /api/bookings/my?filter=current|past|all (see api/bookings.py)."""
+    try:
+        filter_val = (request.args.get('filter') or 'current').strip().lower()
+        adb = get_async_db()
+
+        bookings = []
+        q = adb.collection('bookings').where('userId', '==', current_user)
+        async for doc in q.stream():
+            booking = doc.to_dict()
+            booking['id'] = doc.id
+            if _prefilter_booking(booking, filter_val):
+                bookings.append(booking)
+
+        events = await get_many_async(adb, 'events', (b.get('eventId') for b in bookings), field_paths=_EVENT_SUMMARY_FIELDS)
+        my = _filter_my_bookings(bookings, events, filter_val)
+        return jsonify({'success': True, 'bookings': my, 'count': len(my)}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,94 @@
+import asyncio
+from quart import Blueprint, current_app, jsonify, request
+from services.firebase_service import get_async_db
+from services.event_catalog import get_event_catalog
+from services.event_query import ordered_listing_ready
+from api.events import EventListing, _serialize_event, _page_key, _page_in_memory, _encode_page_token
+from utils.http_cache import CACHE_CONTROL, body_etag
+
+events_async_bp = Blueprint('events_async', __name__)
+
+async def _page_ordered_query_async(query, matches, cursor, limit):
+    """Async _page_ordered_query (api/events.py): same ordering, cursor and batch sizing."""
+    ordered = query.order_by('date').order_by('startTime').order_by('__name__')
+    batch_size = limit + 1
+    out = []
+    after = cursor
+    while True:
+        page_q = ordered.limit(batch_size)
+        if after:
+            page_q = page_q.start_after({'date': after[0], 'startTime': after[1], '__name__': after[2]})
+        snaps = [snap async for snap in page_q.stream()]
+        for snap in snaps:
+            e = _serialize_event(snap)
+            after = _page_key(e)
+            if matches(e):
+                if len(out) == limit:
+                    return out, _encode_page_token(_page_key(out[-1]))
+                out.append(e)
+        if len(snaps) < batch_size:
+            return out, None
+
+def _not_modified(etag: str):
+    resp = current_app.response_class('', status=304)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL
+    return resp
+
+async def _cached_json(payload: dict, etag: str | None = None):
+    """
+    Quart version of utils.http_cache.cached_json (ETag, Cache-Control, 304 on If-None-Match).
+    Body-derived tags use the same body_etag, so WSGI and ASGI workers agree.
+    """
+    resp = jsonify(payload)
+    if not etag:
+        etag = body_etag(await resp.get_data())
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL
+    return resp
+
+@events_async_bp.route('/api/events', methods=['GET'])
+async def list_events():
+    """
+    Async GET /api/events; same parameters, ordering, paging and caching as api/events.py.
+    Firestore reads are awaited on the AsyncClient instead of blocking a worker thread.
+    """
+    try:
+        listing = EventListing(request.args)
+        if listing.error:
+            return jsonify({'success': False, 'error': listing.error}), 400
+
+        catalog = get_event_catalog()
+        if catalog is not None and catalog.is_live():
+            events, next_token = listing.page_catalog(catalog)
+            etag = listing.catalog_etag(catalog, events, next_token)
+            if etag and request.if_none_match.contains_weak(etag):
+                return _not_modified(etag)
+            return await _cached_json(listing.payload(events, next_token), etag)
+
+        events_col = get_async_db().collection('events')
+        events = None
+        if await asyncio.to_thread(ordered_listing_ready):
+            try:
+                events, next_token = await _page_ordered_query_async(
+                    listing.planned_query(events_col), listing.matches, listing.cursor, listing.limit
+                )
+            except Exception:
+                try:
+                    events, next_token = await _page_ordered_query_async(
+                        listing.fallback_query(events_col), listing.matches, listing.cursor, listing.limit
+                    )
+                except Exception:
+                    pass
+        if events is None:
+            # Missing composite index or events not yet backfilled with startTime: scan the
+            # (single-filtered) collection and page in memory
+            query = listing.fallback_query(events_col)
+            candidates = [_serialize_event(d) async for d in query.stream()]
+            events, next_token = _page_in_memory(candidates, listing.matches, listing.cursor, listing.limit)
+
+        return await _cached_json(listing.payload(events, next_token))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,25 @@
+from quart import Blueprint, jsonify
+from services.firebase_service import get_async_db
+from services.user_loader import load_users_async
+from utils.async_decorators import require_auth_async
+from api.friends import _friend_summary
+
+friends_async_bp = Blueprint('friends_async', __name__)
+
+@friends_async_bp.route('/api/friends', methods=['GET'])
+@require_auth_async
+async def list_friends(current_user):
+    """Async GET /api/friends (see api/friends.py)."""
+    try:
+        adb = get_async_db()
+        user_snap = await adb.collection('users').document(current_user).get()
+        if not user_snap.exists:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
+
+        friend_ids = list((user_snap.to_dict() or {}).get('friends', []))
+        friend_docs = await load_users_async(adb, friend_ids)
+        friends = [_friend_summary(fid, friend_docs[fid]) for fid in friend_ids if fid in friend_docs]
+
+        return jsonify({'success': True, 'friends': friends, 'count': len(friends)}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -13,6 +13,13 @@ def create_app():
 
     # Register blueprints (implemented in backend/api/)
     try:
+        from utils.json_provider import select_json_provider
+        from utils.compression import init_compression
+
+        # orjson-backed provider when available (NEMO_JSON_PROVIDER), gzip/br for large responses
+        app.json = select_json_provider()(app)
+        init_compression(app)
+
         from api.auth import auth_bp
         from api.events import events_bp
         from api.bookings import bookings_bp
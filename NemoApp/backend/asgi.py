@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Backend modules import each other absolutely (services.*, utils.*, api.*), so make
+# backend/ importable when the ASGI server loads this module from the repo root.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from .async_app import create_asgi_app  # noqa: E402
+
+# ASGI entrypoint (async mode, see async_app.py).
+# Usage (from repo root):
+#   uvicorn NemoApp.backend.asgi:app --workers 2 --host 0.0.0.0 --port $PORT
+#
+# Handlers in api_async/ await Firestore instead of holding a thread, so size workers by CPU
+# (not by expected concurrency as with gunicorn --threads).
+
+app = create_asgi_app()
@@ -0,0 +1,58 @@
+from quart import Quart
+from quart_cors import cors
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from utils.json_provider import select_json_provider
+from utils.compression import init_async_compression
+
+# Async deployment mode. The hot endpoints (event listing, my bookings, friends list,
+# booking POSTs) run as Quart coroutines on firestore.AsyncClient, so one worker keeps
+# hundreds of requests in flight while they wait on Firestore. Every other route is
+# served by the regular Flask app through a WSGI adapter (thread pool), so both modes
+# expose the same API. Entry point: asgi.py.
+
+def create_async_app():
+    app = Quart(__name__, static_folder=None)
+    app.json = select_json_provider()(app)
+    init_async_compression(app)
+
+    # Same development origins as the Flask app
+    app = cors(app, allow_origin=['http://localhost:8080', 'http://localhost:3000'])
+
+    from api_async.events import events_async_bp
+    from api_async.bookings import bookings_async_bp
+    from api_async.friends import friends_async_bp
+
+    app.register_blueprint(events_async_bp)
+    app.register_blueprint(bookings_async_bp)
+    app.register_blueprint(friends_async_bp)
+    return app
+
+
+class AsyncDispatcher:
+    """ASGI app: routes registered on the async app run natively, the rest go to the Flask app."""
+
+    def __init__(self, async_app, wsgi_app):
+        self.async_app = async_app
+        self.wsgi_app = wsgi_app
+        self._fallback = WsgiToAsgi(wsgi_app)
+        self._adapter = async_app.url_map.bind('localhost')
+
+    def is_async_route(self, path: str, method: str) -> bool:
+        try:
+            self._adapter.match(path, method=method)
+            return True
+        except HTTPException:
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and not self.is_async_route(scope['path'], scope['method']):
+            await self._fallback(scope, receive, send)
+        else:
+            # Async routes, websockets and lifespan events
+            await self.async_app(scope, receive, send)
+
+
+def create_asgi_app() -> AsyncDispatcher:
+    return AsyncDispatcher(create_async_app(), create_app())
@@ -0,0 +1,67 @@
+import sys
+
+# Backfill derived event fields (startTime fallback, timing, availableSlots, startTimestamp)
+# on existing events so GET /api/events can return stored documents as-is.
+#
+# Run from the backend/ directory:
+#   python scripts/backfill_event_fields.py            # write changes
+#   python scripts/backfill_event_fields.py --dry-run  # report only
+#
+# Safe to re-run: documents whose stored values already match are skipped. Once every event has a
+# startTime, the run records it (services/event_query.py) and GET /api/events switches from
+# in-memory paging to ordered Firestore queries.
+# availableSlots is computed from a non-transactional read; run during low booking traffic
+# (any booking/cancellation afterwards rewrites it from the transaction's own read).
+
+try:
+    from services.firebase_service import db
+    from services.event_query import mark_ordered_listing_ready
+    from utils.event_fields import derive_event_fields
+except Exception as e:
+    print("ERROR: Could not import Firestore client. Make sure you run this from backend/ directory.")
+    print("Detail:", e)
+    sys.exit(1)
+
+BATCH_SIZE = 400  # Firestore allows up to 500 writes per batch
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv[1:]
+    scanned = 0
+    changed = 0
+    missing_start = 0
+    batch = db.batch()
+    pending = 0
+
+    for snap in db.collection('events').stream():
+        scanned += 1
+        data = snap.to_dict() or {}
+        derived = derive_event_fields(data)
+        updates = {k: v for k, v in derived.items() if data.get(k) != v}
+        if not (data.get('startTime') or updates.get('startTime')):
+            missing_start += 1
+            print(f"[WARN] events/{snap.id}: no startTime or time; it is only listed by in-memory paging")
+        if not updates:
+            continue
+        changed += 1
+        print(f"[{'DRY' if dry_run else 'FIX'}] events/{snap.id}: {updates}")
+        if dry_run:
+            continue
+        batch.update(snap.reference, updates)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending and not dry_run:
+        batch.commit()
+
+    print(f"Scanned {scanned} event(s); {'would update' if dry_run else 'updated'} {changed}.")
+    if not dry_run and not missing_start:
+        mark_ordered_listing_ready()
+        print("Every event has a startTime; GET /api/events now pages with ordered queries.")
+
+
+if __name__ == '__main__':
+    main()
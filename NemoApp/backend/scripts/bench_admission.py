@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Benchmark flash-sale bookings on one event: per-request transactions vs the admission queue.
+# Run from the backend/ directory:
+#   python scripts/bench_admission.py [requests] [capacity] [latency_ms]
+#
+# Uses the in-memory datastore with simulated round-trip latency and fires all requests at
+# POST /api/bookings/individual concurrently, once for a plain event and once for an event
+# with admissionQueue=true (services/admission_queue.py).
+
+os.environ['NEMO_DATASTORE'] = 'memory'
+os.environ.setdefault('NEMO_EVENT_CATALOG', '0')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from services.firebase_service import db  # noqa: E402
+
+
+def create_event(event_id: str, capacity: int, admission_queue: bool) -> None:
+    start = datetime.utcnow() + timedelta(days=7)
+    event = {
+        'title': event_id, 'date': start.strftime('%Y-%m-%d'), 'startTime': '18:00',
+        'maxParticipants': capacity, 'currentParticipants': 0, 'availableSlots': capacity,
+        'status': 'upcoming',
+    }
+    if admission_queue:
+        event['admissionQueue'] = True
+    db.collection('events').document(event_id).set(event)
+
+
+def run(client, event_id: str, tokens: list) -> dict:
+    def book(token):
+        r = client.post('/api/bookings/individual', headers={'Authorization': f'Bearer {token}'},
+                        json={'eventId': event_id})
+        return r.status_code
+
+    db.reset_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tokens)) as pool:
+        codes = list(pool.map(book, tokens))
+    elapsed = time.perf_counter() - start
+    event = db.collection('events').document(event_id).get().to_dict()
+    return {
+        'seconds': elapsed,
+        'confirmed': codes.count(201),
+        'rejected': codes.count(400),
+        'errors': len(codes) - codes.count(201) - codes.count(400),
+        'aborts': db.stats['transactionAborts'],
+        'booked': event['currentParticipants'],
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    client = create_app().test_client()
+    tokens = [db.issue_token(f'bench_{i}') for i in range(n)]
+    db._latency = latency_ms / 1000.0
+
+    print(f"{n} concurrent bookings for {capacity} seats, {latency_ms:g} ms simulated latency")
+    for label, event_id, queued in (('transaction', 'bench_plain', False), ('admission queue', 'bench_queued', True)):
+        create_event(event_id, capacity, queued)
+        r = run(client, event_id, tokens)
+        rate = r['confirmed'] / r['seconds'] if r['seconds'] else 0.0
+        print(f"  {label:16s} {r['seconds']:7.2f}s  {rate:8.1f} bookings/s  confirmed={r['confirmed']} "
+              f"rejected={r['rejected']} errors={r['errors']} aborts={r['aborts']} booked={r['booked']}")
+
+
+if __name__ == '__main__':
+    main()
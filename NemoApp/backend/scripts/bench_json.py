@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Benchmark JSON encoding and compression of an event listing response.
+# Run from the backend/ directory:
+#   python scripts/bench_json.py [events_per_page] [iterations]
+#
+# Compares Flask's stdlib provider with the orjson provider (utils/json_provider.py) on
+# provider.response() — what jsonify() does per request — and reports compressed sizes/times.
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds  # noqa: E402
+from utils import compression  # noqa: E402
+from utils.json_provider import OrjsonProvider, orjson  # noqa: E402
+
+
+def sample_listing(n: int) -> dict:
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(n):
+        day = base + timedelta(days=i)
+        events.append({
+            'id': f'event_{i:04d}', 'title': f'Sample event {i}',
+            'description': 'A community event with activities for everyone. ' * 3,
+            'date': day.strftime('%Y-%m-%d'), 'startTime': '18:30', 'endTime': '21:00', 'timing': 'evening',
+            'location': 'Community Hall', 'organiser': 'Nemo', 'format': 'offline', 'venueType': 'indoor',
+            'type': 'music', 'region': 'central', 'price': 12.5, 'imageUrl': '', 'status': 'upcoming',
+            'maxParticipants': 40, 'currentParticipants': i % 40, 'availableSlots': 40 - i % 40,
+            'startTimestamp': int(day.timestamp()),
+            'createdAt': DatetimeWithNanoseconds(2029, 12, 1, 8, 0, 0, nanosecond=123456789, tzinfo=timezone.utc),
+        })
+    return {'success': True, 'events': events, 'count': n, 'nextPageToken': None}
+
+
+def best_of(fn, iterations: int) -> float:
+    """Best mean time per call in microseconds over 5 rounds."""
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rounds.append((time.perf_counter() - start) / iterations * 1e6)
+    return min(rounds)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    payload = sample_listing(n)
+    app = Flask(__name__)
+
+    print(f"Listing of {n} events, {iterations} iterations x 5 rounds (best mean per call)")
+    providers = [('stdlib', DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider(app)))
+    else:
+        print("[WARN] orjson not installed; only the stdlib provider is measured")
+
+    bodies = {}
+    timings = {}
+    for name, provider in providers:
+        bodies[name] = provider.response(payload).get_data()
+        timings[name] = best_of(lambda: provider.response(payload).get_data(), iterations)
+        print(f"  {name:<7} encode {timings[name]:9.1f} us   {len(bodies[name]):7d} bytes")
+    if 'orjson' in timings:
+        print(f"  speedup {timings['stdlib'] / timings['orjson']:.1f}x")
+        same = DefaultJSONProvider(app).loads(bodies['stdlib']) == DefaultJSONProvider(app).loads(bodies['orjson'])
+        print(f"  [{'OK' if same else 'ERROR'}] providers produce equivalent JSON")
+
+    body = bodies[providers[-1][0]]
+    print(f"Compression (threshold {compression.MIN_BYTES} bytes)")
+    for encoding in compression.available_encodings():
+        data = compression.compress(body, encoding)
+        t = best_of(lambda: compression.compress(body, encoding), max(1, iterations // 4))
+        print(f"  {encoding:<7} {t:9.1f} us   {len(data):7d} bytes ({len(data) / len(body):.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import json
+import os
+import re
+import sys
+
+# Regenerate the composite indexes needed by the GET /api/events query planner.
+# Run from the backend/ directory:
+#   python scripts/generate_indexes.py            # rewrite firebase/firestore.indexes.json
+#   python scripts/generate_indexes.py --check    # exit 1 if the file is out of date
+#
+# Entries not produced by the planner (other collections, legacy 'time' indexes) are kept as-is.
+# Deploy with: firebase deploy --only firestore:indexes
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.event_query import required_indexes, is_planner_index  # noqa: E402
+
+INDEXES_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'firebase', 'firestore.indexes.json')
+)
+
+
+def render(data: dict) -> str:
+    """json.dumps with one-line field entries, matching the hand-written file."""
+    text = json.dumps(data, indent=2)
+    return re.sub(
+        r'\{\n\s+"fieldPath": "([^"]+)",\n\s+"order": "([A-Z]+)"\n\s+\}',
+        r'{ "fieldPath": "\1", "order": "\2" }',
+        text,
+    )
+
+
+def build(current: dict) -> dict:
+    kept = [ix for ix in current.get('indexes', []) if not is_planner_index(ix)]
+    return {
+        'indexes': kept + required_indexes(),
+        'fieldOverrides': current.get('fieldOverrides', []),
+    }
+
+
+def main():
+    check = '--check' in sys.argv[1:]
+    with open(INDEXES_PATH, 'r', encoding='utf-8') as f:
+        current_text = f.read()
+    updated_text = render(build(json.loads(current_text)))
+
+    if check:
+        if updated_text != current_text:
+            print(f"[FAIL] {INDEXES_PATH} is out of date; run scripts/generate_indexes.py")
+            sys.exit(1)
+        print("[PASS] Firestore indexes up to date.")
+        return
+
+    with open(INDEXES_PATH, 'w', encoding='utf-8') as f:
+        f.write(updated_text)
+    print(f"[OK] Wrote {len(json.loads(updated_text)['indexes'])} indexes to {INDEXES_PATH}")
+
+
+if __name__ == '__main__':
+    main()
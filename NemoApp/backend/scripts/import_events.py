@@ -0,0 +1,75 @@
+import os
+import sys
+import uuid
+
+# Bulk-import events from a JSON Lines or CSV file (services/event_import.py).
+#
+# Run from the backend/ directory:
+#   python scripts/import_events.py schedule.csv
+#   python scripts/import_events.py schedule.jsonl --import-id=partner-2026-11
+#   python scripts/import_events.py export.txt --format=jsonl --created-by=<admin uid>
+#
+# Rows are validated like POST /api/admin/events and written in batched commits; invalid rows are
+# printed and skipped. The file is streamed, never loaded whole. Every run starts a new import
+# (with a fresh id) unless --import-id is given; if a run stops part-way, re-run it with the
+# printed --import-id to continue after the last committed row.
+
+try:
+    from services.event_import import FORMATS, import_events
+except Exception as e:
+    print("ERROR: Could not import Firestore client. Make sure you run this from backend/ directory.")
+    print("Detail:", e)
+    sys.exit(1)
+
+
+def _option(name: str):
+    prefix = f'--{name}='
+    for a in sys.argv[1:]:
+        if a.startswith(prefix):
+            return a[len(prefix):].strip() or None
+    return None
+
+
+def main():
+    paths = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(paths) != 1:
+        print("Usage: python scripts/import_events.py <file.jsonl|file.csv> "
+              "[--format=jsonl|csv] [--import-id=ID] [--created-by=UID]")
+        sys.exit(2)
+    path = paths[0]
+
+    fmt = _option('format')
+    if not fmt:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = 'jsonl' if ext in ('.jsonl', '.ndjson') else ext.lstrip('.')
+    if fmt not in FORMATS:
+        print(f"ERROR: cannot tell the format of {path}; pass --format=jsonl or --format=csv")
+        sys.exit(2)
+
+    # Only an explicit --import-id resumes a checkpoint; a reused file name must not match an old one
+    import_id = _option('import-id') or uuid.uuid4().hex
+    created_by = _option('created-by') or 'import-cli'
+    print(f"Importing {path} as {fmt} (import id: {import_id}; resume with --import-id={import_id})")
+
+    with open(path, 'rb') as f:
+        try:
+            summary = import_events(f, fmt, created_by, import_id=import_id, source=os.path.basename(path))
+        except ValueError as ve:
+            print("ERROR:", ve)
+            sys.exit(1)
+        except Exception as e:
+            print("ERROR:", e)
+            print(f"Committed rows are checkpointed; re-run with --import-id={import_id} to resume.")
+            sys.exit(1)
+
+    for err in summary['errors']:
+        print(f"  row {err['row']}: {err['error']}")
+    if summary['failed'] > len(summary['errors']):
+        print(f"  ... {summary['failed'] - len(summary['errors'])} more rejected row(s) not listed")
+    resumed = f" (resumed after row {summary['resumedFrom']})" if summary['resumedFrom'] else ""
+    print(f"{summary['status']}: {summary['rowsRead']} row(s) read, {summary['created']} created, "
+          f"{summary['failed']} rejected{resumed}.")
+
+
+if __name__ == '__main__':
+    main()
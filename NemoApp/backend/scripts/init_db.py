@@ -11,6 +11,8 @@ import uuid
 try:
     # Import Firestore client from our Firebase service
     from services.firebase_service import db
+    from utils.event_fields import derive_event_fields
+    from services.friend_pairs import friend_pair_id
 except Exception as e:
     print("ERROR: Could not import Firestore client. Make sure you run this from backend/ directory.")
     print("Detail:", e)
@@ -122,8 +124,6 @@ def seed_events():
             "price": 0.0,
             "maxParticipants": 20,
             "currentParticipants": 0,
-            "participants": [],
-            "guestEntries": [],
             "createdBy": "admin_test_001",
             "status": "upcoming",
             "createdAt": now,
@@ -145,8 +145,6 @@ def seed_events():
             "price": 15.0,
             "maxParticipants": 15,
             "currentParticipants": 0,
-            "participants": [],
-            "guestEntries": [],
             "createdBy": "admin_test_001",
             "status": "upcoming",
             "createdAt": now,
@@ -168,14 +166,16 @@ def seed_events():
             "price": 5.0,
             "maxParticipants": 50,
             "currentParticipants": 0,
-            "participants": [],
-            "guestEntries": [],
             "createdBy": "admin_test_001",
             "status": "upcoming",
             "createdAt": now,
         },
     ]
 
+    # Store derived fields (availableSlots, startTimestamp, ...) like the admin API does
+    for ev in sample_events:
+        ev.update(derive_event_fields(ev))
+
     created_ids = []
     events_col = db.collection("events")
     for ev in sample_events:
@@ -201,18 +201,10 @@ def seed_friend_requests():
     Optionally seed a pending friend request from user_test_001 to admin_test_001.
     """
     now = datetime.utcnow()
-    fr_col = db.collection("friendRequests")
-    # Avoid duplicates: check if same sender/receiver pending exists
-    query = (
-        fr_col.where("fromUserId", "==", "user_test_001")
-        .where("toUserId", "==", "admin_test_001")
-        .where("status", "==", "pending")
-        .limit(1)
-        .stream()
-    )
-    existing = next(query, None)
-    if not existing:
-        fr_col.add(
+    # One document per pair (services/friend_pairs.py)
+    fr_ref = db.collection("friendRequests").document(friend_pair_id("user_test_001", "admin_test_001"))
+    if not fr_ref.get().exists:
+        fr_ref.set(
             {
                 "fromUserId": "user_test_001",
                 "toUserId": "admin_test_001",
@@ -222,7 +214,7 @@ def seed_friend_requests():
         )
         print("Seeded a pending friend request: user_test_001 -> admin_test_001")
     else:
-        print("Friend request already exists (pending).")
+        print("Friend request already exists for this pair.")
 
 
 def main():
@@ -0,0 +1,102 @@
+import sys
+
+# Move legacy events/{id}.participants and guestEntries arrays into the attendee subcollection
+# (events/{id}/attendees/{uid}, see services/attendance.py), leaving only counters on the event.
+#
+# Run from the backend/ directory:
+#   python scripts/migrate_attendees.py            # migrate all events
+#   python scripts/migrate_attendees.py --dry-run  # report only
+#   python scripts/migrate_attendees.py <eventId>  # migrate one event
+#
+# Each transaction moves up to CHUNK_SIZE bookers: it writes their attendee docs and removes
+# the same entries from the arrays, so bookings and cancellations stay correct while it runs
+# (they read both layouts). Safe to re-run: migrated events have no arrays left.
+
+try:
+    from firebase_admin import firestore as admin_fs
+    from services.firebase_service import db
+    from services.attendance import attendee_ref, attendance_of, attendee_record
+    from utils.transactions import transactional
+except Exception as e:
+    print("ERROR: Could not import Firestore client. Make sure you run this from backend/ directory.")
+    print("Detail:", e)
+    sys.exit(1)
+
+CHUNK_SIZE = 200  # attendee writes per transaction (Firestore allows 500 writes)
+
+
+def _legacy_bookers(event: dict) -> list:
+    """Distinct uids holding seats through the legacy arrays, in array order."""
+    uids = list(event.get('participants') or [])
+    for ge in event.get('guestEntries') or []:
+        if isinstance(ge, dict) and isinstance(ge.get('addedBy'), str) and ge['addedBy']:
+            uids.append(ge['addedBy'])
+    return list(dict.fromkeys(u for u in uids if u))
+
+
+def migrate_chunk(event_ref) -> int:
+    """Move one chunk of bookers off the event's arrays. Returns bookers moved (0 when done)."""
+    transaction = db.transaction()
+
+    @transactional('migrate.attendees')
+    def _txn(txn):
+        snap = event_ref.get(transaction=txn)
+        if not snap.exists:
+            return 0
+        event = snap.to_dict() or {}
+        uids = _legacy_bookers(event)[:CHUNK_SIZE]
+        if not uids:
+            # Drop the emptied (or malformed-only) arrays
+            if 'participants' in event or 'guestEntries' in event:
+                txn.update(event_ref, {'participants': admin_fs.DELETE_FIELD, 'guestEntries': admin_fs.DELETE_FIELD})
+            return 0
+
+        refs = [attendee_ref(event_ref, uid) for uid in uids]
+        existing = {s.id: (s.to_dict() or {}) for s in txn.get_all(refs) if s.exists}
+        for uid in uids:
+            joined, guests = attendance_of(event, existing.get(uid, {}), uid)
+            txn.set(attendee_ref(event_ref, uid), attendee_record(uid, joined, guests))
+
+        moved = set(uids)
+        update = {}
+        in_array = [u for u in uids if u in (event.get('participants') or [])]
+        if in_array:
+            update['participants'] = admin_fs.ArrayRemove(in_array)
+        entries = [ge for ge in (event.get('guestEntries') or [])
+                   if isinstance(ge, dict) and ge.get('addedBy') in moved]
+        if entries:
+            update['guestEntries'] = admin_fs.ArrayRemove(entries)
+        txn.update(event_ref, update)
+        return len(uids)
+
+    return _txn(transaction)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    dry_run = '--dry-run' in sys.argv[1:]
+    events = db.collection('events')
+    snaps = [events.document(a).get() for a in args] if args else events.stream()
+
+    scanned = 0
+    migrated = 0
+    for snap in snaps:
+        if not snap.exists:
+            continue
+        scanned += 1
+        event = snap.to_dict() or {}
+        if 'participants' not in event and 'guestEntries' not in event:
+            continue
+        bookers = len(_legacy_bookers(event))
+        migrated += 1
+        print(f"[{'DRY' if dry_run else 'MOVE'}] events/{snap.id}: {bookers} booker(s)")
+        if dry_run:
+            continue
+        while migrate_chunk(snap.reference):
+            pass
+
+    print(f"Scanned {scanned} event(s); {'would migrate' if dry_run else 'migrated'} {migrated}.")
+
+
+if __name__ == '__main__':
+    main()
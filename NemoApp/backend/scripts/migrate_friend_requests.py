@@ -0,0 +1,78 @@
+import sys
+
+# Re-key friendRequests from auto-ids to one document per pair of users
+# (friendRequests/{sorted uids}, see services/friend_pairs.py).
+#
+# Run from the backend/ directory:
+#   python scripts/migrate_friend_requests.py            # migrate
+#   python scripts/migrate_friend_requests.py --dry-run  # report only
+#
+# When a pair has several legacy documents (both directions, or re-sent after a rejection) the
+# one with the strongest status wins (accepted > pending > rejected; ties keep the first one
+# moved) and the others are deleted. Each document moves in its own transaction, so the API can
+# stay up; clients holding the old id of a pending request should re-fetch /api/friends/pending.
+# Safe to re-run: documents already keyed by their pair are skipped. Documents keyed by an older
+# pair id format (uids joined by '_' without a length prefix) are re-keyed the same way.
+
+try:
+    from services.firebase_service import db
+    from services.friend_pairs import FRIEND_REQUESTS_COLLECTION, STATUS_RANK, friend_pair_id
+    from utils.transactions import transactional
+except Exception as e:
+    print("ERROR: Could not import Firestore client. Make sure you run this from backend/ directory.")
+    print("Detail:", e)
+    sys.exit(1)
+
+
+def migrate_request(legacy_ref) -> str:
+    """Move one auto-id request onto its pair document. Returns 'moved', 'merged' or 'skipped'."""
+    transaction = db.transaction()
+
+    @transactional('migrate.friend_requests')
+    def _txn(txn):
+        legacy_snap = legacy_ref.get(transaction=txn)
+        if not legacy_snap.exists:
+            return 'skipped'
+        legacy = legacy_snap.to_dict() or {}
+        from_uid, to_uid = legacy.get('fromUserId'), legacy.get('toUserId')
+        if not from_uid or not to_uid or from_uid == to_uid:
+            return 'skipped'
+        target_ref = db.collection(FRIEND_REQUESTS_COLLECTION).document(friend_pair_id(from_uid, to_uid))
+        if target_ref.id == legacy_ref.id:
+            return 'skipped'
+
+        target_snap = target_ref.get(transaction=txn)
+        target = (target_snap.to_dict() or {}) if target_snap.exists else None
+        outcome = 'merged'
+        if target is None or STATUS_RANK.get(legacy.get('status'), 0) > STATUS_RANK.get(target.get('status'), 0):
+            txn.set(target_ref, {**legacy, 'migratedFrom': legacy_ref.id})
+            outcome = 'moved'
+        txn.delete(legacy_ref)
+        return outcome
+
+    return _txn(transaction)
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv[1:]
+    counts = {'moved': 0, 'merged': 0, 'skipped': 0}
+    for snap in db.collection(FRIEND_REQUESTS_COLLECTION).stream():
+        req = snap.to_dict() or {}
+        from_uid, to_uid = req.get('fromUserId'), req.get('toUserId')
+        if from_uid and to_uid and snap.id == friend_pair_id(from_uid, to_uid):
+            continue
+        if dry_run:
+            print(f"[DRY] friendRequests/{snap.id}: {from_uid} -> {to_uid} ({req.get('status')})")
+            counts['moved'] += 1
+            continue
+        outcome = migrate_request(snap.reference)
+        counts[outcome] += 1
+        if outcome == 'skipped':
+            print(f"[SKIP] friendRequests/{snap.id}: missing or invalid fromUserId/toUserId")
+
+    verb = 'would move' if dry_run else 'moved'
+    print(f"{counts['moved']} request(s) {verb}, {counts['merged']} duplicate(s) merged, {counts['skipped']} skipped.")
+
+
+if __name__ == '__main__':
+    main()
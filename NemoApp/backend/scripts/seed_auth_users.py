@@ -2,6 +2,8 @@ import os
 import sys
 from typing import List, Dict
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 # Deterministic seeding of Firebase Auth users and Firestore user docs
 # Usage (Windows Git Bash from repo root):
 #   .venv/Scripts/python NemoApp/backend/scripts/seed_auth_users.py
@@ -10,7 +12,8 @@ from typing import List, Dict
 # - Ensure users user1, user2, user3 exist in Firebase Auth with email+password login
 # - Set their UIDs deterministically to "user1", "user2", "user3"
 # - Mirror/update Firestore users/{uid} docs (idempotent)
-# - Set user1 role=admin, others role=user
+# - Set user1 role=admin, others role=user via FirebaseService.set_user_role (also mirrored to the
+#   `admin` custom claim); running servers pick the new role up within their role cache TTL
 #
 # Emails and passwords are standardized for testing:
 # - user1@nemoapp.local / Password123!
@@ -34,6 +37,7 @@ def main():
         firebase_admin.initialize_app(cred)
 
     db = firestore.client()
+    from services.firebase_service import FirebaseService
 
     USERS: List[Dict] = [
         {
@@ -101,7 +105,6 @@ def main():
                 "uid": uid,
                 "email": email,
                 "name": name,
-                "role": role,
                 "profilePicture": "",
                 "friends": [],
             }, merge=True)
@@ -109,6 +112,12 @@ def main():
         except Exception as e_fs:
             errors.append(f"[ERROR] Failed to mirror Firestore user {uid}: {e_fs}")
 
+        # 3) Role on users/{uid} and the `admin` custom claim (used when NEMO_ADMIN_ROLE_SOURCE=claim)
+        try:
+            FirebaseService.set_user_role(uid, role)
+        except Exception as e_role:
+            warnings.append(f"[WARN] Could not set role/admin claim for {uid}: {e_role}")
+
     # Summary
     print("==== Seed Auth Users Summary ====")
     print("Created (auth):", created)
@@ -0,0 +1,236 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import firestore as admin_fs
+from google.api_core import exceptions as gexc
+
+from services.firebase_service import db
+from services.attendance import ATTENDEES_COLLECTION
+from services.seat_shards import SHARDS_COLLECTION
+
+# Background jobs for admin mutations that fan out over many documents (cascading event deletes,
+# bulk cancel/update). The admin request creates adminJobs/{jobId} and returns 202; a worker
+# thread does the writes with a BulkWriter and records progress on the job document, which
+# GET /api/admin/jobs/{jobId} reports.
+#
+#   events.delete  mark the events "deleting", cancel their confirmed bookings, drop attendees/seat
+#                  shards, then delete the event documents
+#   events.cancel  set status=cancelled on the events and cancel their confirmed bookings
+#   events.update  apply the same field updates to every event
+#
+# Jobs run in this process (NEMO_ADMIN_JOB_WORKERS threads, default 2). Every job is idempotent,
+# so one interrupted by a restart (left "running") can simply be submitted again; an event being
+# deleted keeps its document (status "deleting") until its cascade is done, so
+# DELETE /api/admin/events/<id> still finds it.
+
+JOBS_COLLECTION = 'adminJobs'
+JOB_WORKERS = max(1, int(os.getenv('NEMO_ADMIN_JOB_WORKERS', '2') or 2))
+# Documents fetched per query page when fanning out over bookings/subcollections
+PAGE_SIZE = 500
+# Documents written between job progress updates
+PROGRESS_EVERY = 500
+# Errors kept on the job document
+MAX_JOB_ERRORS = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='admin-job')
+        return _executor
+
+
+class JobProgress:
+    """
+    Counters for a running job, written to its document every PROGRESS_EVERY documents.
+    Thread-safe: BulkWriter error callbacks record failures from the writer's own threads.
+    """
+
+    def __init__(self, job_ref, events_total: int):
+        self._ref = job_ref
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.errors = []
+        self.counts = {
+            'eventsTotal': events_total,
+            'eventsDone': 0,
+            'bookingsCancelled': 0,
+            'documentsDeleted': 0,
+            'eventsUpdated': 0,
+            'failedWrites': 0,
+        }
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for k, n in counts.items():
+                self.counts[k] += n
+                self._unsaved += n
+            due = self._unsaved >= PROGRESS_EVERY
+        if due:
+            self.save()
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self.counts[key]
+
+    def error(self, message: str) -> None:
+        with self._lock:
+            self._error(message)
+
+    def failed_write(self, message: str) -> None:
+        with self._lock:
+            self.counts['failedWrites'] += 1
+            self._error(message)
+
+    def _error(self, message: str) -> None:
+        if len(self.errors) < MAX_JOB_ERRORS:
+            self.errors.append(message)
+
+    def save(self, **fields) -> None:
+        with self._lock:
+            progress, errors = dict(self.counts), list(self.errors)
+            self._unsaved = 0
+        self._ref.update({'progress': progress, 'errors': errors,
+                          'updatedAt': admin_fs.SERVER_TIMESTAMP, **fields})
+
+
+def _bulk_writer(progress: JobProgress):
+    writer = db.bulk_writer()
+
+    def _on_error(failure, _writer):
+        # Runs on a BulkWriter thread
+        progress.failed_write(getattr(failure, 'message', None) or str(failure))
+        return False  # do not retry
+
+    writer.on_write_error(_on_error)
+    return writer
+
+
+def _pages(query):
+    """Yield lists of up to PAGE_SIZE snapshots from query, paging by document id."""
+    query = query.order_by('__name__').limit(PAGE_SIZE)
+    last = None
+    while True:
+        page = list((query.start_after(last) if last is not None else query).stream())
+        if not page:
+            return
+        yield page
+        if len(page) < PAGE_SIZE:
+            return
+        last = page[-1]
+
+
+def _cancel_event_bookings(writer, progress: JobProgress, event_id: str, reason: str) -> None:
+    bookings = (db.collection('bookings')
+                .where('eventId', '==', event_id)
+                .where('status', '==', 'confirmed'))
+    for page in _pages(bookings):
+        for snap in page:
+            writer.update(snap.reference, {
+                'status': 'cancelled',
+                'cancelledAt': admin_fs.SERVER_TIMESTAMP,
+                'cancelReason': reason,
+            })
+        writer.flush()
+        progress.add(bookingsCancelled=len(page))
+
+
+def _delete_subcollection(writer, progress: JobProgress, coll_ref) -> None:
+    for page in _pages(coll_ref):
+        for snap in page:
+            writer.delete(snap.reference)
+        writer.flush()
+        progress.add(documentsDeleted=len(page))
+
+
+def _delete_events(params: dict, progress: JobProgress) -> None:
+    writer = _bulk_writer(progress)
+    for event_id in params['eventIds']:
+        event_ref = db.collection('events').document(event_id)
+        # Bookings on "deleting" events are rejected; the document itself goes last, so an
+        # interrupted job can be resubmitted for it
+        try:
+            event_ref.update({'status': 'deleting', 'deletingAt': admin_fs.SERVER_TIMESTAMP})
+        except gexc.NotFound:
+            pass  # already gone: still clean up what may hang off it
+        _cancel_event_bookings(writer, progress, event_id, 'event_deleted')
+        _delete_subcollection(writer, progress, event_ref.collection(ATTENDEES_COLLECTION))
+        _delete_subcollection(writer, progress, event_ref.collection(SHARDS_COLLECTION))
+        writer.delete(event_ref)
+        writer.flush()
+        progress.add(eventsDone=1, documentsDeleted=1)
+    writer.close()
+
+
+def _cancel_events(params: dict, progress: JobProgress) -> None:
+    writer = _bulk_writer(progress)
+    for event_id in params['eventIds']:
+        event_ref = db.collection('events').document(event_id)
+        try:
+            # Bookings on cancelled events are rejected from here on
+            event_ref.update({'status': 'cancelled', 'cancelledAt': admin_fs.SERVER_TIMESTAMP})
+        except Exception as e:
+            progress.error(f"{event_id}: {e}")
+        _cancel_event_bookings(writer, progress, event_id, 'event_cancelled')
+        progress.add(eventsDone=1)
+    writer.close()
+
+
+def _update_events(params: dict, progress: JobProgress) -> None:
+    writer = _bulk_writer(progress)
+    updates = dict(params['updates'])
+    for event_id in params['eventIds']:
+        writer.update(db.collection('events').document(event_id),
+                      {**updates, 'updatedAt': admin_fs.SERVER_TIMESTAMP})
+        progress.add(eventsDone=1)
+    writer.close()
+    progress.add(eventsUpdated=len(params['eventIds']) - progress.get('failedWrites'))
+
+
+JOB_KINDS = {
+    'events.delete': _delete_events,
+    'events.cancel': _cancel_events,
+    'events.update': _update_events,
+}
+
+
+def _run(job_ref, kind: str, params: dict) -> None:
+    progress = JobProgress(job_ref, len(params.get('eventIds') or []))
+    try:
+        progress.save(status='running', startedAt=admin_fs.SERVER_TIMESTAMP)
+        JOB_KINDS[kind](params, progress)
+        progress.save(status='completed', finishedAt=admin_fs.SERVER_TIMESTAMP)
+    except Exception as e:
+        progress.error(str(e))
+        try:
+            progress.save(status='failed', finishedAt=admin_fs.SERVER_TIMESTAMP)
+        except Exception:
+            pass
+
+
+def submit_job(kind: str, params: dict, created_by: str) -> str:
+    """Record a queued job and start it in the background. Returns the job id."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_ref = db.collection(JOBS_COLLECTION).document()
+    job_ref.set({
+        'kind': kind,
+        'params': params,
+        'status': 'queued',
+        'createdBy': created_by,
+        'createdAt': admin_fs.SERVER_TIMESTAMP,
+    })
+    _get_executor().submit(_run, job_ref, kind, params)
+    return job_ref.id
+
+
+def get_job(job_id: str) -> dict | None:
+    snap = db.collection(JOBS_COLLECTION).document(job_id).get()
+    if not snap.exists:
+        return None
+    return {'id': snap.id, **(snap.to_dict() or {})}
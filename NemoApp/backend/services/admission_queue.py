@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# Per-event admission queue for flash-sale bookings.
+#
+# Instead of every request running its own transaction against the same event document
+# (where all but one abort and retry), requests for an event with admissionQueue=true are
+# queued here. A worker thread per hot event waits WINDOW_SECONDS for more arrivals, then
+# hands up to MAX_BATCH queued requests, in arrival order, to one commit function that
+# admits them in a single transaction. Each caller gets its own result (or exception)
+# through a concurrent.futures.Future, so sync handlers block on wait_admitted() and async
+# handlers await asyncio.wrap_future(), both for at most RESULT_TIMEOUT_SECONDS. A request that
+# times out is cancelled if its batch has not started (otherwise it may still be admitted).
+#
+# Queues are per process; separate workers still serialize through the transaction. A queue
+# whose worker has been idle for IDLE_SECONDS is dropped, so only recently booked events keep one.
+
+WINDOW_SECONDS = max(0.0, float(os.getenv('NEMO_ADMISSION_WINDOW_MS', '5') or 5) / 1000.0)
+MAX_BATCH = max(1, int(os.getenv('NEMO_ADMISSION_MAX_BATCH', '100') or 100))
+# How long a request waits for its batch before giving up (503)
+RESULT_TIMEOUT_SECONDS = max(0.001, float(os.getenv('NEMO_ADMISSION_TIMEOUT_MS', '10000') or 10000) / 1000.0)
+# A worker with nothing queued for this long exits (a new one starts on the next request)
+IDLE_SECONDS = 30.0
+
+
+class AdmissionQueue:
+    def __init__(self, key: str, commit_batch, window: float = WINDOW_SECONDS, max_batch: int = MAX_BATCH,
+                 on_idle=None):
+        """
+        commit_batch(items) -> list of results, one per item in order; an Exception instance
+        in the list fails only that item. An exception raised by commit_batch fails the batch.
+        on_idle(queue) is called when the worker exits with nothing queued.
+        """
+        self.key = key
+        self._commit_batch = commit_batch
+        self._on_idle = on_idle
+        self._window = window
+        self._max_batch = max(1, int(max_batch))
+        self._cond = threading.Condition()
+        self._pending = []    # [(item, Future)] in arrival order
+        self._worker = None
+        self.batches = 0
+        self.admitted = 0
+
+    def submit(self, item) -> Future:
+        fut = Future()
+        with self._cond:
+            self._pending.append((item, fut))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f'admission-{self.key}', daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return fut
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending and not self._cond.wait_for(lambda: self._pending, timeout=IDLE_SECONDS):
+                    self._worker = None
+                    if self._on_idle is not None:
+                        self._on_idle(self)
+                    return
+            # Let concurrent arrivals join this batch
+            if self._window:
+                time.sleep(self._window)
+            with self._cond:
+                batch = self._pending[:self._max_batch]
+                del self._pending[:self._max_batch]
+            # Skip requests that timed out while queued; the rest can no longer be cancelled
+            batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch) -> None:
+        try:
+            results = self._commit_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        self.batches += 1
+        for (_, fut), result in zip(batch, results):
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                self.admitted += 1
+                fut.set_result(result)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {'pending': len(self._pending), 'batches': self.batches, 'admitted': self.admitted}
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def _evict(queue: AdmissionQueue) -> None:
+    # Called with the queue's condition held; a caller still holding the evicted queue can
+    # submit to it (a new worker starts), the next lookup creates a fresh queue
+    with _queues_lock:
+        if _queues.get(queue.key) is queue:
+            del _queues[queue.key]
+
+
+def get_admission_queue(key: str, commit_batch) -> AdmissionQueue:
+    """Return the process-wide queue for key (e.g. an event id), creating it on first use."""
+    with _queues_lock:
+        queue = _queues.get(key)
+        if queue is None:
+            queue = AdmissionQueue(key, commit_batch, on_idle=_evict)
+            _queues[key] = queue
+        return queue
+
+
+def wait_admitted(fut: Future, timeout: float = RESULT_TIMEOUT_SECONDS):
+    """
+    Result of a submitted request, waiting at most timeout seconds. On timeout the request is
+    cancelled if its batch has not started and TimeoutError is raised.
+    """
+    try:
+        return fut.result(timeout=timeout)
+    except FutureTimeout:
+        fut.cancel()
+        raise TimeoutError('Booking queue is busy, please try again')
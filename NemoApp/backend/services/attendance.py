@@ -0,0 +1,85 @@
+from firebase_admin import firestore as admin_fs
+
+# Event attendance lives in one small document per booker instead of arrays on the event:
+#   events/{id}/attendees/{uid}  {userId, joined, guests, seats, updatedAt[, shards]}
+# joined is the booker's own seat, seats the total, and guests the guest seats they added keyed
+# by casefolded name ({guest_key(name): name}); with the document id that is the
+# "addedBy|casefoldName" identity, so dedupe and cancellation are key lookups.
+# Sharded events (services/seat_shards.py) also record which shards hold those seats.
+# The event document keeps only the counters (currentParticipants/availableSlots), so booking
+# transactions read and write two bounded documents however large the event gets.
+#
+# Events created before this layout may still carry participants/guestEntries arrays until
+# scripts/migrate_attendees.py moves them here; attendance_of() reads both (and attendee docs
+# that still hold a guestNames list), and cancellation removes legacy array entries as well.
+
+ATTENDEES_COLLECTION = 'attendees'
+
+
+def attendee_ref(event_ref, uid: str):
+    return event_ref.collection(ATTENDEES_COLLECTION).document(uid)
+
+
+def read_attendee(txn, event_ref, uid: str) -> dict:
+    """The booker's attendee document read in a transaction ({} when absent)."""
+    snap = attendee_ref(event_ref, uid).get(transaction=txn)
+    return (snap.to_dict() or {}) if snap.exists else {}
+
+
+def guest_key(name: str) -> str:
+    """Map key for a guest name: trimmed and casefolded."""
+    return name.strip().casefold()
+
+
+def legacy_guest_entries(event: dict, uid: str) -> dict:
+    """{guest_key: entry} for the guestEntries elements uid added (legacy event array)."""
+    entries = {}
+    for ge in event.get('guestEntries') or []:
+        try:
+            name = (ge.get('name') or '').strip()
+            if name and ge.get('addedBy') == uid:
+                entries.setdefault(guest_key(name), ge)
+        except Exception:
+            # Ignore malformed guest entry records
+            continue
+    return entries
+
+
+def attendance_of(event: dict, attendee: dict, uid: str) -> tuple:
+    """(joined, guests) for uid from their attendee doc plus any legacy event arrays.
+    guests is {guest_key: name} in insertion order."""
+    joined = bool(attendee.get('joined')) or uid in (event.get('participants') or [])
+    guests = dict(attendee.get('guests') or {})
+    for n in attendee.get('guestNames') or []:
+        if isinstance(n, str) and n.strip():
+            guests.setdefault(guest_key(n), n.strip())
+    for key, ge in legacy_guest_entries(event, uid).items():
+        guests.setdefault(key, ge['name'].strip())
+    return joined, guests
+
+
+def attendee_record(uid: str, joined: bool, guests: dict, **extra) -> dict:
+    """Full attendee document to set()."""
+    return {
+        'userId': uid,
+        'joined': bool(joined),
+        'guests': dict(guests),
+        'seats': (1 if joined else 0) + len(guests),
+        'updatedAt': admin_fs.SERVER_TIMESTAMP,
+        **extra,
+    }
+
+
+def legacy_removal(event: dict, uid: str, keys) -> dict:
+    """ArrayRemove updates that drop uid's seat and the guest_key()s in keys from legacy event arrays, if any."""
+    update = {}
+    if uid in (event.get('participants') or []):
+        update['participants'] = admin_fs.ArrayRemove([uid])
+    keys = set(keys)
+    entries = [ge for ge in (event.get('guestEntries') or [])
+               if isinstance(ge, dict) and ge.get('addedBy') == uid
+               and isinstance(ge.get('name'), str) and guest_key(ge['name']) in keys]
+    if entries:
+        # ArrayRemove payload must match elements exactly: use the stored elements
+        update['guestEntries'] = admin_fs.ArrayRemove(entries)
+    return update
@@ -0,0 +1,39 @@
+import asyncio
+
+# Chunked multi-document reads by id. Firestore caps the references per get_all() call, so
+# ids are deduped and read GET_ALL_CHUNK_SIZE at a time (concurrently in the async variant).
+
+# Max document references per get_all() call
+GET_ALL_CHUNK_SIZE = 100
+
+
+def _chunks(ids, chunk_size: int) -> list:
+    unique = list(dict.fromkeys(i for i in ids if i))
+    size = max(1, int(chunk_size))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def get_many(client, collection: str, ids, field_paths=None, chunk_size: int = GET_ALL_CHUNK_SIZE) -> dict:
+    """{id: data} for the existing {collection}/{id} documents, read with chunked get_all calls."""
+    coll = client.collection(collection)
+    out = {}
+    for chunk in _chunks(ids, chunk_size):
+        refs = [coll.document(doc_id) for doc_id in chunk]
+        for snap in client.get_all(refs, field_paths=field_paths):
+            if snap.exists:
+                out[snap.id] = snap.to_dict() or {}
+    return out
+
+
+async def get_many_async(client, collection: str, ids, field_paths=None, chunk_size: int = GET_ALL_CHUNK_SIZE) -> dict:
+    """Async get_many for an AsyncClient; the chunked get_all calls are issued concurrently."""
+    coll = client.collection(collection)
+
+    async def _fetch(chunk):
+        refs = [coll.document(doc_id) for doc_id in chunk]
+        return {snap.id: (snap.to_dict() or {}) async for snap in client.get_all(refs, field_paths=field_paths) if snap.exists}
+
+    out = {}
+    for part in await asyncio.gather(*(_fetch(c) for c in _chunks(ids, chunk_size))):
+        out.update(part)
+    return out
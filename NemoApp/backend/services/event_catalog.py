@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from services.firebase_service import db
+
+# Per-process, in-memory copy of the `events` collection kept current by an
+# on_snapshot listener, so event reads can be answered without Firestore round trips.
+#
+# Enable with NEMO_EVENT_CATALOG=1. Blueprints call get_event_catalog() and must fall
+# back to direct queries whenever catalog.is_live() is False (not yet synced, listener
+# dropped). A dropped listener is restarted lazily, at most every RESTART_INTERVAL seconds.
+
+CATALOG_ENABLED = (os.getenv('NEMO_EVENT_CATALOG', '0') or '0').strip().lower() in ('1', 'true', 'yes', 'on')
+RESTART_INTERVAL = 10.0
+
+
+class EventCatalog:
+    def __init__(self, client=None, collection: str = 'events'):
+        self._client = client or db
+        self._collection = collection
+        self._events = {}          # id -> raw event dict (with 'id')
+        self._update_times = {}    # id -> document update_time (ETags)
+        self._lock = threading.Lock()
+        self._watch = None
+        self._synced = False
+        self._last_snapshot_at = None   # monotonic time of last delivered snapshot
+        self._last_read_time = None     # server read_time of last delivered snapshot
+        self._last_start_attempt = 0.0
+        self.version = 0                # bumps on every applied change set
+        self.snapshots = 0
+        self.restarts = 0
+        self.fallbacks = 0
+
+    # ---- listener lifecycle ----
+    def start(self) -> None:
+        with self._lock:
+            if self._watch is not None and self._listener_active():
+                return
+            self._last_start_attempt = time.monotonic()
+            if self._watch is not None:
+                self.restarts += 1
+            self._synced = False
+        try:
+            watch = self._client.collection(self._collection).on_snapshot(self._on_snapshot)
+        except Exception:
+            return
+        with self._lock:
+            self._watch = watch
+
+    def stop(self) -> None:
+        with self._lock:
+            watch, self._watch = self._watch, None
+            self._synced = False
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+
+    def _listener_active(self) -> bool:
+        watch = self._watch
+        if watch is None:
+            return False
+        if getattr(watch, '_closed', False):
+            return False
+        # Before the initial snapshot the underlying stream may not report active yet
+        return bool(getattr(watch, 'is_active', True)) or not self._synced
+
+    def _on_snapshot(self, docs, changes, read_time):
+        with self._lock:
+            if not self._synced:
+                # Initial (or post-restart) snapshot: rebuild from the full result set
+                self._events = {}
+                self._update_times = {}
+                for snap in docs:
+                    data = snap.to_dict() or {}
+                    data['id'] = snap.id
+                    self._events[snap.id] = data
+                    self._update_times[snap.id] = snap.update_time
+                self._synced = True
+            else:
+                for change in changes:
+                    snap = change.document
+                    if change.type.name == 'REMOVED':
+                        self._events.pop(snap.id, None)
+                        self._update_times.pop(snap.id, None)
+                    else:
+                        data = snap.to_dict() or {}
+                        data['id'] = snap.id
+                        self._events[snap.id] = data
+                        self._update_times[snap.id] = snap.update_time
+            self.version += 1
+            self.snapshots += 1
+            self._last_snapshot_at = time.monotonic()
+            self._last_read_time = read_time
+
+    # ---- reads ----
+    def is_live(self) -> bool:
+        """True when reads can be served from memory; otherwise counts a fallback and maybe restarts."""
+        if self._synced and self._listener_active():
+            return True
+        self.fallbacks += 1
+        if time.monotonic() - self._last_start_attempt >= RESTART_INTERVAL:
+            self.start()
+        return False
+
+    def events(self) -> list:
+        """Shallow copies of every cached event (safe for per-request computed fields)."""
+        with self._lock:
+            return [dict(e) for e in self._events.values()]
+
+    def get(self, event_id: str) -> dict | None:
+        with self._lock:
+            data = self._events.get(event_id)
+            return dict(data) if data is not None else None
+
+    def update_time(self, event_id: str):
+        with self._lock:
+            return self._update_times.get(event_id)
+
+    def staleness_seconds(self) -> float | None:
+        """Seconds since the listener last delivered a snapshot (None before the first one)."""
+        if self._last_snapshot_at is None:
+            return None
+        return time.monotonic() - self._last_snapshot_at
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._events)
+        return {
+            'enabled': True,
+            'live': self._synced and self._listener_active(),
+            'size': size,
+            'version': self.version,
+            'snapshots': self.snapshots,
+            'restarts': self.restarts,
+            'fallbacks': self.fallbacks,
+            'stalenessSeconds': self.staleness_seconds(),
+            'lastReadTime': self._last_read_time.isoformat() if hasattr(self._last_read_time, 'isoformat') else None,
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_event_catalog() -> EventCatalog | None:
+    """Return the process-wide catalog (started on first use), or None when disabled."""
+    global _catalog
+    if not CATALOG_ENABLED:
+        return None
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = EventCatalog()
+                catalog.start()
+                _catalog = catalog
+    return _catalog
@@ -0,0 +1,337 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+
+from firebase_admin import firestore as admin_fs
+
+from services.firebase_service import db
+from services.seat_shards import SEAT_SHARDS_MAX, init_seat_shards
+from utils.event_fields import combine_date_time, compute_start_timestamp
+from utils.validators import (
+    validate_event_format,
+    validate_event_venue_type,
+    validate_event_type,
+    validate_event_region,
+    validate_date,
+    validate_hhmm_time,
+    derive_timing_bucket,
+    validate_price_float,
+    ensure_start_before_end,
+    add_minutes_to_hhmm,
+)
+
+# Event document construction shared by POST /api/admin/events and bulk imports
+# (POST /api/admin/events/import, scripts/import_events.py).
+#
+# Imports stream JSON Lines or CSV rows, validate each with build_event_doc() and write the valid
+# ones with batched commits. Progress is checkpointed in eventImports/{importId} in the same batch
+# as the rows it covers, so re-running an import with the same importId and file skips exactly
+# the rows already committed (created or rejected) and continues from there.
+
+IMPORTS_COLLECTION = 'eventImports'
+FORMATS = ('jsonl', 'csv')
+# Writes per batched commit (Firestore allows 500; one is the checkpoint)
+BATCH_WRITES = 400
+# Checkpoint at least every N rows, even when they are all rejected
+CHECKPOINT_ROWS = 1000
+# Row errors kept on the checkpoint and returned in the summary
+MAX_REPORTED_ERRORS = 500
+
+
+def build_event_doc(body: dict, created_by: str) -> tuple:
+    """
+    Validate an event payload (new schema, legacy category/time mapped) and compose the document.
+    Returns (event, seat_shards); raises ValueError with the first validation error.
+    """
+    body = dict(body or {})
+
+    # Basic required fields
+    required_basic = ["title", "description", "location", "date", "maxParticipants"]
+    missing_basic = [f for f in required_basic if body.get(f) in (None, "", [])]
+    if missing_basic:
+        raise ValueError(f"Missing field(s): {', '.join(missing_basic)}")
+
+    title = str(body.get("title")).strip()
+    description = str(body.get("description")).strip()
+    location = str(body.get("location")).strip()
+    date_str = str(body.get("date")).strip()
+    imageUrl = str(body.get("imageUrl")).strip() if body.get("imageUrl") else ""
+
+    # maxParticipants must be positive integer
+    try:
+        max_part = int(body.get("maxParticipants"))
+        if max_part <= 0:
+            raise ValueError
+    except Exception:
+        raise ValueError("maxParticipants must be a positive integer")
+
+    # Optional seatShards: spread capacity over N counter docs for high-demand events
+    seat_shards = 0
+    if body.get("seatShards") not in (None, "", 0, 1):
+        try:
+            seat_shards = int(body.get("seatShards"))
+            if not 2 <= seat_shards <= SEAT_SHARDS_MAX:
+                raise ValueError
+        except Exception:
+            raise ValueError(f"seatShards must be an integer between 2 and {SEAT_SHARDS_MAX}")
+
+    # Optional admissionQueue: batch concurrent individual bookings (single-counter events only)
+    admission_queue = body.get("admissionQueue", False)
+    if not isinstance(admission_queue, bool):
+        raise ValueError("admissionQueue must be a boolean")
+    if admission_queue and seat_shards:
+        raise ValueError("admissionQueue cannot be combined with seatShards")
+
+    # Validate date
+    ok, date_val = validate_date(date_str)
+    if not ok:
+        raise ValueError(date_val)
+
+    # Legacy support: category -> type, time -> startTime (2h default end)
+    for k in ("category", "time"):
+        if body.get(k) is not None and not isinstance(body[k], str):
+            raise ValueError(f"{k} must be a string")
+    legacy_category = (body.get("category") or "").strip().lower()
+    legacy_time = (body.get("time") or "").strip()
+    if not body.get("type") and legacy_category:
+        mapping = {"sports": "sports", "workshop": "workshop", "cultural": "culture", "social": "other"}
+        body["type"] = mapping.get(legacy_category, "other")
+    if not body.get("startTime") and legacy_time:
+        body["startTime"] = legacy_time
+    if body.get("startTime") and not body.get("endTime"):
+        body["endTime"] = add_minutes_to_hhmm(body["startTime"], 120)
+
+    # format
+    fmt_input = body.get("format", "offline")  # default offline for legacy
+    ok, fmt = validate_event_format(fmt_input)
+    if not ok:
+        raise ValueError(fmt)
+
+    # venueType (for offline only)
+    ok, venue_type = validate_event_venue_type(fmt, body.get("venueType"))
+    if not ok:
+        raise ValueError(venue_type)
+
+    # type
+    if not body.get("type"):
+        raise ValueError("type is required")
+    ok, ev_type = validate_event_type(body.get("type"))
+    if not ok:
+        raise ValueError(ev_type)
+
+    # region
+    if not body.get("region"):
+        raise ValueError("region is required")
+    ok, region = validate_event_region(body.get("region"))
+    if not ok:
+        raise ValueError(region)
+
+    # organiser
+    organiser = str(body.get("organiser") or "").strip()
+    if not organiser:
+        raise ValueError("organiser is required")
+
+    # times
+    ok, st = validate_hhmm_time(body.get("startTime"), "startTime")
+    if not ok:
+        raise ValueError(st)
+    ok, et = validate_hhmm_time(body.get("endTime"), "endTime")
+    if not ok:
+        raise ValueError(et)
+
+    ok, err = ensure_start_before_end(date_val, st, et)
+    if not ok:
+        raise ValueError(err)
+
+    # price
+    ok, price = validate_price_float(body.get("price", 0))
+    if not ok:
+        raise ValueError(price)
+
+    # derive timing
+    timing = derive_timing_bucket(st)
+
+    # Disallow creating events scheduled in the past (relative to current UTC time)
+    event_dt = combine_date_time(date_val, st)
+    if not event_dt:
+        raise ValueError("Invalid date/time combination")
+    if event_dt <= datetime.utcnow():
+        raise ValueError("Event start must be in the future")
+
+    # Compose event doc (new schema)
+    event = {
+        "title": title,
+        "description": description,
+        "format": fmt,
+        "venueType": venue_type,
+        "type": ev_type,
+        "region": region,
+        "organiser": organiser,
+        "location": location,
+        "date": date_val,
+        "startTime": st,
+        "endTime": et,
+        "timing": timing,
+        "price": price,
+        "imageUrl": imageUrl,
+        "maxParticipants": max_part,
+        "currentParticipants": 0,
+        # Derived fields stored so reads are a passthrough
+        "availableSlots": max_part,
+        "startTimestamp": compute_start_timestamp(date_val, st),
+        # Attendance lives in events/{id}/attendees/{uid} (services/attendance.py)
+        "createdBy": created_by,
+        "status": "upcoming",
+        "createdAt": admin_fs.SERVER_TIMESTAMP
+    }
+
+    if seat_shards:
+        event["seatShards"] = seat_shards
+    if admission_queue:
+        event["admissionQueue"] = True
+    return event, seat_shards
+
+
+# CSV columns read as booleans ("true"/"false"); every other cell stays a string
+CSV_BOOL_FIELDS = ("admissionQueue",)
+
+
+def _csv_value(key: str, value):
+    """CSV cells are strings: blanks are missing and CSV_BOOL_FIELDS true/false are booleans."""
+    if value is None:
+        return None
+    v = value.strip()
+    if v == "":
+        return None
+    if key in CSV_BOOL_FIELDS and v.lower() in ("true", "false"):
+        return v.lower() == "true"
+    return v
+
+
+def iter_rows(stream, fmt: str):
+    """
+    Yield (row_number, payload_or_ValueError) from a binary or text stream, one row at a time.
+    JSON Lines rows are numbered by line (blank lines skipped); CSV rows by record after the header.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    text = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        for n, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                yield n, ValueError(f"Invalid JSON: {e}")
+                continue
+            yield n, payload if isinstance(payload, dict) else ValueError("Row must be a JSON object")
+    else:
+        for n, record in enumerate(csv.DictReader(text), start=1):
+            if None in record:
+                yield n, ValueError("Row has more cells than the header")
+                continue
+            payload = {}
+            for key, value in record.items():
+                key = (key or '').strip()
+                value = _csv_value(key, value)
+                if key and value is not None:
+                    payload[key] = value
+            yield n, payload
+
+
+def import_events(stream, fmt: str, created_by: str, import_id: str | None = None, source: str = '') -> dict:
+    """
+    Import events from a JSON Lines or CSV stream. Resumes eventImports/{import_id} when it exists
+    (rows up to its cursor are skipped); a completed import is returned as-is. Run one process
+    per import_id at a time.
+    Returns the import summary: {importId, status, rowsRead, created, failed, errors, resumedFrom}.
+    """
+    import_id = import_id or uuid.uuid4().hex
+    ref = db.collection(IMPORTS_COLLECTION).document(import_id)
+    snap = ref.get()
+    state = (snap.to_dict() or {}) if snap.exists else {}
+    if state.get('status') == 'completed':
+        return _summary(import_id, state)
+    if state and (state.get('format') != fmt or state.get('createdBy') != created_by):
+        raise ValueError(f"Import {import_id} was started with a different format or by another admin")
+
+    cursor = int(state.get('rowsRead', 0) or 0)
+    state = {
+        'format': fmt,
+        'source': state.get('source') or source,
+        'createdBy': created_by,
+        'status': 'running',
+        'rowsRead': cursor,
+        'created': int(state.get('created', 0) or 0),
+        'failed': int(state.get('failed', 0) or 0),
+        'errors': list(state.get('errors') or []),
+        'resumedFrom': cursor,
+    }
+    if not snap.exists:
+        state['startedAt'] = admin_fs.SERVER_TIMESTAMP
+
+    events = db.collection('events')
+    batch, writes = db.batch(), 0
+    pending = dict(created=0, failed=0, errors=[], rowsRead=cursor, since=0)
+
+    def _flush():
+        nonlocal batch, writes
+        state['rowsRead'] = pending['rowsRead']
+        state['created'] += pending['created']
+        state['failed'] += pending['failed']
+        state['errors'] = (state['errors'] + pending['errors'])[:MAX_REPORTED_ERRORS]
+        batch.set(ref, {**state, 'updatedAt': admin_fs.SERVER_TIMESTAMP}, merge=True)
+        batch.commit()
+        state.pop('startedAt', None)
+        batch, writes = db.batch(), 0
+        pending.update(created=0, failed=0, errors=[], since=0)
+
+    for row, payload in iter_rows(stream, fmt):
+        if row <= cursor:
+            continue
+        if pending['since'] >= CHECKPOINT_ROWS:
+            _flush()
+        pending['since'] += 1
+        try:
+            if isinstance(payload, Exception):
+                raise payload
+            event, seat_shards = build_event_doc(payload, created_by)
+        except Exception as e:
+            # Any bad row is reported and skipped; it must not stop (or wedge the resume of) the import
+            pending['failed'] += 1
+            if len(state['errors']) + len(pending['errors']) < MAX_REPORTED_ERRORS:
+                pending['errors'].append({'row': row, 'error': str(e) if isinstance(e, ValueError) else f"Invalid row: {e}"})
+            pending['rowsRead'] = row
+            continue
+
+        if writes + 1 + seat_shards > BATCH_WRITES:
+            _flush()
+        event['importId'] = import_id
+        event_ref = events.document()
+        batch.set(event_ref, event)
+        if seat_shards:
+            # Event and its shard docs are created together
+            init_seat_shards(batch, event_ref, event['maxParticipants'], seat_shards)
+        writes += 1 + seat_shards
+        pending['created'] += 1
+        pending['rowsRead'] = row
+
+    state['status'] = 'completed'
+    state['completedAt'] = admin_fs.SERVER_TIMESTAMP
+    _flush()
+    return _summary(import_id, state)
+
+
+def _summary(import_id: str, state: dict) -> dict:
+    return {
+        'importId': import_id,
+        'status': state.get('status'),
+        'rowsRead': state.get('rowsRead', 0),
+        'created': state.get('created', 0),
+        'failed': state.get('failed', 0),
+        'errors': state.get('errors') or [],
+        'resumedFrom': state.get('resumedFrom', 0),
+    }
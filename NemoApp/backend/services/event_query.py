@@ -0,0 +1,115 @@
+import threading
+import time
+from itertools import combinations
+
+# Query planner for GET /api/events.
+#
+# Every supported equality filter and the date range are pushed to Firestore, and results
+# are ordered by (date, startTime, __name__) for cursor paging. Each distinct set of equality
+# fields needs its own composite index; scripts/generate_indexes.py writes them all to
+# firebase/firestore.indexes.json from required_indexes() below, so keep the two in sync by
+# regenerating whenever EQUALITY_FIELDS or ORDER_FIELDS change.
+#
+# Firestore leaves documents without an order_by field out of ordered results, so legacy events
+# stored with only `time` would be missing from these pages. Ordered queries are therefore used
+# only once scripts/backfill_event_fields.py has recorded that every event has a startTime
+# (meta/eventListing.startTimeBackfilled); until then listings are paged in memory.
+
+# Equality-filterable event fields in canonical (index) order
+EQUALITY_FIELDS = ('status', 'type', 'format', 'region', 'timing', 'category')
+# Listing order; `date` also carries the fromDate/toDate range
+ORDER_FIELDS = ('date', 'startTime')
+
+META_COLLECTION = 'meta'
+LISTING_META_DOC = 'eventListing'
+# How long a process trusts its last read of the backfill marker
+LISTING_READY_CHECK_SECONDS = 60.0
+
+_ready_lock = threading.Lock()
+_ready_checked_at = None
+_ready = False
+
+
+class EventQueryPlan:
+    def __init__(self, equalities: list, date_from: str | None = None, date_to: str | None = None):
+        self.equalities = equalities      # [(field, value)] in EQUALITY_FIELDS order
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @property
+    def fields(self) -> tuple:
+        return tuple(f for f, _ in self.equalities)
+
+    def apply(self, query):
+        """Add this plan's where() clauses to query (ordering is added by the pager)."""
+        for field, value in self.equalities:
+            query = query.where(field, '==', value)
+        if self.date_from:
+            query = query.where('date', '>=', self.date_from)
+        if self.date_to:
+            query = query.where('date', '<=', self.date_to)
+        return query
+
+    def index(self) -> dict | None:
+        """Composite index entry this plan needs (None when only the default order index applies)."""
+        return index_for_fields(self.fields)
+
+
+def plan_event_query(filters: dict, date_from: str | None = None, date_to: str | None = None) -> EventQueryPlan:
+    """Build a plan from {field: value} (empty values are ignored)."""
+    equalities = [(f, filters[f]) for f in EQUALITY_FIELDS if filters.get(f)]
+    return EventQueryPlan(equalities, date_from or None, date_to or None)
+
+
+def index_for_fields(equality_fields) -> dict:
+    fields = [{'fieldPath': f, 'order': 'ASCENDING'} for f in equality_fields]
+    fields += [{'fieldPath': f, 'order': 'ASCENDING'} for f in ORDER_FIELDS]
+    return {'collectionGroup': 'events', 'queryScope': 'COLLECTION', 'fields': fields}
+
+
+def required_indexes() -> list:
+    """One composite index per subset of EQUALITY_FIELDS (including the empty set), smallest first."""
+    out = []
+    for size in range(0, len(EQUALITY_FIELDS) + 1):
+        for combo in combinations(EQUALITY_FIELDS, size):
+            out.append(index_for_fields(combo))
+    return out
+
+
+def is_planner_index(index: dict) -> bool:
+    """True for events indexes this module generates (ending in the ORDER_FIELDS ordering)."""
+    if index.get('collectionGroup') != 'events' or index.get('queryScope') != 'COLLECTION':
+        return False
+    paths = [f.get('fieldPath') for f in index.get('fields', [])]
+    n = len(ORDER_FIELDS)
+    return (
+        len(paths) >= n
+        and tuple(paths[-n:]) == ORDER_FIELDS
+        and all(p in EQUALITY_FIELDS for p in paths[:-n])
+    )
+
+
+def _listing_meta_ref():
+    from services.firebase_service import db
+    return db.collection(META_COLLECTION).document(LISTING_META_DOC)
+
+
+def ordered_listing_ready() -> bool:
+    """True once every event is known to have startTime, so ordered Firestore pages see them all."""
+    global _ready_checked_at, _ready
+    with _ready_lock:
+        if _ready_checked_at is not None and time.monotonic() - _ready_checked_at < LISTING_READY_CHECK_SECONDS:
+            return _ready
+    snap = _listing_meta_ref().get()
+    ready = bool(snap.exists and (snap.to_dict() or {}).get('startTimeBackfilled'))
+    with _ready_lock:
+        _ready_checked_at, _ready = time.monotonic(), ready
+    return ready
+
+
+def mark_ordered_listing_ready() -> None:
+    """Record that every event has startTime (scripts/backfill_event_fields.py)."""
+    global _ready_checked_at
+    _listing_meta_ref().set({'startTimeBackfilled': True}, merge=True)
+    with _ready_lock:
+        _ready_checked_at = None
@@ -4,11 +4,17 @@ from firebase_admin import exceptions as firebase_exceptions
 from datetime import datetime
 import os
 from utils.phone_utils import is_phone_email, email_to_phone
+from utils.role_cache import role_cache
 
 # Path to service account key (override with env FIREBASE_CREDENTIALS_PATH)
 DEFAULT_SERVICE_ACCOUNT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'firebase', 'firebase-admin-key.json')
 SERVICE_ACCOUNT_PATH = os.getenv('FIREBASE_CREDENTIALS_PATH', DEFAULT_SERVICE_ACCOUNT_PATH)
 
+# Datastore backend behind `db`:
+#   - firestore (default): live Firestore via Firebase Admin
+#   - memory: in-process stand-in (services/memory_store.py) for load tests, profiling and benchmarks
+DATASTORE_BACKEND = (os.getenv('NEMO_DATASTORE', 'firestore') or 'firestore').strip().lower()
+
 # Initialize Firebase Admin if not already initialized
 def initialize_firebase():
     if not firebase_admin._apps:
@@ -21,8 +27,37 @@ def initialize_firebase():
         firebase_admin.initialize_app(cred)
     return firestore.client()
 
-# Firestore client
-db = initialize_firebase()
+def initialize_datastore():
+    """
+    Return the datastore client selected by NEMO_DATASTORE.
+    Both backends expose the same firestore.Client surface used by the blueprints.
+    """
+    if DATASTORE_BACKEND == 'memory':
+        from services.memory_store import create_memory_client
+        return create_memory_client()
+    if DATASTORE_BACKEND != 'firestore':
+        raise ValueError(f"Unknown NEMO_DATASTORE backend: {DATASTORE_BACKEND!r} (expected 'firestore' or 'memory')")
+    return initialize_firebase()
+
+# Firestore client (or its in-memory stand-in)
+db = initialize_datastore()
+
+_async_db = None
+
+def get_async_db():
+    """
+    firestore.AsyncClient for the async app (memory mode: a facade over `db`'s data).
+    Created on first use so its gRPC channel binds to the serving event loop.
+    """
+    global _async_db
+    if _async_db is None:
+        if DATASTORE_BACKEND == 'memory':
+            from services.memory_store import AsyncMemoryClient
+            _async_db = AsyncMemoryClient(db)
+        else:
+            from firebase_admin import firestore_async
+            _async_db = firestore_async.client()
+    return _async_db
 
 class FirebaseService:
     @staticmethod
@@ -61,11 +96,37 @@ class FirebaseService:
         Verify Firebase ID token. Returns uid if valid, otherwise None.
         """
         try:
-            decoded = auth.verify_id_token(id_token)
+            decoded = FirebaseService.decode_token(id_token)
             return decoded.get('uid')
         except Exception:
             return None
 
+    @staticmethod
+    def decode_token(id_token: str) -> dict:
+        """
+        Verify Firebase ID token and return its decoded claims. Raises on invalid tokens.
+        The memory datastore has no Firebase project, so it verifies tokens minted by db.issue_token().
+        """
+        if DATASTORE_BACKEND == 'memory':
+            return db.verify_token(id_token)
+        return auth.verify_id_token(id_token)
+
+    @staticmethod
+    def set_user_role(uid: str, role: str, sync_claim: bool = True) -> None:
+        """
+        Set users/{uid}.role and invalidate the cached role used by require_admin in this process
+        (other workers pick it up within the role cache TTL; see utils/role_cache.py).
+        With sync_claim, also mirror it to the `admin` custom claim (for NEMO_ADMIN_ROLE_SOURCE=claim);
+        the claim reaches clients on their next ID token refresh.
+        """
+        db.collection('users').document(uid).set({'role': role}, merge=True)
+        role_cache.invalidate(uid)
+        if sync_claim and DATASTORE_BACKEND != 'memory':
+            user = auth.get_user(uid)
+            claims = dict(user.custom_claims or {})
+            claims['admin'] = (role == 'admin')
+            auth.set_custom_user_claims(uid, claims)
+
     @staticmethod
     def get_user(uid: str) -> dict | None:
         """
@@ -0,0 +1,24 @@
+# Friend requests are keyed by the pair of users, not by an auto-id:
+#   friendRequests/{friend_pair_id(a, b)}  {fromUserId, toUserId, status, createdAt}
+# so "is there a pending/accepted request between A and B" is one document read, and two
+# simultaneous requests (A->B and B->A) contend on the same document inside their transactions
+# instead of both passing a query check. A rejected pair can be requested again, which
+# overwrites the document. scripts/migrate_friend_requests.py moves auto-id documents over.
+
+FRIEND_REQUESTS_COLLECTION = 'friendRequests'
+
+# Which document wins when legacy requests for one pair are merged
+STATUS_RANK = {'accepted': 3, 'pending': 2, 'rejected': 1}
+
+
+def friend_pair_id(uid_a: str, uid_b: str) -> str:
+    """
+    Canonical document id for a pair of users: '{len(first)}_{first}_{second}' over the sorted
+    uids. The length prefix keeps it unambiguous for uids that contain '_' themselves.
+    """
+    first, second = sorted((uid_a, uid_b))
+    return f"{len(first)}_{first}_{second}"
+
+
+def pair_ref(db, uid_a: str, uid_b: str):
+    return db.collection(FRIEND_REQUESTS_COLLECTION).document(friend_pair_id(uid_a, uid_b))
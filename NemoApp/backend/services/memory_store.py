@@ -0,0 +1,1189 @@
+"""
+In-process Firestore stand-in.
+
+Implements the subset of the google-cloud-firestore client surface used by the
+blueprints (collections, documents, where/order_by/limit/start_after queries,
+batched writes, bulk writers, transactions and the Increment/ArrayUnion/ArrayRemove/
+SERVER_TIMESTAMP/DELETE_FIELD transforms) on top of plain dicts guarded by a lock.
+
+Selected with NEMO_DATASTORE=memory (see services/firebase_service.py) so the
+Flask app can run under load tests, profilers and benchmarks without a live
+Firebase project. Optional env:
+  - NEMO_MEMORY_LATENCY_MS: simulated round-trip latency added to every RPC
+  - NEMO_MEMORY_SEED: path to a JSON file {collection: {docId: {...}}} loaded at startup
+
+AsyncMemoryClient exposes the same data through the firestore.AsyncClient surface
+for the async app (see async_app.py).
+"""
+
+import asyncio
+import copy
+import json
+import os
+import random
+import string
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from google.api_core import exceptions as gexc
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import split_field_path
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+DOCUMENT_ID = '__name__'
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+_INEQUALITY_OPS = ('<', '<=', '>', '>=', '!=', 'not-in')
+_MISSING = object()
+
+
+def _auto_id() -> str:
+    return ''.join(random.choice(_AUTO_ID_CHARS) for _ in range(20))
+
+
+def _now() -> DatetimeWithNanoseconds:
+    return DatetimeWithNanoseconds.now(timezone.utc)
+
+
+def _split(field_path: str) -> list:
+    if '.' not in field_path and '`' not in field_path:
+        return [field_path]
+    return split_field_path(field_path)
+
+
+def _encode(value):
+    """Normalize a value the way Firestore would round-trip it (tuples -> lists, datetimes -> aware UTC)."""
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, datetime) and not isinstance(value, DatetimeWithNanoseconds):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        else:
+            value = value.astimezone(timezone.utc)
+        return DatetimeWithNanoseconds(
+            value.year, value.month, value.day, value.hour, value.minute,
+            value.second, value.microsecond, tzinfo=timezone.utc
+        )
+    return value
+
+
+def _value_key(value):
+    """Sort/equality key following Firestore's cross-type value ordering."""
+    if value is None:
+        return (0,)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    if isinstance(value, MemoryDocumentReference):
+        return (6, value.path)
+    if isinstance(value, (list, tuple)):
+        return (8, tuple(_value_key(v) for v in value))
+    if isinstance(value, dict):
+        return (9, tuple(sorted((k, _value_key(v)) for k, v in value.items())))
+    return (10, repr(value))
+
+
+def _get_field(data: dict, field_path: str):
+    cur = data
+    for part in _split(field_path):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+
+def _delete_field(data: dict, parts: list) -> None:
+    cur = data
+    for part in parts[:-1]:
+        cur = cur.get(part)
+        if not isinstance(cur, dict):
+            return
+    cur.pop(parts[-1], None)
+
+
+def _apply_value(data: dict, parts: list, value, commit_time) -> None:
+    """Write value (or apply a transform) at the nested path given by parts."""
+    if value is transforms.DELETE_FIELD:
+        _delete_field(data, parts)
+        return
+
+    cur = data
+    for part in parts[:-1]:
+        nxt = cur.get(part)
+        if not isinstance(nxt, dict):
+            nxt = {}
+            cur[part] = nxt
+        cur = nxt
+    leaf = parts[-1]
+    existing = cur.get(leaf, _MISSING)
+
+    if value is transforms.SERVER_TIMESTAMP:
+        cur[leaf] = commit_time
+    elif isinstance(value, transforms.Increment):
+        if isinstance(existing, (int, float)) and not isinstance(existing, bool):
+            cur[leaf] = existing + value.value
+        else:
+            cur[leaf] = value.value
+    elif isinstance(value, transforms.Maximum):
+        if isinstance(existing, (int, float)) and not isinstance(existing, bool):
+            cur[leaf] = max(existing, value.value)
+        else:
+            cur[leaf] = value.value
+    elif isinstance(value, transforms.Minimum):
+        if isinstance(existing, (int, float)) and not isinstance(existing, bool):
+            cur[leaf] = min(existing, value.value)
+        else:
+            cur[leaf] = value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        arr = list(existing) if isinstance(existing, list) else []
+        keys = [_value_key(v) for v in arr]
+        for v in value.values:
+            v = _encode(v)
+            k = _value_key(v)
+            if k not in keys:
+                arr.append(copy.deepcopy(v))
+                keys.append(k)
+        cur[leaf] = arr
+    elif isinstance(value, transforms.ArrayRemove):
+        arr = list(existing) if isinstance(existing, list) else []
+        drop = {_value_key(_encode(v)) for v in value.values}
+        cur[leaf] = [v for v in arr if _value_key(v) not in drop]
+    elif isinstance(value, dict):
+        # Nested maps may carry their own sentinels
+        nested = {}
+        for k, v in value.items():
+            _apply_value(nested, [k], v, commit_time)
+        cur[leaf] = nested
+    else:
+        cur[leaf] = copy.deepcopy(_encode(value))
+
+
+def _merge_into(data: dict, incoming: dict, commit_time) -> None:
+    """set(..., merge=True): deep-merge maps, apply transforms at leaves."""
+    for k, v in incoming.items():
+        if isinstance(v, dict) and isinstance(data.get(k), dict):
+            _merge_into(data[k], v, commit_time)
+        else:
+            _apply_value(data, [k], v, commit_time)
+
+
+def _project(data: dict, field_paths) -> dict:
+    if field_paths is None:
+        return data
+    out = {}
+    for fp in field_paths:
+        parts = _split(fp)
+        val = _get_field(data, fp)
+        if val is _MISSING:
+            continue
+        cur = out
+        for part in parts[:-1]:
+            cur = cur.setdefault(part, {})
+        cur[parts[-1]] = val
+    return out
+
+
+class _StoredDoc:
+    __slots__ = ('data', 'create_time', 'update_time', 'version')
+
+    def __init__(self, data: dict, create_time, version: int):
+        self.data = data
+        self.create_time = create_time
+        self.update_time = create_time
+        self.version = version
+
+
+class MemoryDocumentSnapshot:
+    """Mirror of firestore DocumentSnapshot."""
+
+    def __init__(self, reference, data, exists, create_time=None, update_time=None, read_time=None, version=0):
+        self._reference = reference
+        self._data = data
+        self._version = version
+        self.exists = exists
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self._reference.id
+
+    @property
+    def reference(self):
+        return self._reference
+
+    def to_dict(self):
+        if not self.exists:
+            return None
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str):
+        if not self.exists:
+            return None
+        val = _get_field(self._data, field_path)
+        if val is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(val)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client, path: tuple):
+        self._client = client
+        self._path = path
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    @property
+    def path(self) -> str:
+        return '/'.join(self._path)
+
+    @property
+    def parent(self):
+        return MemoryCollectionReference(self._client, self._path[:-1])
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other._path == self._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def __repr__(self):
+        return f"<MemoryDocumentReference {self.path}>"
+
+    def collection(self, collection_id: str):
+        return MemoryCollectionReference(self._client, self._path + (collection_id,))
+
+    def get(self, field_paths=None, transaction=None):
+        self._client._rpc()
+        return self._client._read_doc(self, field_paths=field_paths, transaction=transaction)
+
+    def set(self, document_data: dict, merge=False):
+        batch = self._client.batch()
+        batch.set(self, document_data, merge=merge)
+        return batch.commit()[0]
+
+    def create(self, document_data: dict):
+        batch = self._client.batch()
+        batch.create(self, document_data)
+        return batch.commit()[0]
+
+    def update(self, field_updates: dict):
+        batch = self._client.batch()
+        batch.update(self, field_updates)
+        return batch.commit()[0]
+
+    def delete(self):
+        batch = self._client.batch()
+        batch.delete(self)
+        return batch.commit()[0]
+
+
+class _WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class MemoryQuery:
+    """Immutable query builder mirroring firestore Query (each call returns a new query)."""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client, coll_path: tuple, filters=(), orders=(), limit=None,
+                 offset=0, start=None, end=None, projection=None):
+        self._client = client
+        self._coll_path = coll_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._start = start   # (values_or_snapshot, before: bool)
+        self._end = end       # (values_or_snapshot, before: bool)
+        self._projection = projection
+
+    def _copy(self, **overrides):
+        kwargs = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit, offset=self._offset,
+            start=self._start, end=self._end, projection=self._projection,
+        )
+        kwargs.update(overrides)
+        return MemoryQuery(self._client, self._coll_path, **kwargs)
+
+    # ---- builders ----
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path = filter.field_path
+            op_string = filter.op_string
+            value = filter.value
+        if op_string not in ('==', '!=', '<', '<=', '>', '>=', 'in', 'not-in', 'array-contains', 'array-contains-any'):
+            raise ValueError(f"Operator string {op_string!r} is invalid.")
+        if isinstance(field_path, (list, tuple)):
+            field_path = '.'.join(field_path)
+        return self._copy(filters=self._filters + ((str(field_path), op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        if direction not in (ASCENDING, DESCENDING):
+            raise ValueError(f"Invalid direction {direction!r}.")
+        return self._copy(orders=self._orders + ((str(field_path), direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip: int):
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    # ---- execution ----
+    def _effective_orders(self):
+        orders = list(self._orders)
+        if not orders:
+            # Firestore implicitly orders by the first inequality field
+            for field, op, _ in self._filters:
+                if op in _INEQUALITY_OPS and field != DOCUMENT_ID:
+                    orders.append((field, ASCENDING))
+                    break
+        if not any(f == DOCUMENT_ID for f, _ in orders):
+            last_dir = orders[-1][1] if orders else ASCENDING
+            orders.append((DOCUMENT_ID, last_dir))
+        return orders
+
+    @staticmethod
+    def _field_of(doc_id, data, field):
+        if field == DOCUMENT_ID:
+            return doc_id
+        return _get_field(data, field)
+
+    def _matches(self, doc_id, data) -> bool:
+        for field, op, value in self._filters:
+            actual = self._field_of(doc_id, data, field)
+            if field == DOCUMENT_ID and isinstance(value, MemoryDocumentReference):
+                value = value.id
+            elif field == DOCUMENT_ID and isinstance(value, (list, tuple)):
+                value = [v.id if isinstance(v, MemoryDocumentReference) else v for v in value]
+            if actual is _MISSING:
+                return False
+            akey = _value_key(actual)
+            if op == '==':
+                if akey != _value_key(_encode(value)):
+                    return False
+            elif op == '!=':
+                if actual is None or akey == _value_key(_encode(value)):
+                    return False
+            elif op in ('<', '<=', '>', '>='):
+                vkey = _value_key(_encode(value))
+                if akey[0] != vkey[0]:
+                    return False
+                if op == '<' and not akey < vkey:
+                    return False
+                if op == '<=' and not akey <= vkey:
+                    return False
+                if op == '>' and not akey > vkey:
+                    return False
+                if op == '>=' and not akey >= vkey:
+                    return False
+            elif op == 'in':
+                if akey not in {_value_key(_encode(v)) for v in value}:
+                    return False
+            elif op == 'not-in':
+                if actual is None or akey in {_value_key(_encode(v)) for v in value}:
+                    return False
+            elif op == 'array-contains':
+                if not isinstance(actual, list):
+                    return False
+                if _value_key(_encode(value)) not in {_value_key(v) for v in actual}:
+                    return False
+            elif op == 'array-contains-any':
+                if not isinstance(actual, list):
+                    return False
+                wanted = {_value_key(_encode(v)) for v in value}
+                if not wanted.intersection(_value_key(v) for v in actual):
+                    return False
+        return True
+
+    def _cursor_values(self, cursor, orders):
+        spec, before = cursor
+        if isinstance(spec, MemoryDocumentSnapshot):
+            data = spec._data or {}
+            values = [self._field_of(spec.id, data, f) for f, _ in orders]
+        elif isinstance(spec, dict):
+            values = []
+            for f, _ in orders:
+                v = spec.get(DOCUMENT_ID, _MISSING) if f == DOCUMENT_ID else _get_field(spec, f)
+                if v is _MISSING:
+                    break
+                values.append(v)
+        else:
+            values = list(spec)
+        out = []
+        for v in values:
+            if isinstance(v, MemoryDocumentReference):
+                v = v.id
+            out.append(_value_key(_encode(v)))
+        return out, before
+
+    @staticmethod
+    def _compare_to_cursor(row_keys, cursor_keys, orders) -> int:
+        for i, ck in enumerate(cursor_keys):
+            rk = row_keys[i]
+            if rk == ck:
+                continue
+            less = rk < ck
+            if orders[i][1] == DESCENDING:
+                less = not less
+            return -1 if less else 1
+        return 0
+
+    def _run(self, transaction=None):
+        client = self._client
+        orders = self._effective_orders()
+        rows = []
+        with client._lock:
+            coll = client._collections.get(self._coll_path, {})
+            for doc_id, stored in coll.items():
+                if not self._matches(doc_id, stored.data):
+                    continue
+                keys = []
+                skip = False
+                for field, _ in orders:
+                    val = self._field_of(doc_id, stored.data, field)
+                    if val is _MISSING:
+                        skip = True
+                        break
+                    keys.append(_value_key(val))
+                if skip:
+                    continue
+                rows.append((keys, doc_id, stored))
+            if transaction is not None:
+                for _, doc_id, stored in rows:
+                    transaction._record_read(self._coll_path + (doc_id,), stored.version)
+
+            # Stable multi-key sort honoring per-field direction
+            for idx in range(len(orders) - 1, -1, -1):
+                rows.sort(key=lambda r: r[0][idx], reverse=(orders[idx][1] == DESCENDING))
+
+            if self._start is not None:
+                ckeys, before = self._cursor_values(self._start, orders)
+                kept = []
+                for row in rows:
+                    cmp = self._compare_to_cursor(row[0], ckeys, orders)
+                    if cmp > 0 or (cmp == 0 and before):
+                        kept.append(row)
+                rows = kept
+            if self._end is not None:
+                ckeys, before = self._cursor_values(self._end, orders)
+                kept = []
+                for row in rows:
+                    cmp = self._compare_to_cursor(row[0], ckeys, orders)
+                    if cmp < 0 or (cmp == 0 and not before):
+                        kept.append(row)
+                rows = kept
+
+            if self._offset:
+                rows = rows[self._offset:]
+            if self._limit is not None:
+                rows = rows[:self._limit]
+
+            read_time = _now()
+            snaps = []
+            for _, doc_id, stored in rows:
+                ref = MemoryDocumentReference(client, self._coll_path + (doc_id,))
+                data = _project(stored.data, self._projection)
+                snaps.append(MemoryDocumentSnapshot(
+                    ref, copy.deepcopy(data), True, stored.create_time, stored.update_time, read_time, stored.version
+                ))
+            client._count('documentReads', max(1, len(snaps)))
+        return snaps
+
+    def stream(self, transaction=None):
+        self._client._rpc()
+        for snap in self._run(transaction=transaction):
+            yield snap
+
+    def get(self, transaction=None):
+        self._client._rpc()
+        return self._run(transaction=transaction)
+
+    def on_snapshot(self, callback):
+        """
+        Listen to this query like firestore Query.on_snapshot.
+        callback(docs, changes, read_time) runs once with the initial result set and
+        again after every commit that changes it (synchronously, on the writer's thread).
+        """
+        watch = MemoryWatch(self, callback)
+        self._client._add_watch(watch)
+        watch._refresh()
+        return watch
+
+
+class MemoryWatch:
+    """Listener handle mirroring firestore Watch (unsubscribe / is_active)."""
+
+    def __init__(self, query, callback):
+        self._query = query
+        self._callback = callback
+        self._docs = {}   # id -> (version, snapshot)
+        self._closed = False
+        self._delivered = False
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def is_active(self) -> bool:
+        return not self._closed
+
+    def unsubscribe(self):
+        self.close()
+
+    def close(self, reason=None):
+        self._closed = True
+        self._query._client._remove_watch(self)
+
+    def _refresh(self):
+        if self._closed:
+            return
+        with self._refresh_lock:
+            snaps = self._query._run()
+            current = {s.id: s for s in snaps}
+            changes = []
+            old_ids = list(self._docs.keys())
+            for idx, doc_id in enumerate(old_ids):
+                if doc_id not in current:
+                    changes.append(DocumentChange(ChangeType.REMOVED, self._docs[doc_id][1], idx, -1))
+            for idx, snap in enumerate(snaps):
+                prev = self._docs.get(snap.id)
+                if prev is None:
+                    changes.append(DocumentChange(ChangeType.ADDED, snap, -1, idx))
+                elif prev[0] != snap._version:
+                    changes.append(DocumentChange(ChangeType.MODIFIED, snap, idx, idx))
+            self._docs = {s.id: (s._version, s) for s in snaps}
+            if changes or not self._delivered:
+                self._delivered = True
+                self._callback(snaps, changes, _now())
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client, path: tuple):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._coll_path[-1]
+
+    @property
+    def parent(self):
+        if len(self._coll_path) == 1:
+            return None
+        return MemoryDocumentReference(self._client, self._coll_path[:-1])
+
+    def document(self, document_id: str | None = None):
+        return MemoryDocumentReference(self._client, self._coll_path + (document_id or _auto_id(),))
+
+    def add(self, document_data: dict, document_id: str | None = None):
+        ref = self.document(document_id)
+        result = ref.create(document_data)
+        return result.update_time, ref
+
+    def list_documents(self, page_size=None):
+        with self._client._lock:
+            ids = list(self._client._collections.get(self._coll_path, {}).keys())
+        return [self.document(i) for i in ids]
+
+
+class MemoryWriteBatch:
+    """Buffered writes applied atomically on commit()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference, document_data, merge))
+        return self
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data, False))
+        return self
+
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(('update', reference, field_updates, False))
+        return self
+
+    def delete(self, reference, option=None):
+        self._writes.append(('delete', reference, None, False))
+        return self
+
+    def commit(self, retry=None, timeout=None):
+        self._client._rpc()
+        return self._apply()
+
+    def _apply(self):
+        with self._client._lock:
+            self._check_preconditions()
+            results = self._client._apply_writes(self._writes)
+        touched = {ref._path[:-1] for _, ref, _, _ in self._writes}
+        self._writes = []
+        # Listeners run outside the lock, after the commit is visible
+        self._client._notify_watches(touched)
+        return results
+
+    def _check_preconditions(self):
+        pass
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Optimistic transaction compatible with firestore.transactional.
+    Reads record the document version; commit aborts (and the decorator retries)
+    if any read document changed in the meantime.
+    """
+
+    def __init__(self, client, max_attempts=5, read_only=False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._reads = {}
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    # Hooks called by google.cloud.firestore_v1.transaction._Transactional
+    def _clean_up(self):
+        self._writes = []
+        self._reads = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        if self.in_progress:
+            raise ValueError('Transaction already in progress')
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        if not self.in_progress:
+            raise ValueError('Transaction not in progress')
+        results = self.commit()
+        self._clean_up()
+        return results
+
+    def _record_read(self, path: tuple, version: int):
+        self._reads.setdefault(path, version)
+
+    def _check_preconditions(self):
+        for path, version in self._reads.items():
+            stored = self._client._collections.get(path[:-1], {}).get(path[-1])
+            current = stored.version if stored else 0
+            if current != version:
+                self._client._count('transactionAborts')
+                raise gexc.Aborted(f"Transaction contention on {'/'.join(path)}")
+
+    def get(self, ref_or_query, field_paths=None):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get(field_paths=field_paths, transaction=self)])
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references, field_paths=None):
+        return self._client.get_all(references, field_paths=field_paths, transaction=self)
+
+
+class MemoryBulkWriteFailure:
+    """Argument passed to a BulkWriter on_write_error callback."""
+
+    def __init__(self, operation, error):
+        self.operation = operation
+        self.code = getattr(error, 'code', None)
+        self.message = str(error)
+        self.attempts = 1
+
+
+class MemoryBulkWriter:
+    """
+    firestore BulkWriter surface: writes are queued and sent BATCH_SIZE per RPC, and each
+    write succeeds or fails on its own (no atomicity across writes). Failed writes go to the
+    on_write_error callback; they are not retried.
+    """
+
+    BATCH_SIZE = 20
+
+    def __init__(self, client):
+        self._client = client
+        self._queue = []
+        self._on_error = None
+
+    def on_write_error(self, callback):
+        self._on_error = callback
+
+    def create(self, reference, document_data):
+        self._enqueue(('create', reference, document_data, False))
+
+    def set(self, reference, document_data, merge=False):
+        self._enqueue(('set', reference, document_data, merge))
+
+    def update(self, reference, field_updates, option=None):
+        self._enqueue(('update', reference, field_updates, False))
+
+    def delete(self, reference, option=None):
+        self._enqueue(('delete', reference, None, False))
+
+    def flush(self):
+        while self._queue:
+            self._send()
+
+    def close(self):
+        self.flush()
+
+    def _enqueue(self, write):
+        self._queue.append(write)
+        if len(self._queue) >= self.BATCH_SIZE:
+            self._send()
+
+    def _send(self):
+        chunk, self._queue = self._queue[:self.BATCH_SIZE], self._queue[self.BATCH_SIZE:]
+        self._client._rpc()
+        failures = []
+        with self._client._lock:
+            for write in chunk:
+                try:
+                    self._client._apply_writes([write])
+                except gexc.GoogleAPICallError as e:
+                    failures.append(MemoryBulkWriteFailure(write, e))
+        self._client._notify_watches({ref._path[:-1] for _, ref, _, _ in chunk})
+        for failure in failures:
+            if self._on_error:
+                self._on_error(failure, self)
+
+
+class MemoryClient:
+    """Drop-in replacement for firestore.Client backed by process memory."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self._lock = threading.RLock()
+        self._collections = {}
+        self._version = 0
+        self._latency = max(0.0, float(latency_ms or 0)) / 1000.0
+        self._tokens = {}
+        self._watches = []
+        self.stats = {'rpcs': 0, 'documentReads': 0, 'documentWrites': 0, 'transactionAborts': 0}
+
+    # ---- instrumentation ----
+    def _rpc(self):
+        self._count('rpcs')
+        if self._latency:
+            time.sleep(self._latency)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self.stats:
+                self.stats[k] = 0
+
+    def _add_watch(self, watch):
+        with self._lock:
+            self._watches.append(watch)
+
+    def _remove_watch(self, watch):
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify_watches(self, coll_paths):
+        with self._lock:
+            watches = [w for w in self._watches if w._query._coll_path in coll_paths]
+        for watch in watches:
+            watch._refresh()
+
+    def reset(self):
+        """Drop all data (handy between benchmark runs)."""
+        with self._lock:
+            self._collections.clear()
+            self._tokens.clear()
+        self.reset_stats()
+
+    # ---- client surface ----
+    def collection(self, collection_path: str):
+        return MemoryCollectionReference(self, tuple(collection_path.strip('/').split('/')))
+
+    def document(self, document_path: str):
+        return MemoryDocumentReference(self, tuple(document_path.strip('/').split('/')))
+
+    def collections(self):
+        with self._lock:
+            roots = sorted({p[0] for p in self._collections if len(p) == 1})
+        return [self.collection(c) for c in roots]
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def bulk_writer(self, options=None):
+        return MemoryBulkWriter(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        refs = list(references)
+        self._rpc()
+        for ref in refs:
+            yield self._read_doc(ref, field_paths=field_paths, transaction=transaction)
+
+    def close(self):
+        pass
+
+    # ---- internals ----
+    def _read_doc(self, ref, field_paths=None, transaction=None):
+        path = ref._path
+        with self._lock:
+            stored = self._collections.get(path[:-1], {}).get(path[-1])
+            if transaction is not None:
+                transaction._record_read(path, stored.version if stored else 0)
+            self._count('documentReads')
+            if stored is None:
+                return MemoryDocumentSnapshot(ref, None, False, read_time=_now())
+            data = copy.deepcopy(_project(stored.data, field_paths))
+            return MemoryDocumentSnapshot(ref, data, True, stored.create_time, stored.update_time, _now())
+
+    def _apply_writes(self, writes):
+        """Apply a list of buffered writes atomically. Caller holds the lock."""
+        commit_time = _now()
+        staged = {}
+
+        def _load(path):
+            if path in staged:
+                return staged[path]
+            stored = self._collections.get(path[:-1], {}).get(path[-1])
+            staged[path] = (copy.deepcopy(stored.data), stored.create_time) if stored else None
+            return staged[path]
+
+        for kind, ref, payload, merge in writes:
+            path = ref._path
+            current = _load(path)
+            if kind == 'delete':
+                staged[path] = None
+                continue
+            if kind == 'create' and current is not None:
+                raise gexc.AlreadyExists(f"Document already exists: {ref.path}")
+            if kind == 'update' and current is None:
+                raise gexc.NotFound(f"No document to update: {ref.path}")
+
+            if current is None or (kind == 'set' and not merge):
+                data = {}
+                create_time = current[1] if current else commit_time
+            else:
+                data, create_time = current
+
+            if kind == 'update':
+                for fp, value in (payload or {}).items():
+                    _apply_value(data, _split(fp), value, commit_time)
+            elif kind == 'set' and merge:
+                _merge_into(data, payload or {}, commit_time)
+            else:
+                for k, value in (payload or {}).items():
+                    _apply_value(data, [k], value, commit_time)
+            staged[path] = (data, create_time)
+
+        for path, entry in staged.items():
+            coll = self._collections.setdefault(path[:-1], {})
+            if entry is None:
+                coll.pop(path[-1], None)
+                continue
+            self._version += 1
+            stored = coll.get(path[-1])
+            if stored is None:
+                coll[path[-1]] = _StoredDoc(entry[0], entry[1], self._version)
+                coll[path[-1]].update_time = commit_time
+            else:
+                stored.data = entry[0]
+                stored.update_time = commit_time
+                stored.version = self._version
+        self._count('documentWrites', len(writes))
+        return [_WriteResult(commit_time) for _ in writes]
+
+    # ---- auth stand-in ----
+    def issue_token(self, uid: str, claims: dict | None = None, ttl_seconds: int = 3600) -> str:
+        """
+        Mint an opaque ID token for uid (memory backend only).
+        verify_token() returns a decoded-claims dict shaped like auth.verify_id_token output.
+        """
+        token = f"memory.{uuid.uuid4().hex}"
+        decoded = dict(claims or {})
+        decoded.update({'uid': uid, 'sub': uid, 'exp': int(time.time()) + int(ttl_seconds)})
+        with self._lock:
+            self._tokens[token] = decoded
+        return token
+
+    def verify_token(self, id_token: str) -> dict:
+        with self._lock:
+            decoded = self._tokens.get(id_token)
+        if not decoded or decoded.get('exp', 0) <= time.time():
+            raise ValueError('Invalid or expired token')
+        return dict(decoded)
+
+    def load_seed(self, seed: dict) -> None:
+        """Load {collection: {docId: data}} into the store."""
+        batch = self.batch()
+        for coll_name, docs in (seed or {}).items():
+            for doc_id, data in (docs or {}).items():
+                batch.set(self.collection(coll_name).document(doc_id), data)
+        batch.commit()
+
+
+# ---- firestore.AsyncClient surface ----
+
+def _unwrap(obj):
+    """Sync counterpart of an async wrapper (refs/transactions may come from either client)."""
+    return getattr(obj, '_sync', obj) if obj is not None else None
+
+
+class AsyncMemoryQuery:
+    _BUILDERS = ('where', 'order_by', 'limit', 'offset', 'select',
+                 'start_at', 'start_after', 'end_before', 'end_at')
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client, query):
+        self._client = client
+        self._sync = query
+
+    def __getattr__(self, name):
+        if name not in self._BUILDERS:
+            raise AttributeError(name)
+        method = getattr(self._sync, name)
+
+        def _build(*args, **kwargs):
+            return AsyncMemoryQuery(self._client, method(*args, **kwargs))
+        return _build
+
+    async def stream(self, transaction=None):
+        await self._client._rpc()
+        for snap in self._sync._run(transaction=_unwrap(transaction)):
+            yield snap
+
+    async def get(self, transaction=None):
+        return [snap async for snap in self.stream(transaction=transaction)]
+
+
+class AsyncMemoryCollectionReference(AsyncMemoryQuery):
+    @property
+    def id(self) -> str:
+        return self._sync.id
+
+    def document(self, document_id: str | None = None):
+        return AsyncMemoryDocumentReference(self._client, self._sync.document(document_id))
+
+    async def add(self, document_data: dict, document_id: str | None = None):
+        ref = self.document(document_id)
+        result = await ref.create(document_data)
+        return result.update_time, ref
+
+
+class AsyncMemoryDocumentReference:
+    def __init__(self, client, ref):
+        self._client = client
+        self._sync = ref
+
+    @property
+    def id(self) -> str:
+        return self._sync.id
+
+    @property
+    def path(self) -> str:
+        return self._sync.path
+
+    @property
+    def _path(self) -> tuple:
+        return self._sync._path
+
+    def collection(self, collection_id: str):
+        return AsyncMemoryCollectionReference(self._client, self._sync.collection(collection_id))
+
+    async def get(self, field_paths=None, transaction=None):
+        await self._client._rpc()
+        return self._client._sync._read_doc(
+            self._sync, field_paths=field_paths, transaction=_unwrap(transaction)
+        )
+
+    async def _write(self, kind, *args):
+        batch = self._client.batch()
+        getattr(batch, kind)(self, *args)
+        return (await batch.commit())[0]
+
+    async def set(self, document_data: dict, merge=False):
+        return await self._write('set', document_data, merge)
+
+    async def create(self, document_data: dict):
+        return await self._write('create', document_data)
+
+    async def update(self, field_updates: dict):
+        return await self._write('update', field_updates)
+
+    async def delete(self):
+        return await self._write('delete')
+
+
+class AsyncMemoryWriteBatch:
+    def __init__(self, client, batch):
+        self._client = client
+        self._sync = batch
+
+    def __len__(self):
+        return len(self._sync)
+
+    def set(self, reference, document_data, merge=False):
+        self._sync.set(_unwrap(reference), document_data, merge=merge)
+        return self
+
+    def create(self, reference, document_data):
+        self._sync.create(_unwrap(reference), document_data)
+        return self
+
+    def update(self, reference, field_updates, option=None):
+        self._sync.update(_unwrap(reference), field_updates)
+        return self
+
+    def delete(self, reference, option=None):
+        self._sync.delete(_unwrap(reference))
+        return self
+
+    async def commit(self, retry=None, timeout=None):
+        await self._client._rpc()
+        return self._sync._apply()
+
+
+class AsyncMemoryTransaction(AsyncMemoryWriteBatch):
+    """Async wrapper of MemoryTransaction compatible with firestore.async_transactional."""
+
+    @property
+    def _max_attempts(self):
+        return self._sync._max_attempts
+
+    @property
+    def _read_only(self):
+        return self._sync._read_only
+
+    @property
+    def _id(self):
+        return self._sync._id
+
+    @property
+    def in_progress(self):
+        return self._sync.in_progress
+
+    def _clean_up(self):
+        self._sync._clean_up()
+
+    async def _begin(self, retry_id=None):
+        self._sync._begin(retry_id=retry_id)
+
+    async def _rollback(self):
+        self._sync._rollback()
+
+    async def _commit(self):
+        if not self.in_progress:
+            raise ValueError('Transaction not in progress')
+        results = await self.commit()
+        self._sync._clean_up()
+        return results
+
+    async def get_all(self, references, field_paths=None):
+        return self._client.get_all(references, field_paths=field_paths, transaction=self)
+
+
+class AsyncMemoryClient:
+    """
+    firestore.AsyncClient-shaped facade over a MemoryClient (same data, stats and tokens).
+    Simulated latency is awaited, so concurrent requests overlap like real RPCs.
+    """
+
+    def __init__(self, client: MemoryClient):
+        self._sync = client
+
+    @property
+    def stats(self) -> dict:
+        return self._sync.stats
+
+    async def _rpc(self):
+        self._sync._count('rpcs')
+        if self._sync._latency:
+            await asyncio.sleep(self._sync._latency)
+
+    def collection(self, collection_path: str):
+        return AsyncMemoryCollectionReference(self, self._sync.collection(collection_path))
+
+    def document(self, document_path: str):
+        return AsyncMemoryDocumentReference(self, self._sync.document(document_path))
+
+    def batch(self):
+        return AsyncMemoryWriteBatch(self, self._sync.batch())
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return AsyncMemoryTransaction(self, self._sync.transaction(max_attempts=max_attempts, read_only=read_only))
+
+    async def get_all(self, references, field_paths=None, transaction=None):
+        refs = [_unwrap(r) for r in references]
+        txn = _unwrap(transaction)
+        await self._rpc()
+        for ref in refs:
+            yield self._sync._read_doc(ref, field_paths=field_paths, transaction=txn)
+
+    def close(self):
+        pass
+
+
+def create_memory_client() -> MemoryClient:
+    """Build a MemoryClient configured from NEMO_MEMORY_* env vars."""
+    try:
+        latency_ms = float(os.getenv('NEMO_MEMORY_LATENCY_MS', '0') or 0)
+    except ValueError:
+        latency_ms = 0.0
+    client = MemoryClient(latency_ms=latency_ms)
+    seed_path = os.getenv('NEMO_MEMORY_SEED')
+    if seed_path:
+        with open(seed_path, 'r', encoding='utf-8') as f:
+            client.load_seed(json.load(f))
+    return client
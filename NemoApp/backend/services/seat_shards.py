@@ -0,0 +1,226 @@
+import os
+import random
+import time
+from services.firebase_service import db
+from services.batch_get import get_many
+from services.event_catalog import get_event_catalog
+from utils.transactions import transactional
+
+# Opt-in distributed seat counters for high-demand events.
+#
+# An event created with seatShards=N (2..SEAT_SHARDS_MAX) splits maxParticipants across
+#   events/{id}/seatShards/{0..N-1}   {capacity, taken}
+# and each booker's attendee doc (services/attendance.py) also records which shards hold
+# their seats ({shards: {k: seats}}). Booking transactions read that attendee doc and start at
+# a random shard (moving on to the next ones only while seats are still needed), so concurrent
+# bookings mostly write different documents and never write the event document (they only read
+# its status, so an admin cancel/delete job forces in-flight bookings to retry). Every shard
+# enforces taken <= capacity, and capacities sum to maxParticipants, so the event can never be
+# overbooked.
+#
+# currentParticipants/availableSlots on the event document are a rollup of the shards, refreshed
+# at most every ROLLUP_INTERVAL seconds after bookings/cancellations; GET /api/events/<id>
+# aggregates the shards live. The rollup re-checks seatTotalsAt in a transaction, so a burst of
+# bookings writes the event document once per interval and rollups cannot land out of order.
+
+SEAT_SHARDS_MAX = 50
+SHARDS_COLLECTION = 'seatShards'
+ROLLUP_INTERVAL = float(os.getenv('NEMO_SEAT_ROLLUP_SECONDS', '2') or 2)
+# Event fields that choose how a bulk booking writes each event (read before its transactions)
+BOOKING_MODE_FIELDS = ['seatShards', 'admissionQueue']
+
+# event id -> seatShards for sharded events this process has read (see known_seat_mode)
+_sharded_events = {}
+
+
+def shard_count(event: dict) -> int:
+    """Number of seat shards for an event document (0 when it uses the single-document counter)."""
+    try:
+        n = int(event.get('seatShards') or 0)
+    except (TypeError, ValueError):
+        return 0
+    return n if n > 1 else 0
+
+
+def split_capacity(total: int, n: int) -> list:
+    """Spread total seats over n shards (sizes differ by at most one)."""
+    base, extra = divmod(max(0, int(total)), n)
+    return [base + (1 if i < extra else 0) for i in range(n)]
+
+
+def _shard_ref(event_ref, k):
+    return event_ref.collection(SHARDS_COLLECTION).document(str(k))
+
+
+def init_seat_shards(writer, event_ref, max_participants: int, n: int) -> None:
+    """Create the n shard documents with a batch or transaction."""
+    for k, capacity in enumerate(split_capacity(max_participants, n)):
+        writer.set(_shard_ref(event_ref, k), {'capacity': capacity, 'taken': 0})
+
+
+def allocate_seats(txn, event_ref, n: int, seats: int) -> dict:
+    """
+    Claim `seats` seats inside a transaction, starting at a random shard.
+    Returns {shard_key: seats_taken}; raises ValueError when the shards cannot cover the request.
+    Performs all of its reads before its writes (callers must do their own reads first).
+    """
+    start = random.randrange(n)
+    plan = {}
+    remaining = seats
+    free_total = 0
+    for i in range(n):
+        k = (start + i) % n
+        data = _shard_ref(event_ref, k).get(transaction=txn).to_dict() or {}
+        capacity = int(data.get('capacity', 0) or 0)
+        taken = int(data.get('taken', 0) or 0)
+        free = max(0, capacity - taken)
+        free_total += free
+        if free and remaining:
+            take = min(free, remaining)
+            plan[k] = (taken, take)
+            remaining -= take
+        if not remaining:
+            break
+    if remaining:
+        if free_total <= 0:
+            raise ValueError('Event is full')
+        raise ValueError(f'Only {free_total} spots available')
+
+    for k, (taken, take) in plan.items():
+        txn.update(_shard_ref(event_ref, k), {'taken': taken + take})
+    return {str(k): take for k, (_, take) in plan.items()}
+
+
+def release_seats(txn, event_ref, allocation: dict, seats: int) -> dict:
+    """
+    Return `seats` seats from an attendee's allocation ({shard_key: seats}) inside a transaction.
+    Returns the remaining allocation. Reads all affected shards before writing.
+    """
+    plan = {}
+    remaining = seats
+    for k, held in sorted((allocation or {}).items()):
+        if not remaining:
+            break
+        give = min(int(held or 0), remaining)
+        if give > 0:
+            plan[k] = give
+            remaining -= give
+
+    current = {k: (_shard_ref(event_ref, k).get(transaction=txn).to_dict() or {}) for k in plan}
+    for k, give in plan.items():
+        taken = int(current[k].get('taken', 0) or 0)
+        txn.update(_shard_ref(event_ref, k), {'taken': max(0, taken - give)})
+
+    left = {}
+    for k, held in (allocation or {}).items():
+        rest = int(held or 0) - plan.get(k, 0)
+        if rest > 0:
+            left[k] = rest
+    return left
+
+
+def resize_seat_shards(txn, event_ref, n: int, new_max: int) -> int:
+    """
+    Redistribute capacity for a new maxParticipants inside a transaction, keeping every shard's
+    capacity >= its taken seats. Returns total taken; raises ValueError if new_max is too small.
+    """
+    shards = [(_shard_ref(event_ref, k), _shard_ref(event_ref, k).get(transaction=txn).to_dict() or {}) for k in range(n)]
+    taken = [int(d.get('taken', 0) or 0) for _, d in shards]
+    total_taken = sum(taken)
+    if new_max < total_taken:
+        raise ValueError(f"maxParticipants cannot be less than currentParticipants ({total_taken})")
+    spare = split_capacity(new_max - total_taken, n)
+    for (ref, _), t, extra in zip(shards, taken, spare):
+        txn.set(ref, {'capacity': t + extra, 'taken': t})
+    return total_taken
+
+
+def seat_totals(event_ref) -> tuple:
+    """(taken, capacity) summed over an event's shards (one query)."""
+    taken = capacity = 0
+    for snap in event_ref.collection(SHARDS_COLLECTION).stream():
+        d = snap.to_dict() or {}
+        taken += int(d.get('taken', 0) or 0)
+        capacity += int(d.get('capacity', 0) or 0)
+    return taken, capacity
+
+
+def _rollup_due(event: dict, force: bool) -> bool:
+    last = event.get('seatTotalsAt')
+    return force or not isinstance(last, (int, float)) or time.time() - last >= ROLLUP_INTERVAL
+
+
+def rollup_seat_totals(event_ref, event: dict, force: bool = False) -> bool:
+    """
+    Copy shard totals into the event's currentParticipants/availableSlots, unless the last rollup
+    (seatTotalsAt, epoch seconds) is newer than ROLLUP_INTERVAL. `event` (the caller's possibly
+    stale snapshot) only short-cuts the check; seatTotalsAt is re-read in the transaction, so
+    concurrent callers write once and a slower rollup never overwrites a newer one.
+    Best-effort; returns True if written.
+    """
+    if not _rollup_due(event, force):
+        return False
+    transaction = db.transaction()
+
+    @transactional('seat_shards.rollup')
+    def _txn(transaction):
+        snap = event_ref.get(field_paths=['seatTotalsAt'], transaction=transaction)
+        if not snap.exists or not _rollup_due(snap.to_dict() or {}, force):
+            return False
+        taken, capacity = seat_totals(event_ref)
+        transaction.update(event_ref, {
+            'currentParticipants': taken,
+            'availableSlots': max(0, capacity - taken),
+            'seatTotalsAt': time.time(),
+        })
+        return True
+
+    return _txn(transaction)
+
+
+def known_seat_mode(event_id: str):
+    """
+    (shard_count, fields) for an event without a read, or None when it is not known here: the
+    live catalog has every field; otherwise only events seen to be sharded are remembered
+    (seatShards is fixed at creation, while admissionQueue can be toggled).
+    """
+    catalog = get_event_catalog()
+    if catalog is not None and catalog.is_live():
+        data = catalog.get(event_id)
+        if data is not None:
+            return shard_count(data), data
+    n = _sharded_events.get(event_id)
+    return (n, {}) if n else None
+
+
+def remember_seat_mode(event_id: str, event: dict) -> None:
+    """Record a sharded event's shard count for known_seat_mode (called wherever an event is read)."""
+    n = shard_count(event)
+    if n:
+        _sharded_events[event_id] = n
+
+
+def get_seat_modes(event_ids) -> dict:
+    """
+    {event_id: (shard_count, fields)} for the events that exist, to route a bulk booking.
+    Events known_seat_mode cannot answer are read together with one chunked get_all.
+    """
+    out, missing = {}, []
+    for event_id in dict.fromkeys(event_ids):
+        mode = known_seat_mode(event_id)
+        if mode is None:
+            missing.append(event_id)
+        else:
+            out[event_id] = mode
+    for event_id, data in get_many(db, 'events', missing, field_paths=BOOKING_MODE_FIELDS).items():
+        remember_seat_mode(event_id, data)
+        out[event_id] = (shard_count(data), data)
+    return out
+
+
+def rollup_after_write(event_ref, event: dict) -> None:
+    """Rate-limited rollup after a committed sharded booking/cancellation; failures only delay it."""
+    try:
+        rollup_seat_totals(event_ref, event)
+    except Exception:
+        pass
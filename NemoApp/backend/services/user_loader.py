@@ -0,0 +1,78 @@
+from flask import g, has_request_context
+from services.firebase_service import db
+from services.batch_get import GET_ALL_CHUNK_SIZE, get_many, get_many_async
+
+# Request-scoped, DataLoader-style batching for users/{uid} display lookups.
+# Handlers queue the uids they need (prime), then read them (load/load_many);
+# pending uids are deduped and fetched with one chunked get_all, and results
+# (including misses) are memoized for the rest of the request.
+
+# Fields needed to render a user anywhere in the API (friends, requests, suggestions)
+USER_DISPLAY_FIELDS = ['fullName', 'name', 'phoneNumber', 'profilePicture']
+
+
+class UserLoader:
+    def __init__(self, client=None, field_paths=None, chunk_size: int = GET_ALL_CHUNK_SIZE):
+        self._client = client or db
+        self._field_paths = list(field_paths) if field_paths is not None else list(USER_DISPLAY_FIELDS)
+        self._chunk_size = max(1, int(chunk_size))
+        self._cache = {}      # uid -> dict | None (None = not found)
+        self._pending = []    # uids queued for the next dispatch
+        self.batches = 0      # number of get_all round trips issued
+
+    def prime(self, uids) -> 'UserLoader':
+        """Queue uids for the next batched fetch (no I/O)."""
+        for uid in uids:
+            if uid and uid not in self._cache and uid not in self._pending:
+                self._pending.append(uid)
+        return self
+
+    def dispatch(self) -> None:
+        """Fetch all queued uids in chunked get_all calls."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += -(-len(pending) // self._chunk_size)
+        found = get_many(self._client, 'users', pending, field_paths=self._field_paths, chunk_size=self._chunk_size)
+        for uid in pending:
+            self._cache[uid] = found.get(uid)
+
+    def load_many(self, uids) -> dict:
+        """Return {uid: data} for the uids that exist, fetching any uncached ones in one dispatch."""
+        uids = [u for u in uids if u]
+        self.prime(uids)
+        if self._pending:
+            self.dispatch()
+        return {uid: self._cache[uid] for uid in uids if self._cache.get(uid) is not None}
+
+    def load(self, uid: str) -> dict | None:
+        if not uid:
+            return None
+        return self.load_many([uid]).get(uid)
+
+    def clear(self, uid: str | None = None) -> None:
+        """Forget a cached uid (or everything) after a write in the same request."""
+        if uid is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(uid, None)
+
+
+def get_user_loader() -> UserLoader:
+    """Return the UserLoader bound to the current Flask request (created on first use)."""
+    if not has_request_context():
+        return UserLoader()
+    loader = g.get('user_loader')
+    if loader is None:
+        loader = UserLoader()
+        g.user_loader = loader
+    return loader
+
+
+async def load_users_async(client, uids, field_paths=None, chunk_size: int = GET_ALL_CHUNK_SIZE) -> dict:
+    """
+    Async counterpart of UserLoader.load_many for the async app: {uid: data} for existing users.
+    Chunked get_all calls are issued concurrently with asyncio.gather.
+    """
+    field_paths = list(field_paths) if field_paths is not None else list(USER_DISPLAY_FIELDS)
+    return await get_many_async(client, 'users', uids, field_paths=field_paths, chunk_size=chunk_size)
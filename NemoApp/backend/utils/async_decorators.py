@@ -0,0 +1,100 @@
+import asyncio
+from functools import wraps
+from google.api_core import exceptions as gexc
+from utils.transactions import async_transactional
+from quart import current_app, request, jsonify, make_response
+from services.firebase_service import get_async_db
+from utils.decorators import token_cache, _verify_token_cached
+from utils import idempotency
+
+# Quart counterparts of utils/decorators.py for the async app (async_app.py).
+# Token verification shares the same verified-token cache; a miss is verified in a worker
+# thread so certificate fetches / signature checks never block the event loop.
+
+def _get_bearer_token() -> str | None:
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.replace('Bearer ', '', 1).strip() or None
+
+def require_auth_async(func):
+    """
+    Async require_auth: injects current_user (uid) as the first argument.
+    Usage:
+        @require_auth_async
+        async def my_route(current_user): ...
+    """
+    @wraps(func)
+    async def _wrapper(*args, **kwargs):
+        token = _get_bearer_token()
+        if not token:
+            return jsonify({'success': False, 'error': 'Missing or invalid Authorization header'}), 401
+
+        claims = token_cache.get(token)
+        if claims is None:
+            claims = await asyncio.to_thread(_verify_token_cached, token)
+        if not claims:
+            return jsonify({'success': False, 'error': 'Invalid or expired token'}), 401
+
+        return await func(claims['uid'], *args, **kwargs)
+    return _wrapper
+
+async def _reserve_async(ref, scope: str, uid: str, fp: str):
+    """Async utils.idempotency.reserve: create, else re-reserve an expired record in a transaction."""
+    try:
+        await ref.create(idempotency.new_record(scope, uid, fp))
+        return 'reserved', None
+    except gexc.AlreadyExists:
+        pass
+
+    transaction = get_async_db().transaction()
+
+    @async_transactional('idempotency.reserve')
+    async def _txn(transaction):
+        snap = await ref.get(transaction=transaction)
+        outcome = idempotency.reserve_outcome(snap, fp)
+        if outcome != 'expired':
+            return outcome, snap.to_dict()
+        transaction.set(ref, idempotency.new_record(scope, uid, fp))
+        return 'reserved', None
+
+    return await _txn(transaction)
+
+def idempotent_async(scope: str):
+    """Async utils.idempotency.idempotent (same records, so sync and async workers share keys)."""
+    def _decorate(func):
+        @wraps(func)
+        async def _wrapper(current_user, *args, **kwargs):
+            key = request.headers.get(idempotency.IDEMPOTENCY_HEADER)
+            ok, err = idempotency.validate_key(key)
+            if not ok:
+                return jsonify({'success': False, 'error': err}), 400
+            if key is None:
+                return await func(current_user, *args, **kwargs)
+
+            fp = idempotency.fingerprint(await request.get_data(cache=True))
+            ref = get_async_db().collection(idempotency.COLLECTION).document(
+                idempotency.record_id(scope, current_user, key)
+            )
+            outcome, record = await _reserve_async(ref, scope, current_user, fp)
+            if outcome == 'replay':
+                resp = current_app.response_class(record.get('body') or '', status=int(record.get('status') or 200),
+                                                  mimetype=record.get('mimetype') or 'application/json')
+                resp.headers[idempotency.REPLAYED_HEADER] = 'true'
+                return resp
+            if outcome != 'reserved':
+                payload, code = idempotency.rejection(outcome)
+                return jsonify(payload), code
+
+            try:
+                resp = await make_response(await func(current_user, *args, **kwargs))
+            except Exception:
+                await ref.delete()
+                raise
+            if resp.status_code >= 500:
+                await ref.delete()
+            else:
+                await ref.update(idempotency.stored_result(resp.status_code, await resp.get_data(as_text=True), resp.mimetype))
+            return resp
+        return _wrapper
+    return _decorate
@@ -0,0 +1,98 @@
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Negotiated response compression (br when the brotli package is installed, else gzip).
+#
+# Env:
+#   NEMO_COMPRESSION=0            disable
+#   NEMO_COMPRESS_MIN_BYTES=1024  smaller bodies are sent as-is (compression would not pay off)
+#   NEMO_COMPRESS_LEVEL=6         gzip level; brotli uses BROTLI_QUALITY (tuned for dynamic responses)
+
+COMPRESSION_ENABLED = (os.getenv('NEMO_COMPRESSION', '1') or '1').strip().lower() in ('1', 'true', 'yes', 'on')
+MIN_BYTES = int(os.getenv('NEMO_COMPRESS_MIN_BYTES', '1024') or 1024)
+GZIP_LEVEL = int(os.getenv('NEMO_COMPRESS_LEVEL', '6') or 6)
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def available_encodings() -> tuple:
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings) -> str | None:
+    """Best supported coding from the request's Accept-Encoding (server preference on ties)."""
+    best, best_q = None, 0
+    for coding in available_encodings():
+        q = accept_encodings[coding]
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _compressible(response) -> bool:
+    return not (
+        response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def _encode_response(response, data: bytes, encoding: str) -> None:
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ per coding, so a strong validator becomes weak
+    # (If-None-Match uses weak comparison, so existing client ETags still match).
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _compress_response(response):
+    response.vary.add('Accept-Encoding')
+    if not _compressible(response) or response.direct_passthrough or response.is_streamed:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) >= MIN_BYTES:
+        _encode_response(response, data, encoding)
+    return response
+
+
+def init_compression(app) -> None:
+    if COMPRESSION_ENABLED:
+        app.after_request(_compress_response)
+
+
+def init_async_compression(app) -> None:
+    """Same policy for the Quart app (async_app.py), whose request/response bodies are awaited."""
+    if not COMPRESSION_ENABLED:
+        return
+    from quart import request as async_request
+
+    async def _compress_async_response(response):
+        response.vary.add('Accept-Encoding')
+        if not _compressible(response):
+            return response
+        encoding = choose_encoding(async_request.accept_encodings)
+        if encoding is None:
+            return response
+        data = await response.get_data()
+        if len(data) >= MIN_BYTES:
+            _encode_response(response, data, encoding)
+        return response
+
+    app.after_request(_compress_async_response)
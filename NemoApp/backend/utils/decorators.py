@@ -1,6 +1,19 @@
+import os
 from functools import wraps
 from flask import request, jsonify
 from services.firebase_service import FirebaseService, db
+from utils.token_cache import TokenCache
+from utils.role_cache import role_cache
+
+# Verified-token cache: skips signature verification for repeat tokens until their `exp`.
+# NEMO_TOKEN_CACHE_SIZE=0 disables it.
+token_cache = TokenCache(max_size=int(os.getenv('NEMO_TOKEN_CACHE_SIZE', '1024') or 0))
+
+# Where require_admin reads the role from:
+#   - firestore (default): users/{uid}.role, cached for NEMO_ROLE_CACHE_TTL seconds
+#     (admin grants only NEMO_ROLE_CACHE_ADMIN_TTL; see utils/role_cache.py)
+#   - claim: the `admin` custom claim on the ID token (no datastore read)
+ADMIN_ROLE_SOURCE = (os.getenv('NEMO_ADMIN_ROLE_SOURCE', 'firestore') or 'firestore').strip().lower()
 
 def _get_bearer_token() -> str | None:
     """Extract 'Bearer <token>' from Authorization header."""
@@ -9,6 +22,32 @@ def _get_bearer_token() -> str | None:
         return None
     return auth_header.replace('Bearer ', '', 1).strip() or None
 
+def _verify_token_cached(token: str) -> dict | None:
+    """Return decoded claims for token (from cache when possible), or None if invalid."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = FirebaseService.decode_token(token)
+    except Exception:
+        return None
+    if not claims or not claims.get('uid'):
+        return None
+    token_cache.put(token, claims)
+    return claims
+
+def _is_admin(uid: str, claims: dict) -> bool:
+    """Resolve admin role from the token's custom claim or the (cached) Firestore user doc."""
+    if ADMIN_ROLE_SOURCE == 'claim':
+        return claims.get('admin') is True or claims.get('role') == 'admin'
+
+    role = role_cache.get(uid)
+    if role is None:
+        user_doc = db.collection('users').document(uid).get(field_paths=['role'])
+        role = ((user_doc.to_dict() or {}).get('role') if user_doc.exists else '') or ''
+        role_cache.put(uid, role)
+    return role == 'admin'
+
 def require_auth(func):
     """
     Decorator to require a valid Firebase ID token.
@@ -23,9 +62,10 @@ def require_auth(func):
         if not token:
             return jsonify({'success': False, 'error': 'Missing or invalid Authorization header'}), 401
 
-        uid = FirebaseService.verify_token(token)
-        if not uid:
+        claims = _verify_token_cached(token)
+        if not claims:
             return jsonify({'success': False, 'error': 'Invalid or expired token'}), 401
+        uid = claims['uid']
 
         return func(uid, *args, **kwargs)
     return _wrapper
@@ -41,13 +81,13 @@ def require_admin(func):
         if not token:
             return jsonify({'success': False, 'error': 'Missing or invalid Authorization header'}), 401
 
-        uid = FirebaseService.verify_token(token)
-        if not uid:
+        claims = _verify_token_cached(token)
+        if not claims:
             return jsonify({'success': False, 'error': 'Invalid or expired token'}), 401
+        uid = claims['uid']
 
-        # Check admin role in Firestore users collection
-        user_doc = db.collection('users').document(uid).get()
-        if not user_doc.exists or user_doc.to_dict().get('role') != 'admin':
+        # Check admin role (custom claim or cached Firestore users/{uid}.role)
+        if not _is_admin(uid, claims):
             return jsonify({'success': False, 'error': 'Admin access required'}), 403
 
         return func(uid, *args, **kwargs)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from utils.validators import derive_timing_bucket, validate_hhmm_time
+
+# Derived event fields persisted at write time (create/update/booking transactions)
+# so that reads can return stored documents as-is.
+DERIVED_EVENT_FIELDS = ("startTime", "timing", "availableSlots", "startTimestamp")
+
+
+def combine_date_time(date_str: Any, time_str: Any) -> datetime | None:
+    """Combine 'YYYY-MM-DD' and 'HH:MM' into a naive UTC datetime, or None if parsing fails."""
+    try:
+        return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    except Exception:
+        return None
+
+
+def compute_start_timestamp(date_str: Any, start_hhmm: Any) -> int | None:
+    """Epoch seconds for 'YYYY-MM-DD' + 'HH:MM' (naive UTC, like the rest of the backend), or None."""
+    dt = combine_date_time(date_str, start_hhmm)
+    if dt is None:
+        return None
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def compute_available_slots(max_participants: Any, current_participants: Any) -> int | None:
+    try:
+        return max(0, int(max_participants or 0) - int(current_participants or 0))
+    except Exception:
+        return None
+
+
+def derive_event_fields(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the derived fields for an event document:
+      - startTime: legacy 'time' fallback when startTime is missing
+      - timing: bucket from startTime when missing
+      - availableSlots: maxParticipants - currentParticipants (>= 0)
+      - startTimestamp: epoch seconds of date + startTime
+    Fields that cannot be derived are omitted (existing values are kept by callers).
+    """
+    out: Dict[str, Any] = {}
+
+    start = event.get("startTime")
+    if not start and isinstance(event.get("time"), str):
+        start = event.get("time")
+        out["startTime"] = start
+
+    if not event.get("timing") and isinstance(start, str):
+        ok, _ = validate_hhmm_time(start, "startTime")
+        if ok:
+            out["timing"] = derive_timing_bucket(start)
+
+    slots = compute_available_slots(event.get("maxParticipants"), event.get("currentParticipants"))
+    if slots is not None:
+        out["availableSlots"] = slots
+
+    ts = compute_start_timestamp(event.get("date"), start)
+    if ts is not None:
+        out["startTimestamp"] = ts
+
+    return out
+
+
+def has_derived_fields(event: Dict[str, Any]) -> bool:
+    """True when a stored event already carries every derived field (no read-time work needed)."""
+    return all(k in event for k in DERIVED_EVENT_FIELDS)
@@ -0,0 +1,44 @@
+import hashlib
+from flask import current_app, jsonify, request
+from werkzeug.http import generate_etag
+
+# Conditional GET helpers (ETag / If-None-Match) for read-mostly JSON endpoints.
+#
+# Responses may be stored by browsers/proxies but must be revalidated on every use, so
+# polling clients get a bodyless 304 whenever nothing changed.
+
+CACHE_CONTROL = 'public, no-cache'
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag value from the given parts (e.g. a version token and the request shape)."""
+    raw = '|'.join(str(p) for p in parts).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def body_etag(body: bytes) -> str:
+    """ETag derived from a response body (werkzeug's add_etag hash), shared by the sync and async apps."""
+    return generate_etag(body)
+
+
+def not_modified(etag: str):
+    """Return a 304 response when the request's If-None-Match matches etag, else None.
+    Lets handlers skip building the body entirely when the version is known up front."""
+    if not etag or not request.if_none_match.contains_weak(etag):
+        return None
+    resp = current_app.response_class(status=304)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_CONTROL
+    return resp
+
+
+def cached_json(payload: dict, etag: str | None = None):
+    """
+    jsonify payload with caching headers.
+    Without an etag one is derived from the body, so unchanged results still revalidate with 304
+    (saves bandwidth, not serialization).
+    """
+    resp = jsonify(payload)
+    resp.headers['Cache-Control'] = CACHE_CONTROL
+    resp.set_etag(etag or body_etag(resp.get_data()))
+    return resp.make_conditional(request)
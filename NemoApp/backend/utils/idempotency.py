@@ -0,0 +1,167 @@
+"""
+Idempotency-Key support for retried POSTs (bookings, friend requests).
+
+A client that retries with the same Idempotency-Key header gets the stored response of the
+first attempt (marked with Idempotent-Replayed: true) instead of running the handler again.
+Records live in idempotencyKeys/{sha256(scope|uid|key)} for NEMO_IDEMPOTENCY_TTL_SECONDS
+(default 3600); configure a Firestore TTL policy on expiresAt to purge them.
+
+  - same key, different request body   -> 422
+  - same key while the first is running -> 409 (for NEMO_IDEMPOTENCY_PENDING_SECONDS, default 60;
+    a pending record older than that is treated as abandoned, e.g. by a crashed worker)
+  - 5xx responses are not stored, so the request can be retried with the same key
+
+An expired or abandoned record is re-reserved in a transaction, so of two retries racing for it
+only one runs the handler.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from google.api_core import exceptions as gexc
+from firebase_admin import firestore as admin_fs
+from services.firebase_service import db
+from utils.transactions import transactional
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+COLLECTION = 'idempotencyKeys'
+TTL_SECONDS = max(1, int(os.getenv('NEMO_IDEMPOTENCY_TTL_SECONDS', '3600') or 3600))
+PENDING_SECONDS = min(TTL_SECONDS, max(1, int(os.getenv('NEMO_IDEMPOTENCY_PENDING_SECONDS', '60') or 60)))
+MAX_KEY_LENGTH = 255
+
+
+def record_id(scope: str, uid: str, key: str) -> str:
+    return hashlib.sha256(f"{scope}|{uid}|{key}".encode('utf-8')).hexdigest()
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+def validate_key(key: str | None):
+    """(ok, error) for an Idempotency-Key header value; a missing header is ok."""
+    if key is not None and not (0 < len(key) <= MAX_KEY_LENGTH):
+        return False, f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters'
+    return True, None
+
+
+def new_record(scope: str, uid: str, fp: str) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        'scope': scope,
+        'userId': uid,
+        'fingerprint': fp,
+        'state': 'pending',
+        'createdAt': admin_fs.SERVER_TIMESTAMP,
+        'expiresAt': now + timedelta(seconds=TTL_SECONDS),
+        'pendingUntil': now + timedelta(seconds=PENDING_SECONDS),
+    }
+
+
+def _passed(ts) -> bool:
+    if not isinstance(ts, datetime):
+        return False
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts <= datetime.now(timezone.utc)
+
+
+def classify(record: dict, fp: str) -> str:
+    """What to do with an existing record: 'expired', 'mismatch', 'pending' or 'replay'."""
+    if _passed(record.get('expiresAt')):
+        return 'expired'
+    if record.get('state') != 'done' and _passed(record.get('pendingUntil')):
+        return 'expired'  # abandoned reservation
+    if record.get('fingerprint') != fp:
+        return 'mismatch'
+    if record.get('state') != 'done':
+        return 'pending'
+    return 'replay'
+
+
+def reserve_outcome(snap, fp: str) -> str:
+    """classify() for a snapshot read inside the reserve transaction (a missing record is free)."""
+    return classify(snap.to_dict() or {}, fp) if snap.exists else 'expired'
+
+
+def rejection(outcome: str):
+    """(payload, status) for the mismatch/pending outcomes of classify()."""
+    if outcome == 'mismatch':
+        return {'success': False, 'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'}, 422
+    return {'success': False, 'error': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'}, 409
+
+
+def stored_result(status: int, body: str, mimetype: str) -> dict:
+    return {'state': 'done', 'status': status, 'body': body, 'mimetype': mimetype}
+
+
+def reserve(ref, scope: str, uid: str, fp: str):
+    """
+    Reserve ref for this request. Returns ('reserved', None) when the handler should run, else
+    (outcome, record) with outcome 'replay', 'mismatch' or 'pending'.
+    """
+    try:
+        ref.create(new_record(scope, uid, fp))
+        return 'reserved', None
+    except gexc.AlreadyExists:
+        pass
+
+    transaction = db.transaction()
+
+    @transactional('idempotency.reserve')
+    def _txn(transaction):
+        snap = ref.get(transaction=transaction)
+        outcome = reserve_outcome(snap, fp)
+        if outcome != 'expired':
+            return outcome, snap.to_dict()
+        transaction.set(ref, new_record(scope, uid, fp))
+        return 'reserved', None
+
+    return _txn(transaction)
+
+
+def idempotent(scope: str):
+    """
+    Decorator for POST handlers that take current_user first (stack it under @require_auth).
+    Usage:
+        @require_auth
+        @idempotent('bookings.individual')
+        def create_individual_booking(current_user): ...
+    """
+    def _decorate(func):
+        @wraps(func)
+        def _wrapper(current_user, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            ok, err = validate_key(key)
+            if not ok:
+                return jsonify({'success': False, 'error': err}), 400
+            if key is None:
+                return func(current_user, *args, **kwargs)
+
+            fp = fingerprint(request.get_data(cache=True))
+            ref = db.collection(COLLECTION).document(record_id(scope, current_user, key))
+            outcome, record = reserve(ref, scope, current_user, fp)
+            if outcome == 'replay':
+                resp = current_app.response_class(record.get('body') or '', status=int(record.get('status') or 200),
+                                                  mimetype=record.get('mimetype') or 'application/json')
+                resp.headers[REPLAYED_HEADER] = 'true'
+                return resp
+            if outcome != 'reserved':
+                payload, code = rejection(outcome)
+                return jsonify(payload), code
+
+            try:
+                resp = make_response(func(current_user, *args, **kwargs))
+            except Exception:
+                ref.delete()
+                raise
+            if resp.status_code >= 500:
+                ref.delete()
+            else:
+                ref.update(stored_result(resp.status_code, resp.get_data(as_text=True), resp.mimetype))
+            return resp
+        return _wrapper
+    return _decorate
@@ -0,0 +1,76 @@
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Pluggable JSON provider for the Flask app.
+#
+# NEMO_JSON_PROVIDER=auto (default) uses orjson when it is installed and the stdlib provider
+# otherwise; "orjson" / "stdlib" force one (orjson falls back to stdlib if not installed).
+# Output matches Flask's default provider: sorted keys, and datetimes (including Firestore's
+# DatetimeWithNanoseconds) serialized as HTTP dates via the provider's `default`.
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson encoding/decoding; anything orjson rejects goes through the stdlib path."""
+
+    def _options(self, sort_keys: bool, indent) -> int:
+        # Datetimes are passed to `default` so they render exactly like the stdlib provider
+        # (orjson would use RFC 3339, and rejects datetime subclasses such as DatetimeWithNanoseconds).
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, sort_keys: bool, indent=None) -> bytes | None:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(sort_keys, indent))
+        except TypeError:  # orjson.JSONEncodeError, e.g. ints beyond 64 bits
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        if set(kwargs) - {'sort_keys', 'ensure_ascii', 'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        out = self._dumps_bytes(obj, kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        if out is None:
+            return super().dumps(obj, **kwargs)
+        return out.decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Re-raise as the stdlib error (and accept the NaN/Infinity literals it allows)
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        # Encode straight to bytes (skips the str round trip of the default provider)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        body = self._dumps_bytes(obj, self.sort_keys, indent)
+        if body is None:
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'stdlib': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def select_json_provider(name: str | None = None) -> type:
+    """Provider class for `name` (default: NEMO_JSON_PROVIDER env, "auto")."""
+    name = (name or os.getenv('NEMO_JSON_PROVIDER', 'auto') or 'auto').strip().lower()
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        name = 'stdlib'
+    return JSON_PROVIDERS.get(name, DefaultJSONProvider)
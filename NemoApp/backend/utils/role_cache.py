@@ -0,0 +1,78 @@
+"""
+Short-TTL cache of users/{uid}.role used by require_admin.
+
+invalidate() only reaches the current process. Other workers keep a cached role until it expires,
+so a demoted admin keeps admin access there for up to admin_ttl_seconds (NEMO_ROLE_CACHE_ADMIN_TTL,
+default 5). Other roles only ever deny access, so they are cached for the longer ttl_seconds
+(NEMO_ROLE_CACHE_TTL, default 30); a promotion can take that long to apply on other workers.
+"""
+
+import os
+import threading
+import time
+
+
+class RoleCache:
+    """
+    uid -> role string, expiring ttl_seconds after it was read ('admin' after admin_ttl_seconds,
+    capped at ttl_seconds). Call invalidate(uid) whenever a user's role is written so the change
+    applies immediately in this process. ttl_seconds <= 0 disables caching.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 4096, admin_ttl_seconds: float = 5.0):
+        self.ttl_seconds = float(ttl_seconds)
+        self.admin_ttl_seconds = min(float(admin_ttl_seconds), self.ttl_seconds)
+        self.max_size = int(max_size)
+        self._entries = {}  # uid -> (expires_at, role)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid: str) -> str | None:
+        if self.ttl_seconds <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(uid, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, uid: str, role: str) -> None:
+        ttl = self.admin_ttl_seconds if role == 'admin' else self.ttl_seconds
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_size and uid not in self._entries:
+                # Drop expired entries first, then the oldest insertions
+                for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                    del self._entries[k]
+                while len(self._entries) >= self.max_size:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[uid] = (now + ttl, role or '')
+
+    def invalidate(self, uid: str | None = None) -> None:
+        with self._lock:
+            if uid is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(uid, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'ttlSeconds': self.ttl_seconds,
+                'adminTtlSeconds': self.admin_ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Shared instance: read by utils/decorators.py, invalidated by FirebaseService.set_user_role
+role_cache = RoleCache(ttl_seconds=float(os.getenv('NEMO_ROLE_CACHE_TTL', '30') or 0),
+                       admin_ttl_seconds=float(os.getenv('NEMO_ROLE_CACHE_ADMIN_TTL', '5') or 0))
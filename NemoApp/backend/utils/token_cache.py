@@ -0,0 +1,81 @@
+"""
+Bounded, thread-safe LRU of verified Firebase ID tokens.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    Maps sha256(token) -> decoded claims until the token's own `exp` claim.
+    Only successful verifications are cached; raw tokens are never stored.
+    max_size <= 0 disables caching.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = int(max_size)
+        self._entries = OrderedDict()  # key -> (exp, claims)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            exp, claims = entry
+            if exp <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        if self.max_size <= 0:
+            return
+        try:
+            exp = float(claims.get('exp'))
+        except (TypeError, ValueError):
+            # No usable expiry: don't cache
+            return
+        if exp <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': (self.hits / total) if total else 0.0,
+            }
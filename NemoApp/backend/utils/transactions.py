@@ -0,0 +1,213 @@
+"""
+Instrumented replacement for firestore.transactional with a tunable retry policy.
+
+    transaction = db.transaction()
+
+    @transactional('bookings.individual')
+    def _txn(transaction): ...
+
+async_transactional(name) is the same for async clients (api_async/, utils/async_decorators.py):
+retries sleep with asyncio.sleep and record into the same txn_metrics.
+
+Attempts, aborts, latency and the contended document are recorded per transaction name in
+txn_metrics (reported by GET /api/admin/health). Aborted commits are retried up to
+NEMO_TXN_MAX_ATTEMPTS times with jittered exponential backoff (NEMO_TXN_BACKOFF_BASE_MS,
+capped at NEMO_TXN_BACKOFF_MAX_MS); exhausting them raises ValueError like the SDK decorator.
+"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from google.api_core import exceptions
+from google.cloud.firestore_v1.transaction import _Transactional
+from google.cloud.firestore_v1.async_transaction import _AsyncTransactional
+
+MAX_ATTEMPTS = max(1, int(os.getenv('NEMO_TXN_MAX_ATTEMPTS', '5') or 5))
+BACKOFF_BASE_MS = max(0.0, float(os.getenv('NEMO_TXN_BACKOFF_BASE_MS', '10') or 0))
+BACKOFF_MAX_MS = max(0.0, float(os.getenv('NEMO_TXN_BACKOFF_MAX_MS', '500') or 0))
+
+# Contended documents reported per transaction name
+TOP_CONTENDED = 5
+
+_DOC_PATH_RE = re.compile(r'(?:/documents/|contention on )([\w\-]+(?:/[\w\-]+)+)')
+
+
+def backoff_seconds(retry: int, base_ms: float = BACKOFF_BASE_MS, max_ms: float = BACKOFF_MAX_MS) -> float:
+    """Full-jitter exponential backoff before retry number `retry` (1-based)."""
+    ceiling = min(max_ms, base_ms * (2 ** (retry - 1)))
+    return random.uniform(0, ceiling) / 1000.0
+
+
+def _written_paths(transaction) -> list:
+    """Document paths buffered for commit (memory datastore or Firestore write protobufs)."""
+    transaction = getattr(transaction, '_sync', transaction)  # async memory transaction wrapper
+    paths = [w[1].path for w in getattr(transaction, '_writes', None) or ()]
+    for pb in getattr(transaction, '_write_pbs', None) or ():
+        name = pb.update.name or pb.delete
+        if name:
+            paths.append(name.split('/documents/', 1)[-1])
+    return paths
+
+
+def _contended_document(exc, transaction) -> str:
+    """Document named by the abort error, else the first document the attempt wrote."""
+    m = _DOC_PATH_RE.search(str(exc))
+    if m:
+        return m.group(1)
+    written = _written_paths(transaction)
+    return written[0] if written else 'unknown'
+
+
+class TransactionMetrics:
+    """Per-name counters for instrumented transactions. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name = {}
+
+    def _entry(self, name: str) -> dict:
+        entry = self._by_name.get(name)
+        if entry is None:
+            entry = {
+                'calls': 0, 'committed': 0, 'failed': 0, 'exhausted': 0,
+                'attempts': 0, 'aborts': 0, 'totalMs': 0.0, 'maxMs': 0.0, 'contended': {},
+            }
+            self._by_name[name] = entry
+        return entry
+
+    def record_abort(self, name: str, document: str) -> None:
+        with self._lock:
+            entry = self._entry(name)
+            entry['aborts'] += 1
+            entry['contended'][document] = entry['contended'].get(document, 0) + 1
+
+    def record(self, name: str, attempts: int, outcome: str, elapsed_ms: float) -> None:
+        """outcome: 'committed', 'exhausted' (retries used up) or 'failed' (callable raised)."""
+        with self._lock:
+            entry = self._entry(name)
+            entry['calls'] += 1
+            entry[outcome] += 1
+            entry['attempts'] += attempts
+            entry['totalMs'] += elapsed_ms
+            entry['maxMs'] = max(entry['maxMs'], elapsed_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_name.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for name, e in self._by_name.items():
+                top = sorted(e['contended'].items(), key=lambda kv: -kv[1])[:TOP_CONTENDED]
+                out[name] = {
+                    'calls': e['calls'],
+                    'committed': e['committed'],
+                    'failed': e['failed'],
+                    'exhausted': e['exhausted'],
+                    'attempts': e['attempts'],
+                    'aborts': e['aborts'],
+                    'abortRate': (e['aborts'] / e['attempts']) if e['attempts'] else 0.0,
+                    'avgMs': (e['totalMs'] / e['calls']) if e['calls'] else 0.0,
+                    'maxMs': e['maxMs'],
+                    'contended': [{'document': d, 'aborts': n} for d, n in top],
+                }
+            return {
+                'maxAttempts': MAX_ATTEMPTS,
+                'backoffBaseMs': BACKOFF_BASE_MS,
+                'backoffMaxMs': BACKOFF_MAX_MS,
+                'transactions': out,
+            }
+
+
+# Shared instance: written by every @transactional block, read by admin health
+txn_metrics = TransactionMetrics()
+
+
+class _InstrumentedTransactional(_Transactional):
+    def __init__(self, to_wrap, name: str, max_attempts: int | None = None, metrics: TransactionMetrics | None = None):
+        super().__init__(to_wrap)
+        self.name = name
+        self.max_attempts = max(1, int(max_attempts or MAX_ATTEMPTS))
+        self.metrics = metrics or txn_metrics
+
+    def __call__(self, transaction, *args, **kwargs):
+        self._reset()
+        retryable_exceptions = (exceptions.Aborted,) if not transaction._read_only else ()
+        start = time.perf_counter()
+        attempts = 0
+        outcome = 'failed'
+        last_exc = None
+        try:
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    time.sleep(backoff_seconds(attempt))
+                attempts += 1
+                result = self._pre_commit(transaction, *args, **kwargs)
+                try:
+                    transaction._commit()
+                    outcome = 'committed'
+                    return result
+                except retryable_exceptions as exc:
+                    last_exc = exc
+                    self.metrics.record_abort(self.name, _contended_document(exc, transaction))
+            outcome = 'exhausted'
+            raise ValueError(f'Failed to commit transaction in {self.max_attempts} attempts.') from last_exc
+        except BaseException:
+            transaction._rollback()
+            raise
+        finally:
+            self.metrics.record(self.name, attempts, outcome, (time.perf_counter() - start) * 1000.0)
+
+
+class _InstrumentedAsyncTransactional(_AsyncTransactional):
+    def __init__(self, to_wrap, name: str, max_attempts: int | None = None, metrics: TransactionMetrics | None = None):
+        super().__init__(to_wrap)
+        self.name = name
+        self.max_attempts = max(1, int(max_attempts or MAX_ATTEMPTS))
+        self.metrics = metrics or txn_metrics
+
+    async def __call__(self, transaction, *args, **kwargs):
+        self._reset()
+        retryable_exceptions = (exceptions.Aborted,) if not transaction._read_only else ()
+        start = time.perf_counter()
+        attempts = 0
+        outcome = 'failed'
+        last_exc = None
+        try:
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    await asyncio.sleep(backoff_seconds(attempt))
+                attempts += 1
+                result = await self._pre_commit(transaction, *args, **kwargs)
+                try:
+                    await transaction._commit()
+                    outcome = 'committed'
+                    return result
+                except retryable_exceptions as exc:
+                    last_exc = exc
+                    self.metrics.record_abort(self.name, _contended_document(exc, transaction))
+            outcome = 'exhausted'
+            raise ValueError(f'Failed to commit transaction in {self.max_attempts} attempts.') from last_exc
+        except BaseException:
+            await transaction._rollback()
+            raise
+        finally:
+            self.metrics.record(self.name, attempts, outcome, (time.perf_counter() - start) * 1000.0)
+
+
+def transactional(name: str, max_attempts: int | None = None):
+    """Decorator factory: @transactional('area.operation') in place of @firestore.transactional."""
+    def _decorate(to_wrap):
+        return _InstrumentedTransactional(to_wrap, name, max_attempts)
+    return _decorate
+
+
+def async_transactional(name: str, max_attempts: int | None = None):
+    """Async counterpart of transactional, in place of @firestore_async.async_transactional."""
+    def _decorate(to_wrap):
+        return _InstrumentedAsyncTransactional(to_wrap, name, max_attempts)
+    return _decorate
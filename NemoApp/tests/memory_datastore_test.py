@@ -0,0 +1,962 @@
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# In-process API test against the memory datastore (no Firebase project or running server needed).
+# Usage (from repo root):
+#   python NemoApp/tests/memory_datastore_test.py
+
+os.environ["NEMO_DATASTORE"] = "memory"
+os.environ["NEMO_EVENT_CATALOG"] = "1"
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app  # noqa: E402
+from services.firebase_service import db, FirebaseService  # noqa: E402
+from firebase_admin import firestore as admin_fs  # noqa: E402
+import services.event_catalog as event_catalog  # noqa: E402
+from utils import idempotency  # noqa: E402
+
+
+def pretty(x):
+    return json.dumps(x, indent=2, ensure_ascii=False, default=str)
+
+
+def assert_ok(cond, step, detail=None):
+    if not cond:
+        raise AssertionError(f"{step} failed: {pretty(detail)}")
+
+
+def seed_user(uid: str, phone: str, name: str, role: str = "user") -> str:
+    db.collection("users").document(uid).set({
+        "uid": uid,
+        "phoneNumber": phone,
+        "fullName": name,
+        "name": name,
+        "role": role,
+        "friends": [],
+        "profilePicture": "",
+        "createdAt": datetime.utcnow(),
+    })
+    return db.issue_token(uid)
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def check_datastore_primitives():
+    coll = db.collection("primitives")
+    _, ref = coll.add({"n": 1, "tags": ["a"], "when": datetime(2030, 1, 1)})
+    ref.update({"n": admin_fs.Increment(2), "tags": admin_fs.ArrayUnion(["a", "b"]), "at": admin_fs.SERVER_TIMESTAMP})
+    snap = ref.get()
+    data = snap.to_dict()
+    assert_ok(data["n"] == 3, "increment", data)
+    assert_ok(data["tags"] == ["a", "b"], "array_union", data)
+    assert_ok(data["at"].tzinfo is not None and data["when"].tzinfo is not None, "timestamps", data)
+    ref.update({"tags": admin_fs.ArrayRemove(["a"])})
+    assert_ok(ref.get().to_dict()["tags"] == ["b"], "array_remove")
+
+    for i in range(5):
+        coll.document(f"d{i}").set({"k": i % 2, "v": i})
+    q = coll.where("k", "==", 0).order_by("v", direction=admin_fs.Query.DESCENDING)
+    assert_ok([s.id for s in q.stream()] == ["d4", "d2", "d0"], "where+order_by")
+    first = list(coll.order_by("v").limit(2).stream())
+    nxt = [s.id for s in coll.order_by("v").start_after(first[-1]).limit(2).stream()]
+    assert_ok(nxt == ["d2", "d3"], "start_after", nxt)
+
+    # Transaction retries on contention and keeps Increment consistent
+    counter = coll.document("counter")
+    counter.set({"c": 0})
+    transaction = db.transaction()
+    attempts = []
+
+    @admin_fs.transactional
+    def _txn(txn):
+        snap = counter.get(transaction=txn)
+        attempts.append(1)
+        if len(attempts) == 1:
+            counter.update({"c": admin_fs.Increment(10)})  # concurrent writer
+        txn.update(counter, {"c": snap.to_dict()["c"] + 1})
+
+    _txn(transaction)
+    assert_ok(len(attempts) == 2 and counter.get().to_dict()["c"] == 11, "transaction retry", attempts)
+
+
+def page_all(client, query: str) -> list:
+    ids, token = [], None
+    while True:
+        url = f"/api/events?{query}" + (f"&pageToken={token}" if token else "")
+        body = client.get(url).get_json()
+        assert_ok(body.get("success"), "page", body)
+        ids.extend(e["id"] for e in body["events"])
+        token = body.get("nextPageToken")
+        if not token:
+            return ids
+
+
+def check_event_paging(client):
+    from services.event_query import ordered_listing_ready
+    from scripts.backfill_event_fields import main as backfill_event_fields
+
+    base = datetime.utcnow() + timedelta(days=10)
+    # Until the backfill records that every event has startTime, listings page in memory so
+    # legacy events (time only) are not skipped by Firestore's ordering
+    db.collection("events").document("legacy_listing").set({
+        "title": "Legacy", "date": base.strftime("%Y-%m-%d"), "time": "08:00", "type": "tours",
+        "maxParticipants": 5, "currentParticipants": 0,
+    })
+    event_catalog.CATALOG_ENABLED = False
+    try:
+        body = client.get("/api/events?type=tours").get_json()
+    finally:
+        event_catalog.CATALOG_ENABLED = True
+    assert_ok([(e["id"], e["startTime"]) for e in body["events"]] == [("legacy_listing", "08:00")],
+              "legacy_listed_in_memory", body)
+    assert_ok(not ordered_listing_ready(), "listing_not_ready", None)
+    backfill_event_fields()
+    assert_ok(ordered_listing_ready() and db.collection("events").document("legacy_listing").get().to_dict()["startTime"] == "08:00",
+              "backfill_marks_listing_ready", None)
+
+    for i in range(7):
+        db.collection("events").document(f"page_{i}").set({
+            "title": f"Paged {i}", "date": (base + timedelta(days=i // 2)).strftime("%Y-%m-%d"),
+            "startTime": f"{9 + i % 2:02d}:00", "timing": "morning", "type": "music", "status": "upcoming",
+            "maxParticipants": 5, "currentParticipants": 0,
+        })
+    expected = [f"page_{i}" for i in range(7)]
+    via_catalog = page_all(client, "type=music&limit=2")
+    event_catalog.CATALOG_ENABLED = False
+    try:
+        db.reset_stats()
+        via_query = page_all(client, "type=music&limit=2")
+        reads = db.stats["documentReads"]
+        # All equality filters + date range are pushed server-side by the planner
+        db.reset_stats()
+        from_date = (base + timedelta(days=1)).strftime("%Y-%m-%d")
+        body = client.get(f"/api/events?type=music&status=upcoming&timing=morning&fromDate={from_date}").get_json()
+        planned_reads = db.stats["documentReads"]
+    finally:
+        event_catalog.CATALOG_ENABLED = True
+    assert_ok(via_catalog == expected and via_query == expected, "paging", [via_catalog, via_query])
+    assert_ok(reads <= 4 * 3, "paging_reads", reads)
+    assert_ok([e["id"] for e in body["events"]] == [f"page_{i}" for i in range(2, 7)], "planned_query", body)
+    assert_ok(planned_reads == 5, "planned_reads", planned_reads)
+    r = client.get("/api/events?pageToken=not-a-token")
+    assert_ok(r.status_code == 400, "bad_page_token", r.get_json())
+
+
+# Per-event byte budget for the default GET /api/events shape; must not grow with attendance
+LISTING_EVENT_BYTE_BUDGET = 1024
+
+
+def check_listing_payload(client):
+    db.collection("events").document("crowded").set({
+        "title": "Crowded", "description": "A popular event with many attendees.",
+        "date": (datetime.utcnow() + timedelta(days=30)).strftime("%Y-%m-%d"),
+        "startTime": "19:00", "endTime": "22:00", "timing": "evening", "type": "arts", "status": "upcoming",
+        "format": "offline", "venueType": "indoor", "region": "east", "location": "Arena", "organiser": "Nemo",
+        "price": 10, "imageUrl": "", "maxParticipants": 2000, "currentParticipants": 1600,
+        "participants": [f"uid_{i:04d}" for i in range(1500)],
+        "guestEntries": [{"name": f"Guest {i}", "addedBy": "uid_0000"} for i in range(100)],
+        "createdBy": "admin_1",
+    })
+    for enabled in (True, False):
+        event_catalog.CATALOG_ENABLED = enabled
+        try:
+            ev = client.get("/api/events?type=arts").get_json()["events"][0]
+            size = len(json.dumps(ev))
+            assert_ok(size <= LISTING_EVENT_BYTE_BUDGET, "listing_size_budget", {"bytes": size, "event": ev})
+            assert_ok("participants" not in ev and "guestEntries" not in ev and "createdBy" not in ev,
+                      "listing_no_arrays", ev)
+            assert_ok(ev["currentParticipants"] == 1600 and ev["availableSlots"] == 400, "listing_counts", ev)
+            body = client.get("/api/events?type=arts&fields=title,date").get_json()
+            assert_ok(body["events"] == [{"id": "crowded", "title": "Crowded", "date": ev["date"]}],
+                      "fields_projection", body)
+        finally:
+            event_catalog.CATALOG_ENABLED = True
+    r = client.get("/api/events?fields=title,participants")
+    assert_ok(r.status_code == 400, "fields_rejected", r.get_json())
+
+
+def check_conditional_get(client):
+    for enabled in (True, False):
+        event_catalog.CATALOG_ENABLED = enabled
+        try:
+            etags = {}
+            for url in ("/api/events?type=arts", "/api/events/crowded"):
+                r = client.get(url)
+                etags[url] = r.headers.get("ETag")
+                assert_ok(etags[url] and "no-cache" in r.headers.get("Cache-Control", ""), "etag_headers", dict(r.headers))
+                r = client.get(url, headers={"If-None-Match": etags[url]})
+                assert_ok(r.status_code == 304 and not r.data, "not_modified", [url, enabled, r.status_code])
+            db.collection("events").document("crowded").update({"title": f"Crowded {enabled}"})
+            for url, etag in etags.items():
+                r = client.get(url, headers={"If-None-Match": etag})
+                assert_ok(r.status_code == 200 and r.headers.get("ETag") != etag, "etag_changes", [url, enabled])
+        finally:
+            event_catalog.CATALOG_ENABLED = True
+
+    # Another worker (its own catalog listener) derives the same listing ETag
+    url = "/api/events?type=arts"
+    etag = client.get(url).headers.get("ETag")
+    first = event_catalog._catalog
+    event_catalog._catalog = event_catalog.EventCatalog()
+    event_catalog._catalog.start()
+    try:
+        r = client.get(url, headers={"If-None-Match": etag})
+        assert_ok(event_catalog._catalog.is_live() and r.status_code == 304, "etag_shared_across_catalogs", r.status_code)
+    finally:
+        event_catalog._catalog.stop()
+        event_catalog._catalog = first
+
+    # Body-derived tags come from body_etag, which the async app (api_async/events.py) uses too
+    from utils.http_cache import body_etag, cached_json
+    with client.application.test_request_context("/api/events"):
+        resp = cached_json({"events": []})
+        assert_ok(resp.get_etag()[0] == body_etag(resp.get_data()), "body_etag_shared", resp.headers.get("ETag"))
+
+
+def check_json_and_compression(app, client):
+    from flask.json.provider import DefaultJSONProvider
+    from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+    when = DatetimeWithNanoseconds(2030, 1, 2, 3, 4, 5, nanosecond=6, tzinfo=timezone.utc)
+    payload = {"b": [1, 2.5, None], "a": {"when": when, "name": "Caf\u00e9"}}
+    same = app.json.loads(app.json.dumps(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+    assert_ok(same, "json_provider_parity", type(app.json).__name__)
+
+    plain = client.get("/api/events")
+    r = client.get("/api/events", headers={"Accept-Encoding": "gzip"})
+    assert_ok(r.headers.get("Content-Encoding") == "gzip" and "Accept-Encoding" in r.headers.get("Vary", ""),
+              "gzip_negotiated", dict(r.headers))
+    assert_ok(json.loads(gzip.decompress(r.data)) == plain.get_json(), "gzip_body", len(r.data))
+    r = client.get("/api/events", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["ETag"]})
+    assert_ok(r.status_code == 304, "gzip_etag_revalidates", r.status_code)
+    r = client.get("/api/events/page_0", headers={"Accept-Encoding": "gzip"})
+    assert_ok("Content-Encoding" not in r.headers, "below_threshold_uncompressed", dict(r.headers))
+
+
+def check_seat_shards(client, admin_token):
+    """Sharded seat counters: concurrent bookings never exceed capacity; reads aggregate the shards."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = datetime.utcnow() + timedelta(days=3)
+    r = client.post("/api/admin/events", headers=auth(admin_token), json={
+        "title": "Hot Event", "description": "d", "format": "online", "type": "workshop",
+        "region": "central", "organiser": "Nemo", "location": "Online",
+        "date": start.strftime("%Y-%m-%d"), "startTime": "18:00", "endTime": "20:00",
+        "price": 0, "maxParticipants": 5, "seatShards": 4,
+    })
+    assert_ok(r.status_code == 201, "create_sharded_event", r.get_json())
+    event_id = r.get_json()["eventId"]
+    shards = db.collection("events").document(event_id).collection("seatShards")
+
+    tokens = [seed_user(f"fan_{i}", f"+65988800{i:02d}", f"Fan {i}") for i in range(7)]
+
+    def book(token):
+        return client.post("/api/bookings/individual", headers=auth(token), json={"eventId": event_id}).status_code
+
+    db._latency = 0.002  # overlap the transactions so they contend
+    try:
+        with ThreadPoolExecutor(max_workers=7) as pool:
+            codes = list(pool.map(book, tokens))
+    finally:
+        db._latency = 0.0
+    taken = [s.to_dict() for s in shards.stream()]
+    assert_ok(sorted(codes) == [201] * 5 + [400] * 2, "sharded_capacity", codes)
+    assert_ok(sum(t["taken"] for t in taken) == 5 and all(t["taken"] <= t["capacity"] for t in taken),
+              "sharded_counts", taken)
+
+    ev = client.get(f"/api/events/{event_id}").get_json()["event"]
+    assert_ok(ev["currentParticipants"] == 5 and ev["availableSlots"] == 0, "sharded_event_counts", ev)
+    assert_ok("participants" not in ev or ev["participants"] == [], "sharded_event_doc_untouched", ev)
+
+    booker = tokens[codes.index(201)]
+    r = client.post("/api/bookings/individual", headers=auth(booker), json={"eventId": event_id})
+    assert_ok(r.status_code == 400, "sharded_double_booking_rejected", r.get_json())
+    r = client.delete(f"/api/bookings/by-event/{event_id}", headers=auth(booker))
+    assert_ok(r.status_code == 200 and r.get_json()["seatsFreed"] == 1, "sharded_cancel", r.get_json())
+    ev = client.get(f"/api/events/{event_id}").get_json()["event"]
+    assert_ok(ev["availableSlots"] == 1, "sharded_cancel_restores_slot", ev)
+
+    r = client.put(f"/api/admin/events/{event_id}", headers=auth(admin_token), json={"maxParticipants": 3})
+    assert_ok(r.status_code == 400, "sharded_shrink_rejected", r.get_json())
+    r = client.put(f"/api/admin/events/{event_id}", headers=auth(admin_token), json={"maxParticipants": 8})
+    assert_ok(r.status_code == 200 and r.get_json()["updated"]["availableSlots"] == 4, "sharded_resize", r.get_json())
+    assert_ok(sum(s.to_dict()["capacity"] for s in shards.stream()) == 8, "sharded_resize_capacity", None)
+
+    # A burst of rollups from the same stale snapshot writes the event document once
+    from services.seat_shards import rollup_seat_totals
+    event_ref = db.collection("events").document(event_id)
+    event_ref.update({"seatTotalsAt": 0})
+    stale = event_ref.get().to_dict()
+    db._latency = 0.002
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            wrote = list(pool.map(lambda _: rollup_seat_totals(event_ref, stale), range(6)))
+    finally:
+        db._latency = 0.0
+    assert_ok(wrote.count(True) == 1, "sharded_rollup_once", wrote)
+
+    # Without the catalog nothing is read before the booking transaction: a plain event is read once,
+    # in the transaction; a sharded one is rerouted from there once and then remembered
+    import services.seat_shards as seat_shards
+    db.collection("events").document("plain_reads").set({
+        "title": "Plain", "date": start.strftime("%Y-%m-%d"), "startTime": "10:00",
+        "maxParticipants": 5, "currentParticipants": 0, "availableSlots": 5,
+    })
+    waiting = [t for t, code in zip(tokens, codes) if code == 400]
+    event_catalog.CATALOG_ENABLED = False
+    event_catalog._catalog.stop()  # its listener's re-reads would be counted too
+    seat_shards._sharded_events.clear()
+    try:
+        db.reset_stats()
+        r = client.post("/api/bookings/individual", headers=auth(waiting[0]), json={"eventId": "plain_reads"})
+        plain_reads = db.stats["documentReads"]
+        r2 = client.post("/api/bookings/individual", headers=auth(waiting[0]), json={"eventId": event_id})
+        remembered = seat_shards.known_seat_mode(event_id)
+        r3 = client.post("/api/bookings/individual", headers=auth(waiting[1]), json={"eventId": event_id})
+    finally:
+        event_catalog.CATALOG_ENABLED = True
+        event_catalog._catalog.start()
+    assert_ok(r.status_code == 201 and plain_reads == 2, "plain_booking_reads", [r.get_json(), plain_reads])
+    assert_ok(r2.status_code == 201 and r3.status_code == 201 and remembered == (4, {}),
+              "sharded_mode_remembered", [r2.get_json(), r3.get_json(), remembered])
+
+    # Status is re-read in the shard transaction, so a booking routed before a cancel cannot land after it
+    from api.bookings import _create_sharded_booking
+    event_ref.update({"status": "cancelled"})
+    try:
+        _create_sharded_booking(event_id, "fan_6", 4)
+        rejected = None
+    except ValueError as ve:
+        rejected = str(ve)
+    assert_ok(rejected == "Event is cancelled", "sharded_status_in_txn", rejected)
+
+
+def check_admission_queue(client, admin_token):
+    """Admission queue: concurrent bookings are admitted in arrival-ordered batches without aborts."""
+    from concurrent.futures import ThreadPoolExecutor
+    from services.admission_queue import get_admission_queue
+
+    start = datetime.utcnow() + timedelta(days=3)
+    r = client.post("/api/admin/events", headers=auth(admin_token), json={
+        "title": "Flash Sale", "description": "d", "format": "online", "type": "workshop",
+        "region": "central", "organiser": "Nemo", "location": "Online",
+        "date": start.strftime("%Y-%m-%d"), "startTime": "19:00", "endTime": "20:00",
+        "price": 0, "maxParticipants": 5, "admissionQueue": True,
+    })
+    assert_ok(r.status_code == 201, "create_queued_event", r.get_json())
+    event_id = r.get_json()["eventId"]
+
+    tokens = [seed_user(f"rush_{i}", f"+65977700{i:02d}", f"Rush {i}") for i in range(8)]
+    tokens.append(tokens[0])  # duplicate request from the same user
+
+    def book(token):
+        return client.post("/api/bookings/individual", headers=auth(token), json={"eventId": event_id}).status_code
+
+    db.reset_stats()
+    db._latency = 0.002
+    try:
+        with ThreadPoolExecutor(max_workers=len(tokens)) as pool:
+            codes = list(pool.map(book, tokens))
+    finally:
+        db._latency = 0.0
+    stored = db.collection("events").document(event_id).get().to_dict()
+    queue = get_admission_queue(event_id, None).stats()
+    assert_ok(sorted(codes) == [201] * 5 + [400] * 4, "queued_capacity", codes)
+    attendees = list(db.collection("events").document(event_id).collection("attendees").stream())
+    assert_ok(stored["currentParticipants"] == 5 and stored["availableSlots"] == 0
+              and len(attendees) == 5, "queued_counts", stored)
+    assert_ok(db.stats["transactionAborts"] == 0 and queue["batches"] < len(tokens), "queued_batches", [db.stats, queue])
+
+    # A request stuck behind a slow batch times out and is cancelled; idle queues are dropped
+    import threading
+    import time
+    import services.admission_queue as admission_queue
+    release = threading.Event()
+    idle_seconds = admission_queue.IDLE_SECONDS
+    admission_queue.IDLE_SECONDS = 0.05
+    try:
+        slow = admission_queue.get_admission_queue("slow_event", lambda items: [release.wait(5) and i for i in items])
+        first = slow.submit("a")
+        time.sleep(0.05)
+        second = slow.submit("b")
+        try:
+            admission_queue.wait_admitted(second, timeout=0.05)
+            timed_out = False
+        except TimeoutError:
+            timed_out = True
+        release.set()
+        assert_ok(timed_out and second.cancelled() and admission_queue.wait_admitted(first) == "a",
+                  "queued_timeout", slow.stats())
+        time.sleep(0.3)
+        assert_ok("slow_event" not in admission_queue._queues, "queue_evicted_when_idle", list(admission_queue._queues))
+    finally:
+        admission_queue.IDLE_SECONDS = idle_seconds
+        release.set()
+
+
+def check_transaction_metrics():
+    """Instrumented transactions retry aborted commits and record the contended document."""
+    from utils.transactions import transactional, txn_metrics
+
+    ref = db.collection("events").document("txn_probe")
+    ref.set({"n": 0})
+    calls = []
+
+    @transactional("test.contended", max_attempts=3)
+    def _txn(txn):
+        n = ref.get(transaction=txn).to_dict()["n"]
+        if not calls:
+            ref.update({"n": 100})  # concurrent writer: the first commit must abort
+        calls.append(n)
+        txn.update(ref, {"n": n + 1})
+
+    _txn(db.transaction())
+    stats = txn_metrics.stats()["transactions"]["test.contended"]
+    assert_ok(ref.get().to_dict()["n"] == 101 and calls == [0, 100], "txn_retry", calls)
+    assert_ok(stats["attempts"] == 2 and stats["aborts"] == 1 and stats["committed"] == 1
+              and stats["contended"] == [{"document": "events/txn_probe", "aborts": 1}], "txn_metrics", stats)
+    ref.delete()
+
+
+def check_role_cache():
+    """Admin grants expire from the per-process role cache sooner than other roles."""
+    from utils.role_cache import RoleCache
+    cache = RoleCache(ttl_seconds=30, admin_ttl_seconds=0)
+    cache.put("demoted", "admin")
+    cache.put("member", "user")
+    assert_ok(cache.get("demoted") is None and cache.get("member") == "user", "role_cache_admin_ttl", cache.stats())
+
+
+def check_idempotency(client, admin_token):
+    """Idempotency-Key: retried POSTs replay the first response without re-running the handler."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = datetime.utcnow() + timedelta(days=3)
+    r = client.post("/api/admin/events", headers=auth(admin_token), json={
+        "title": "Retry Event", "description": "d", "format": "online", "type": "workshop",
+        "region": "central", "organiser": "Nemo", "location": "Online",
+        "date": start.strftime("%Y-%m-%d"), "startTime": "09:00", "endTime": "10:00",
+        "price": 0, "maxParticipants": 3,
+    })
+    event_id = r.get_json()["eventId"]
+    token = seed_user("retry_1", "+6596660001", "Retry One")
+    token_2 = auth(seed_user("retry_2", "+6596660002", "Retry Two"))
+    headers = {**auth(token), "Idempotency-Key": "book-1"}
+
+    first = client.post("/api/bookings/individual", headers=headers, json={"eventId": event_id})
+    writes = db.stats["documentWrites"]
+    again = client.post("/api/bookings/individual", headers=headers, json={"eventId": event_id})
+    assert_ok(first.status_code == 201 and again.status_code == 201
+              and again.get_json()["bookingId"] == first.get_json()["bookingId"]
+              and again.headers.get("Idempotent-Replayed") == "true", "idempotent_replay", again.get_json())
+    assert_ok(db.stats["documentWrites"] == writes, "idempotent_no_writes", db.stats)
+    stored = db.collection("events").document(event_id).get().to_dict()
+    assert_ok(stored["currentParticipants"] == 1, "idempotent_single_seat", stored)
+
+    r = client.post("/api/bookings/individual", headers=headers, json={"eventId": "other"})
+    assert_ok(r.status_code == 422, "idempotent_key_reuse", r.get_json())
+    r = client.post("/api/bookings/individual", headers=auth(token), json={"eventId": event_id})
+    assert_ok(r.status_code == 400, "no_key_runs_handler", r.get_json())
+
+    # A pending record whose lease lapsed (crashed worker) is re-reserved and the handler runs
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    body = json.dumps({"eventId": event_id})
+    ref = db.collection(idempotency.COLLECTION).document(idempotency.record_id("bookings.individual", "retry_2", "stale-1"))
+    ref.set({**idempotency.new_record("bookings.individual", "retry_2", idempotency.fingerprint(body.encode())),
+             "pendingUntil": past})
+    r = client.post("/api/bookings/individual", headers={**token_2, "Idempotency-Key": "stale-1",
+                                                       "Content-Type": "application/json"}, data=body)
+    assert_ok(r.status_code == 201, "idempotent_abandoned_pending", r.get_json())
+
+    # Retries racing for an expired record: exactly one reserves it
+    ref = db.collection(idempotency.COLLECTION).document("race")
+    ref.set({**idempotency.new_record("s", "u", "fp"), "expiresAt": past})
+    db._latency = 0.002
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outcomes = list(pool.map(lambda _: idempotency.reserve(ref, "s", "u", "fp")[0], range(4)))
+    finally:
+        db._latency = 0.0
+    assert_ok(sorted(outcomes) == ["pending"] * 3 + ["reserved"], "idempotent_expired_race", outcomes)
+
+    headers = {**auth(token), "Idempotency-Key": "friend-1"}
+    first = client.post("/api/friends/request", headers=headers, json={"phoneNumber": "96660002"})
+    again = client.post("/api/friends/request", headers=headers, json={"phoneNumber": "96660002"})
+    assert_ok(first.status_code == 201 and again.get_json() == first.get_json(), "idempotent_friend_request",
+              [first.get_json(), again.get_json()])
+
+
+def check_attendee_migration():
+    """scripts/migrate_attendees.py moves legacy attendance arrays into events/{id}/attendees."""
+    from scripts.migrate_attendees import migrate_chunk
+
+    start = datetime.utcnow() + timedelta(days=3)
+    ref = db.collection("events").document("legacy_event")
+    ref.set({
+        "title": "Legacy", "date": start.strftime("%Y-%m-%d"), "startTime": "10:00",
+        "maxParticipants": 4, "currentParticipants": 3, "availableSlots": 1,
+        "participants": ["legacy_1", "legacy_2"],
+        "guestEntries": [{"name": "Pal", "addedBy": "legacy_1"}],
+    })
+    token = seed_user("legacy_1", "+6595550001", "Legacy One")
+    while migrate_chunk(ref):
+        pass
+
+    stored = ref.get().to_dict()
+    attendees = {a.id: a.to_dict() for a in ref.collection("attendees").stream()}
+    assert_ok("participants" not in stored and "guestEntries" not in stored and stored["currentParticipants"] == 3,
+              "migrated_event", stored)
+    assert_ok(attendees["legacy_1"]["guests"] == {"pal": "Pal"} and attendees["legacy_1"]["seats"] == 2
+              and attendees["legacy_2"]["joined"], "migrated_attendees", attendees)
+    return token
+
+
+def check_keyed_guests(client, token):
+    """Guests are keyed by casefolded name on the attendee doc; bookings record only the guests they added."""
+    start = datetime.utcnow() + timedelta(days=3)
+    ref = db.collection("events").document("guest_event")
+    ref.set({
+        "title": "Guests", "date": start.strftime("%Y-%m-%d"), "startTime": "10:00",
+        "maxParticipants": 5, "currentParticipants": 0, "availableSlots": 5,
+    })
+    attendee = ref.collection("attendees").document("user_2")
+    r = client.post("/api/bookings/group", headers=auth(token), json={"eventId": "guest_event", "groupMemberNames": ["Ann"]})
+    first_id = r.get_json()["bookingId"]
+    r = client.post("/api/bookings/group", headers=auth(token), json={"eventId": "guest_event", "groupMemberNames": [" ann ", "ANN"]})
+    assert_ok(r.status_code == 400, "guest_dedupe", r.get_json())
+    r = client.post("/api/bookings/group", headers=auth(token), json={"eventId": "guest_event", "groupMemberNames": ["ANN", "Bo"]})
+    assert_ok(r.status_code == 201 and r.get_json()["joinedCount"] == 1, "guest_partial_dedupe", r.get_json())
+    second_id = r.get_json()["bookingId"]
+    booking = db.collection("bookings").document(second_id).get().to_dict()
+    assert_ok(booking["guestNames"] == ["Bo"], "guest_booking_records_added", booking)
+
+    r = client.delete(f"/api/bookings/{first_id}", headers=auth(token))
+    stored = attendee.get().to_dict()
+    assert_ok(r.get_json()["seatsFreed"] == 2 and stored["guests"] == {"bo": "Bo"} and stored["seats"] == 1,
+              "guest_cancel_by_key", stored)
+    r = client.delete(f"/api/bookings/{second_id}", headers=auth(token))
+    event = ref.get().to_dict()
+    assert_ok(r.status_code == 200 and not attendee.get().exists and event["currentParticipants"] == 0,
+              "guest_cancel_last", event)
+
+
+def check_bulk_booking(client, token):
+    """POST /api/bookings/bulk books a series in one transaction and reports per-event results."""
+    from utils.transactions import txn_metrics
+
+    start = datetime.utcnow() + timedelta(days=3)
+    for i, (cap, booked) in enumerate([(5, 0), (5, 0), (1, 1)]):
+        db.collection("events").document(f"series_{i}").set({
+            "title": f"Series {i}", "date": (start + timedelta(days=7 * i)).strftime("%Y-%m-%d"),
+            "startTime": "10:00", "maxParticipants": cap, "currentParticipants": booked,
+            "availableSlots": cap - booked,
+        })
+    calls_before = txn_metrics.stats()["transactions"].get("bookings.bulk", {}).get("calls", 0)
+    r = client.post("/api/bookings/bulk", headers=auth(token),
+                    json={"eventIds": ["series_0", "series_1", "series_2", "series_missing", "series_0"]})
+    body = r.get_json()
+    outcome = {res["eventId"]: res.get("error") or res["success"] for res in body["results"]}
+    assert_ok(r.status_code == 201 and body["booked"] == 2 and outcome == {
+        "series_0": True, "series_1": True, "series_2": "Event is full", "series_missing": "Event not found",
+    }, "bulk_results", body)
+    calls = txn_metrics.stats()["transactions"]["bookings.bulk"]["calls"]
+    assert_ok(calls - calls_before == 1, "bulk_single_transaction", calls)
+    stored = db.collection("events").document("series_1").get().to_dict()
+    assert_ok(stored["currentParticipants"] == 1 and stored["availableSlots"] == 4, "bulk_counts", stored)
+
+    r = client.post("/api/bookings/bulk", headers=auth(token), json={"eventIds": ["series_0", "series_1"]})
+    assert_ok(r.status_code == 400 and r.get_json()["failed"] == 2, "bulk_double_booking", r.get_json())
+    r = client.post("/api/bookings/bulk", headers=auth(token), json={"eventIds": []})
+    assert_ok(r.status_code == 400, "bulk_validation", r.get_json())
+
+    # Without the catalog, booking modes for every id come from one chunked get_all
+    from services.seat_shards import get_seat_modes
+    event_catalog.CATALOG_ENABLED = False
+    try:
+        modes = get_seat_modes(["series_0", "series_missing", "series_1"])
+    finally:
+        event_catalog.CATALOG_ENABLED = True
+    assert_ok(sorted(modes) == ["series_0", "series_1"] and modes["series_0"][0] == 0, "bulk_seat_modes", modes)
+
+
+def check_event_import(client, admin_token):
+    """Bulk import: CSV over HTTP with per-row errors, and a JSON Lines import resumed after a failure."""
+    import io
+    import services.event_import as event_import
+
+    day = (datetime.utcnow() + timedelta(days=10)).strftime("%Y-%m-%d")
+    csv_body = (
+        "title,description,type,region,organiser,location,date,startTime,endTime,price,maxParticipants,admissionQueue,venueType\n"
+        f"Yoga,Stretch,sports,central,Partner,Park,{day},08:00,09:00,0,12,false,outdoor\n"
+        f"Pottery,Clay,arts,,Partner,Studio,{day},10:00,12:00,5,8,,indoor\n"
+        f"Choir,Sing,music,east,Partner,Hall,{day},19:00,21:00,0,30,true,indoor\n"
+        f"True,Flag,arts,west,Partner,Hall,{day},19:00,21:00,0,30,,indoor\n"
+    )
+    r = client.post("/api/admin/events/import?importId=csv_import", headers={**auth(admin_token), "Content-Type": "text/csv"},
+                    data=csv_body)
+    body = r.get_json()
+    assert_ok(r.status_code == 200 and body["created"] == 3 and body["failed"] == 1
+              and body["errors"] == [{"row": 2, "error": "region is required"}], "import_csv", body)
+    imported = {e.to_dict()["title"]: e.to_dict() for e in db.collection("events").where("importId", "==", "csv_import").stream()}
+    assert_ok(set(imported) == {"Yoga", "Choir", "True"} and imported["Choir"].get("admissionQueue") is True
+              and imported["Yoga"]["availableSlots"] == 12, "import_csv_docs", imported)
+    r = client.post("/api/admin/events/import?importId=csv_import&format=csv", headers=auth(admin_token), data=csv_body)
+    assert_ok(r.get_json()["created"] == 3, "import_completed_replay", r.get_json())
+
+    bad_rows = json.dumps({"title": "T", "description": "d", "location": "L", "date": day, "maxParticipants": 5,
+                           "time": 930}) + "\n"
+    summary = event_import.import_events(io.BytesIO(bad_rows.encode()), "jsonl", "admin_1", import_id="bad_import")
+    assert_ok(summary["status"] == "completed" and summary["errors"] == [{"row": 1, "error": "time must be a string"}],
+              "import_bad_row_type", summary)
+
+    rows = "".join(json.dumps({
+        "title": f"Series {i}", "description": "d", "type": "sports", "region": "north", "organiser": "Partner",
+        "location": "Court", "venueType": "indoor", "date": day, "startTime": "18:00", "maxParticipants": 10,
+    }) + "\n" for i in range(5))
+
+    class _Interrupted(io.StringIO):
+        """Fails after three rows, like a dropped upload."""
+        served = 0
+
+        def __next__(self):
+            self.served += 1
+            if self.served > 3:
+                raise ConnectionError("stream interrupted")
+            return super().__next__()
+
+    batch_writes = event_import.BATCH_WRITES
+    event_import.BATCH_WRITES = 2
+    try:
+        try:
+            event_import.import_events(_Interrupted(rows), "jsonl", "admin_1", import_id="jsonl_import")
+        except ConnectionError:
+            pass
+        summary = event_import.import_events(io.BytesIO(rows.encode()), "jsonl", "admin_1", import_id="jsonl_import")
+    finally:
+        event_import.BATCH_WRITES = batch_writes
+    titles = [e.to_dict()["title"] for e in db.collection("events").where("importId", "==", "jsonl_import").stream()]
+    assert_ok(summary["resumedFrom"] == 2 and summary["created"] == 5 and sorted(titles) == [f"Series {i}" for i in range(5)],
+              "import_resumed", [summary, titles])
+
+
+def check_admin_jobs(client, admin_token):
+    """Cascading delete and bulk cancel/update run as background jobs reported by /api/admin/jobs."""
+    import time
+    import services.admin_jobs as admin_jobs
+
+    def wait_for(job_id):
+        for _ in range(250):
+            job = client.get(f"/api/admin/jobs/{job_id}", headers=auth(admin_token)).get_json()["job"]
+            if job["status"] in ("completed", "failed"):
+                return job
+            time.sleep(0.02)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    start = datetime.utcnow() + timedelta(days=4)
+    tokens = [seed_user(f"job_user_{i}", f"+659444000{i}", f"Job User {i}") for i in range(3)]
+    for event_id in ("job_delete", "job_cancel", "job_resume"):
+        db.collection("events").document(event_id).set({
+            "title": event_id, "date": start.strftime("%Y-%m-%d"), "startTime": "10:00",
+            "maxParticipants": 10, "currentParticipants": 0, "availableSlots": 10,
+        })
+        for token in tokens:
+            r = client.post("/api/bookings/individual", headers=auth(token), json={"eventId": event_id})
+            assert_ok(r.status_code == 201, "job_setup_booking", r.get_json())
+
+    page_size = admin_jobs.PAGE_SIZE
+    admin_jobs.PAGE_SIZE = 2
+    try:
+        r = client.delete("/api/admin/events/job_delete", headers=auth(admin_token))
+        assert_ok(r.status_code == 202 and r.get_json()["jobId"], "delete_event_accepted", r.get_json())
+        job = wait_for(r.get_json()["jobId"])
+        bookings = [b.to_dict() for b in db.collection("bookings").where("eventId", "==", "job_delete").stream()]
+        attendees = list(db.collection("events").document("job_delete").collection("attendees").stream())
+        assert_ok(job["status"] == "completed" and job["progress"]["bookingsCancelled"] == 3
+                  and not db.collection("events").document("job_delete").get().exists and not attendees
+                  and all(b["status"] == "cancelled" and b["cancelReason"] == "event_deleted" for b in bookings),
+                  "delete_event_cascade", [job, bookings])
+
+        # A deletion interrupted after marking the event leaves it findable, so it can be resubmitted
+        db.collection("events").document("job_resume").update({"status": "deleting"})
+        r = client.post("/api/bookings/individual", headers=auth(seed_user("job_user_y", "+6594440098", "Late")),
+                        json={"eventId": "job_resume"})
+        assert_ok(r.status_code == 400 and r.get_json()["error"] == "Event not found", "deleting_event_rejects", r.get_json())
+        r = client.delete("/api/admin/events/job_resume", headers=auth(admin_token))
+        job = wait_for(r.get_json()["jobId"])
+        statuses = {b.to_dict()["status"] for b in db.collection("bookings").where("eventId", "==", "job_resume").stream()}
+        assert_ok(r.status_code == 202 and job["status"] == "completed" and statuses == {"cancelled"}
+                  and not db.collection("events").document("job_resume").get().exists, "delete_event_resubmitted", job)
+
+        r = client.post("/api/admin/events/bulk", headers=auth(admin_token),
+                        json={"action": "cancel", "eventIds": ["job_cancel"]})
+        job = wait_for(r.get_json()["jobId"])
+    finally:
+        admin_jobs.PAGE_SIZE = page_size
+    statuses = {b.to_dict()["status"] for b in db.collection("bookings").where("eventId", "==", "job_cancel").stream()}
+    assert_ok(r.status_code == 202 and job["progress"]["bookingsCancelled"] == 3 and statuses == {"cancelled"},
+              "bulk_cancel", job)
+    r = client.post("/api/bookings/individual", headers=auth(seed_user("job_user_x", "+6594440099", "Late")),
+                    json={"eventId": "job_cancel"})
+    assert_ok(r.status_code == 400 and r.get_json()["error"] == "Event is cancelled", "cancelled_event_rejects", r.get_json())
+
+    r = client.post("/api/admin/events/bulk", headers=auth(admin_token),
+                    json={"action": "update", "eventIds": ["job_cancel", "job_missing"], "updates": {"price": "12", "region": "East"}})
+    job = wait_for(r.get_json()["jobId"])
+    stored = db.collection("events").document("job_cancel").get().to_dict()
+    assert_ok(job["progress"]["eventsUpdated"] == 1 and job["progress"]["failedWrites"] == 1
+              and stored["price"] == 12.0 and stored["region"] == "east", "bulk_update", [job, stored])
+
+    r = client.post("/api/admin/events/bulk", headers=auth(admin_token),
+                    json={"action": "update", "eventIds": ["job_cancel"], "updates": {"maxParticipants": 5}})
+    assert_ok(r.status_code == 400, "bulk_update_validation", r.get_json())
+    r = client.post("/api/admin/events/bulk", headers=auth(admin_token),
+                    json={"action": "update", "eventIds": ["job_cancel"], "updates": {"status": "cancelled"}})
+    assert_ok(r.status_code == 400, "bulk_update_no_status", r.get_json())
+    r = client.get("/api/admin/jobs/nope", headers=auth(admin_token))
+    assert_ok(r.status_code == 404, "job_not_found", r.get_json())
+
+
+def check_friend_pairs(client):
+    """Friend requests live at friendRequests/{sorted uids}; concurrent opposite requests yield one."""
+    from concurrent.futures import ThreadPoolExecutor
+    from scripts.migrate_friend_requests import migrate_request
+
+    a = seed_user("pair_a", "+6593330001", "Pair A")
+    b = seed_user("pair_b", "+6593330002", "Pair B")
+    db._latency = 0.005
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            codes = list(pool.map(
+                lambda args: client.post("/api/friends/request", headers=auth(args[0]), json={"phoneNumber": args[1]}).status_code,
+                [(a, "93330002"), (b, "93330001")],
+            ))
+    finally:
+        db._latency = 0
+    pairs = [r.id for r in db.collection("friendRequests").stream() if "pair_a" in r.id]
+    assert_ok(sorted(codes) == [201, 400] and pairs == ["6_pair_a_pair_b"], "friend_pair_race", [codes, pairs])
+
+    req = db.collection("friendRequests").document("6_pair_a_pair_b").get().to_dict()
+    recipient = b if req["toUserId"] == "pair_b" else a
+    sender_phone = "93330001" if req["fromUserId"] == "pair_a" else "93330002"
+    r = client.put("/api/friends/request/6_pair_a_pair_b", headers=auth(recipient), json={"action": "reject"})
+    assert_ok(r.status_code == 200, "friend_pair_reject", r.get_json())
+    r = client.post("/api/friends/request", headers=auth(recipient), json={"phoneNumber": sender_phone})
+    assert_ok(r.status_code == 201 and r.get_json()["requestId"] == "6_pair_a_pair_b", "friend_pair_rerequest", r.get_json())
+
+    from services.friend_pairs import friend_pair_id
+    assert_ok(friend_pair_id("a_b", "c") != friend_pair_id("a", "b_c"), "friend_pair_id_unambiguous", None)
+
+    # Legacy auto-id documents are re-keyed; the strongest status per pair wins
+    legacy = db.collection("friendRequests")
+    legacy.document("legacy_1").set({"fromUserId": "old_x", "toUserId": "old_y", "status": "rejected"})
+    legacy.document("legacy_2").set({"fromUserId": "old_y", "toUserId": "old_x", "status": "pending"})
+    legacy.document("legacy_3").set({"fromUserId": "old_z", "toUserId": "old_x", "status": "accepted"})
+    outcomes = [migrate_request(legacy.document(d)) for d in ("legacy_1", "legacy_2", "legacy_3")]
+    docs = {d.id: d.to_dict() for d in legacy.stream() if "old_" in d.id or d.id.startswith("legacy_")}
+    assert_ok(outcomes == ["moved", "moved", "moved"] and set(docs) == {"5_old_x_old_y", "5_old_x_old_z"}
+              and docs["5_old_x_old_y"]["status"] == "pending" and docs["5_old_x_old_z"]["status"] == "accepted",
+              "friend_pair_migration", [outcomes, docs])
+    legacy.document("old_p_old_q").set({"fromUserId": "old_q", "toUserId": "old_p", "status": "pending"})
+    outcome = migrate_request(legacy.document("old_p_old_q"))
+    assert_ok(outcome == "moved" and legacy.document("5_old_p_old_q").get().exists
+              and not legacy.document("old_p_old_q").get().exists, "friend_pair_rekey_unprefixed", outcome)
+
+
+def check_async_datastore(user_token):
+    """AsyncMemoryClient under async_transactional and asyncio.gather (the async app's data path)."""
+    import asyncio
+    from services.firebase_service import get_async_db
+    from utils.transactions import async_transactional, txn_metrics
+    from services.user_loader import load_users_async
+    from api.bookings import _plan_individual_booking
+
+    adb = get_async_db()
+    ref = adb.collection("events").document("async_event")
+
+    async def book(uid):
+        transaction = adb.transaction()
+
+        @async_transactional('test.async_booking')
+        async def _txn(txn):
+            snap = await ref.get(transaction=txn)
+            _, update, _ = _plan_individual_booking(snap.to_dict(), {}, ref.id, uid)
+            txn.update(ref, update)
+
+        try:
+            await _txn(transaction)
+            return True
+        except ValueError:
+            return False
+
+    async def run():
+        await ref.set({"title": "Async", "maxParticipants": 3, "currentParticipants": 0, "participants": []})
+        booked = await asyncio.gather(*(book(f"async_{i}") for i in range(4)))
+        users = await load_users_async(adb, ["user_1", "missing", "user_2"], chunk_size=2)
+        return booked, (await ref.get()).to_dict(), users
+
+    db.reset_stats()
+    db._latency = 0.002  # overlap the transactions so they contend
+    try:
+        booked, event, users = asyncio.run(run())
+    finally:
+        db._latency = 0.0
+    assert_ok(sorted(booked) == [False, True, True, True] and event["currentParticipants"] == 3
+              and event["availableSlots"] == 0, "async_transactions", [booked, event])
+    assert_ok(db.stats["transactionAborts"] > 0, "async_contention", db.stats)
+    metrics = txn_metrics.stats()["transactions"]["test.async_booking"]
+    assert_ok(metrics["calls"] == 4 and metrics["committed"] == 3 and metrics["aborts"] > 0
+              and metrics["contended"][0]["document"] == "events/async_event", "async_txn_metrics", metrics)
+    assert_ok(sorted(users) == ["user_1", "user_2"], "async_user_loader", users)
+
+    try:
+        import quart  # noqa: F401
+    except ImportError:
+        return "skipped app checks (quart not installed)"
+    from async_app import create_async_app
+
+    async def run_app():
+        client = create_async_app().test_client()
+        listing = await client.get("/api/events?type=music&limit=2")
+        friends = await client.get("/api/friends", headers=auth(user_token))
+        return await listing.get_json(), await friends.get_json()
+
+    listing, friends = asyncio.run(run_app())
+    assert_ok([e["id"] for e in listing["events"]] == ["page_0", "page_1"], "async_list_events", listing)
+    assert_ok(friends.get("success"), "async_list_friends", friends)
+    return "ok"
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    results = {}
+
+    check_datastore_primitives()
+    check_transaction_metrics()
+    results["primitives"] = "ok"
+
+    admin_token = seed_user("admin_1", "+6599990001", "Admin", role="admin")
+    user_token = seed_user("user_1", "+6599990002", "User One")
+    friend_token = seed_user("user_2", "+6599990003", "User Two")
+
+    start = datetime.utcnow() + timedelta(days=3)
+    r = client.post("/api/admin/events", headers=auth(admin_token), json={
+        "title": "Memory Event", "description": "d", "format": "offline", "venueType": "indoor",
+        "type": "sports", "region": "central", "organiser": "Nemo", "location": "Hall",
+        "date": start.strftime("%Y-%m-%d"), "startTime": "10:00", "endTime": "12:00",
+        "price": 0, "maxParticipants": 2,
+    })
+    assert_ok(r.status_code == 201, "create_event", r.get_json())
+    event_id = r.get_json()["eventId"]
+
+    r = client.post("/api/bookings/individual", headers=auth(user_token), json={"eventId": event_id})
+    assert_ok(r.status_code == 201, "book_individual", r.get_json())
+    r = client.post("/api/bookings/individual", headers=auth(user_token), json={"eventId": event_id})
+    assert_ok(r.status_code == 400, "double_booking_rejected", r.get_json())
+    r = client.post("/api/bookings/group", headers=auth(friend_token), json={"eventId": event_id, "groupMemberNames": ["Guest"]})
+    assert_ok(r.status_code == 400, "capacity_enforced", r.get_json())
+
+    r = client.get(f"/api/events/{event_id}")
+    ev = r.get_json()["event"]
+    assert_ok(ev["currentParticipants"] == 1 and ev["availableSlots"] == 1, "event_counts", ev)
+    # Derived fields are persisted by the writers, not computed on read
+    stored = db.collection("events").document(event_id).get().to_dict()
+    assert_ok(stored.get("availableSlots") == 1 and stored.get("startTimestamp"), "stored_derived_fields", stored)
+    # Event reads are served from the snapshot-synced catalog (no datastore reads)
+    reads_before = db.stats["documentReads"]
+    results["events"] = client.get("/api/events?type=sports").get_json()["count"]
+    assert_ok(results["events"] == 1 and db.stats["documentReads"] == reads_before, "catalog_reads", db.stats)
+
+    check_event_paging(client)
+    check_listing_payload(client)
+    check_conditional_get(client)
+    check_json_and_compression(app, client)
+    check_seat_shards(client, admin_token)
+    check_admission_queue(client, admin_token)
+    check_role_cache()
+    check_idempotency(client, admin_token)
+    legacy_token = check_attendee_migration()
+    r = client.post("/api/bookings/individual", headers=auth(legacy_token), json={"eventId": "legacy_event"})
+    assert_ok(r.status_code == 400, "migrated_double_booking_rejected", r.get_json())
+    r = client.delete("/api/bookings/by-event/legacy_event", headers=auth(legacy_token))
+    assert_ok(r.status_code == 404, "migrated_no_booking", r.get_json())
+
+    r = client.get("/api/bookings/my?filter=current", headers=auth(user_token))
+    assert_ok(r.get_json()["count"] == 1, "my_bookings", r.get_json())
+
+    r = client.delete(f"/api/bookings/by-event/{event_id}", headers=auth(user_token))
+    assert_ok(r.status_code == 200 and r.get_json()["seatsFreed"] == 1, "cancel_by_event", r.get_json())
+    stored = db.collection("events").document(event_id).get().to_dict()
+    assert_ok(stored.get("availableSlots") == 2, "cancel_restores_slots", stored)
+    r = client.delete(f"/api/bookings/by-event/{event_id}", headers=auth(user_token))
+    assert_ok(r.status_code == 404, "cancel_by_event_twice", r.get_json())
+
+    r = client.post("/api/bookings/group", headers=auth(friend_token), json={"eventId": event_id, "groupMemberNames": ["Guest"]})
+    group_id = r.get_json()["bookingId"]
+    r = client.delete(f"/api/bookings/{group_id}", headers=auth(user_token))
+    assert_ok(r.status_code == 403, "cancel_not_owner", r.get_json())
+    r = client.delete(f"/api/bookings/{group_id}", headers=auth(friend_token))
+    assert_ok(r.status_code == 200 and r.get_json()["seatsFreed"] == 2, "cancel_group", r.get_json())
+    stored = db.collection("events").document(event_id).get().to_dict()
+    attendees = list(db.collection("events").document(event_id).collection("attendees").stream())
+    assert_ok(stored.get("availableSlots") == 2 and "participants" not in stored and not attendees,
+              "cancel_group_restores_event", [stored, [a.to_dict() for a in attendees]])
+    r = client.delete(f"/api/bookings/{group_id}", headers=auth(friend_token))
+    assert_ok(r.status_code == 400, "cancel_twice_rejected", r.get_json())
+
+    check_keyed_guests(client, friend_token)
+    check_bulk_booking(client, friend_token)
+    check_event_import(client, admin_token)
+    check_admin_jobs(client, admin_token)
+
+    r = client.post("/api/friends/request", headers=auth(user_token), json={"phoneNumber": "99990003"})
+    assert_ok(r.status_code == 201, "friend_request", r.get_json())
+    req_id = r.get_json()["requestId"]
+    r = client.get("/api/friends/pending", headers=auth(friend_token))
+    pending = r.get_json()
+    assert_ok(pending["count"] == 1 and pending["requests"][0]["fromUser"]["name"] == "User One", "pending", pending)
+    r = client.put(f"/api/friends/request/{req_id}", headers=auth(friend_token), json={"action": "accept"})
+    assert_ok(r.status_code == 200, "accept", r.get_json())
+    r = client.get("/api/friends", headers=auth(user_token))
+    assert_ok(r.get_json()["friends"][0]["id"] == "user_2", "friends_list", r.get_json())
+    r = client.post("/api/friends/request", headers=auth(friend_token), json={"phoneNumber": "99990002"})
+    assert_ok(r.status_code == 400, "friend_request_already_friends", r.get_json())
+    check_friend_pairs(client)
+
+    r = client.get("/api/admin/health", headers=auth(admin_token))
+    token_stats = r.get_json()["tokenCache"]
+    assert_ok(token_stats["hits"] > 0, "token_cache", token_stats)
+    txn_stats = r.get_json()["transactions"]["transactions"]
+    assert_ok(txn_stats["bookings.individual"]["committed"] >= 1
+              and txn_stats["bookings.admission_batch"]["calls"] >= 1, "txn_health", txn_stats)
+    results["tokenCache"] = token_stats
+
+    # Role changes apply immediately despite the cached role
+    r = client.get("/api/admin/health", headers=auth(user_token))
+    assert_ok(r.status_code == 403, "non_admin_rejected", r.get_json())
+    FirebaseService.set_user_role("user_1", "admin")
+    r = client.get("/api/admin/health", headers=auth(user_token))
+    assert_ok(r.status_code == 200, "role_invalidation", r.get_json())
+    FirebaseService.set_user_role("user_1", "user")
+
+    results["async"] = check_async_datastore(user_token)
+
+    results["stats"] = dict(db.stats)
+
+    print("===== MEMORY DATASTORE TEST START =====")
+    print(pretty(results))
+    print("===== MEMORY DATASTORE TEST END =====")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+        sys.exit(0)
+    except Exception as e:
+        print("Memory datastore test failed:", repr(e))
+        sys.exit(1)